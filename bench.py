@@ -0,0 +1,171 @@
+from util import Config
+from pipe import pump_fd
+from logparse import EventBus, LogParser
+from hooks import HookRegistry
+from boot import percentile
+from gclog import GCAnalyzer
+from sampler import read_proc_stat, clock_ticks
+from expand import (
+    ServerConfigType, JVMArgsType,
+    generate_auto_jvm_args, generate_command, get_jdk_version
+)
+
+from os import path
+from time import monotonic, sleep
+from typing import Callable
+from threading import Thread, Event
+from subprocess import Popen, PIPE, DEVNULL, TimeoutExpired
+
+# ----------------------------------------------------------------
+
+class BenchResult:
+    __slots__ = ("profile", "done_seconds", "peak_rss", "pauses", "pause_total", "idle_cpu", "error")
+
+    def __init__(self, profile: str):
+        self.profile: str = profile
+        self.done_seconds: float = None
+        self.peak_rss: int = None
+        self.pauses: list[float] = list()
+        self.pause_total: float = 0 # ms
+        self.idle_cpu: float = None
+        self.error: str = None
+
+def run_boot(
+    profile: str,
+    command_args: list[str],
+    loader: str,
+    gc_analyzer: GCAnalyzer = None,
+    timeout: float = 600,
+    idle_seconds: float = 10
+) -> BenchResult:
+    result: BenchResult = BenchResult(profile)
+    done: Event = Event()
+
+    bus: EventBus = EventBus()
+    parser: LogParser = LogParser(bus, loader)
+    hooks: HookRegistry = HookRegistry(bus)
+    hooks.on("done", lambda event, match: done.set())
+
+    if gc_analyzer:
+        gc_analyzer.start()
+    started: float = monotonic()
+    try:
+        process: Popen[bytes] = Popen(command_args, stdin=PIPE, stdout=PIPE, stderr=DEVNULL, bufsize=0)
+    except OSError as err:
+        result.error = f"无法启动：{err}"
+        if gc_analyzer:
+            gc_analyzer.stop()
+        return result
+    reader: Thread = Thread(target=lambda: pump_fd(process.stdout.fileno(), parser.feed, False), daemon=True)
+    reader.start()
+
+    try:
+        while not done.wait(0.1):
+            if process.poll() is not None:
+                result.error = f"启动前退出，返回代码{process.returncode}"
+                return result
+            if monotonic() - started > timeout:
+                result.error = f"{timeout:.0f}s内未启动完成"
+                return result
+        result.done_seconds = monotonic() - started
+
+        # 启动完成后空闲一段时间，测量空载tick的CPU占用
+        before: dict[str, int] | None = read_proc_stat(process.pid)
+        sleep(idle_seconds)
+        if process.poll() is not None:
+            result.error = f"空载期间退出，返回代码{process.returncode}"
+            return result
+        after: dict[str, int] | None = read_proc_stat(process.pid)
+        if before and after:
+            result.idle_cpu = (after["ticks"] - before["ticks"]) / clock_ticks / idle_seconds * 100
+            result.peak_rss = after.get("VmHWM")
+    finally:
+        if process.poll() is None:
+            try:
+                process.stdin.write(b"stop\n")
+                process.stdin.flush()
+                process.wait(timeout=120)
+            except (OSError, TimeoutExpired):
+                process.kill()
+                process.wait()
+        reader.join(timeout=5)
+        if gc_analyzer:
+            gc_analyzer.stop()
+            result.pauses = list(gc_analyzer.pauses)
+            result.pause_total = gc_analyzer.pause_total
+
+    return result
+
+# ----------------------------------------------------------------
+
+def default_profiles(server_config: Config[ServerConfigType]) -> dict[str, dict]:
+    auto: dict = dict(generate_auto_jvm_args(server_config).data)
+    collectors: list[str] = ["XX_UseG1GC", "XX_UseZGC", "XX_UseShenandoahGC"]
+    g1_only: list[str] = ["XX_G1HeapRegionSize", "XX_MaxGCPauseMillis", "XX_UseStringDeduplication", "Xmn"]
+
+    def with_collector(name: str) -> dict:
+        data: dict = {key: value for key, value in auto.items() if not key in collectors and not key in g1_only}
+        data[name] = True
+        return data
+
+    profiles: dict[str, dict] = {
+        "current": dict(server_config["jvm_args"].data),
+        "auto_g1": auto,
+        "zgc": with_collector("XX_UseZGC"),
+        "shenandoah": with_collector("XX_UseShenandoahGC"),
+    }
+    for name, data in server_config["bench_profiles"].items(): # 用户自定义配置，同名时覆盖预设
+        profiles[name] = dict(data.data) if isinstance(data, Config) else dict(data)
+    return profiles
+
+def run_benchmark(
+    server_config: Config[ServerConfigType],
+    profiles: dict[str, dict] = None,
+    runs: int = None,
+    idle_seconds: float = None,
+    print_function: Callable = print
+) -> list[str]:
+    profiles: dict[str, dict] = profiles or default_profiles(server_config)
+    runs: int = runs or server_config["bench_runs"]
+    idle_seconds: float = idle_seconds if idle_seconds is not None else server_config["bench_idle_seconds"]
+    jdk_version: tuple[int, int, int] = get_jdk_version(server_config["jdk_path"])
+    gc_analyzer: GCAnalyzer = GCAnalyzer(log_path=path.join("runner_data", "gc", "bench.log"))
+
+    results: dict[str, list[BenchResult]] = dict()
+    for name, jvm_args in profiles.items():
+        config: Config[ServerConfigType] = Config[ServerConfigType]({
+            **server_config.data, "jvm_args": Config[JVMArgsType](jvm_args)
+        })
+        # 与正式启动走同一条generate_command路径
+        command_args: list[str] = generate_command(config.data, gc_analyzer.jvm_args(jdk_version))
+
+        for index in range(runs):
+            print_function(f"[{name}] 第{index + 1}/{runs}次启动……")
+            result: BenchResult = run_boot(
+                name, command_args, server_config["loader"], gc_analyzer, idle_seconds=idle_seconds
+            )
+            if result.error:
+                print_function(f"[{name}] 失败：{result.error}")
+            results.setdefault(name, list()).append(result)
+
+    return benchmark_table(results)
+
+def benchmark_table(results: dict[str, list[BenchResult]]) -> list[str]:
+    def cell(values: list[float], rate: float, scale: float = 1, digits: int = 1) -> str:
+        return f"{percentile(values, rate) * scale:.{digits}f}" if values else "-"
+
+    rows: list[str] = [
+        f"{"配置":<12}{"成功":>6}{"Done p50":>10}{"Done max":>10}{"峰值RSS(MB)":>12}{"GC p99(ms)":>12}{"GC合计(s)":>10}{"空载CPU%":>10}"
+    ]
+    for name, items in results.items():
+        ok: list[BenchResult] = [item for item in items if not item.error]
+        done: list[float] = [item.done_seconds for item in ok]
+        rss: list[float] = [item.peak_rss for item in ok if item.peak_rss]
+        pauses: list[float] = [pause for item in ok for pause in item.pauses]
+        totals: list[float] = [item.pause_total / 1000 for item in ok]
+        idle: list[float] = [item.idle_cpu for item in ok if item.idle_cpu is not None]
+        rows.append(
+            f"{name:<12}{f"{len(ok)}/{len(items)}":>6}{cell(done, 0.5, digits=2):>10}{cell(done, 1, digits=2):>10}"
+            f"{cell(rss, 1, 1 / (1 << 20), 0):>12}{cell(pauses, 0.99):>12}{cell(totals, 0.5, digits=2):>10}{cell(idle, 0.5):>10}"
+        )
+    return rows
@@ -0,0 +1,212 @@
+from logparse import EventBus, LogEvent
+from hooks import HookRegistry, Hook
+from cds import cds_mode_names
+
+from os import path, makedirs
+from json import dumps, loads, JSONDecodeError
+from time import time, perf_counter
+from re import Match
+from threading import Lock
+
+milestones: tuple[str, ...] = (
+    "spawn", "first_line", "loader_init", "mod_loading", "server_start", "spawn_area", "done"
+)
+
+milestone_names: dict[str, str] = {
+    "first_line": "首行输出",
+    "loader_init": "加载器初始化",
+    "mod_loading": "模组加载",
+    "server_start": "服务端启动",
+    "spawn_area": "准备出生点",
+    "done": "启动完成",
+}
+
+loader_init_literals: dict[str, list[str]] = {
+    "Vanilla": ["Environment: "],
+    "Fabric": ["Loading Minecraft "],
+    "Quilt": ["Loading Minecraft "],
+    "Forge": ["ModLauncher running", "Launching target "],
+    "NeoForge": ["ModLauncher running", "Launching target "],
+}
+
+# 里程碑 -> (预筛选字面量, 正则)
+milestone_hooks: dict[str, list[tuple[str, str | None]]] = {
+    "mod_loading": [("mods", r"(?:Loading|Found) \d+ mods")],
+    "server_start": [("Starting minecraft server version", None)],
+    "spawn_area": [("Preparing spawn area", None), ("Preparing start region", None)],
+    "done": [("Done (", r"^Done \((?P<seconds>[\d.]+)s\)!")],
+}
+
+boot_history_path: str = path.join("runner_data", "boot_history.jsonl")
+
+# ----------------------------------------------------------------
+
+class BootProfiler:
+    def __init__(self, bus: EventBus, hooks: HookRegistry, loader: str = "Vanilla", history_path: str = boot_history_path, keep: int = 500):
+        self.bus: EventBus = bus
+        self.hooks: HookRegistry = hooks
+        self.loader: str = loader
+        self.history_path: str = history_path
+        self.keep: int = keep
+
+        self.lock: Lock = Lock()
+        self.active: list[Hook] = list()
+        self.started: float = None
+        self.marks: dict[str, float] = dict()
+        self.reported: float = None
+        self.tag: str = None # 附加到记录上的启动条件，如类数据共享模式
+        self.last_seconds: float = None # 最近一次完整启动的耗时
+
+    def start(self):
+        self.stop()
+        self.started: float = perf_counter()
+        self.marks: dict[str, float] = {"spawn": 0.0}
+        self.reported: float = None
+
+        self.bus.subscribe(self.on_first_line)
+        for literal in loader_init_literals.get(self.loader, list()):
+            self.active.append(self.hooks.register("boot_loader_init", self.marker("loader_init"), literal=literal))
+        for name, patterns in milestone_hooks.items():
+            for literal, pattern in patterns:
+                self.active.append(self.hooks.register(f"boot_{name}", self.marker(name), pattern=pattern, literal=literal))
+
+    def stop(self):
+        self.bus.unsubscribe(self.on_first_line)
+        for hook in self.active:
+            self.hooks.unregister(hook)
+        self.active: list[Hook] = list()
+
+    def marker(self, name: str):
+        def handler(event: LogEvent, result: Match | None):
+            self.mark(name)
+            if name == "done":
+                if result is not None:
+                    self.reported: float = float(result["seconds"])
+                self.stop() # 启动完成后不再占用钩子
+                self.save(True)
+        return handler
+
+    def mark(self, name: str):
+        with self.lock:
+            if self.started is not None and not name in self.marks:
+                self.marks[name] = perf_counter() - self.started
+
+    def on_first_line(self, event: LogEvent):
+        self.bus.unsubscribe(self.on_first_line)
+        self.mark("first_line")
+
+    def finish(self):
+        # 进程退出时仍未Done，记为未完成的启动
+        if self.started is not None and self.active:
+            self.stop()
+            self.save(False)
+
+    # ----------------------------------------------------------------
+
+    def save(self, complete: bool):
+        with self.lock:
+            if self.started is None:
+                return
+            record: dict = {
+                "t": int(time()),
+                "ok": complete,
+                "m": [round(self.marks[name] * 1000) if name in self.marks else None for name in milestones],
+                "r": self.reported,
+                "c": self.tag
+            }
+            if complete:
+                self.last_seconds: float = self.marks["done"]
+            self.started: float = None
+
+        makedirs(path.dirname(self.history_path) or ".", exist_ok=True)
+        with open(self.history_path, mode="a", encoding="utf-8") as file:
+            file.write(dumps(record, separators=(",", ":")) + "\n")
+
+        records: list[dict] = load_boot_history(self.history_path)
+        if len(records) > self.keep * 2: # 超出后一次性截断，避免每次重写
+            with open(self.history_path, mode="w", encoding="utf-8") as file:
+                for item in records[-self.keep:]:
+                    file.write(dumps(item, separators=(",", ":")) + "\n")
+
+# ----------------------------------------------------------------
+
+def load_boot_history(history_path: str = boot_history_path) -> list[dict]:
+    records: list[dict] = list()
+    if not path.exists(history_path):
+        return records
+
+    with open(history_path, mode="r", encoding="utf-8") as file:
+        for text in file:
+            try:
+                records.append(loads(text))
+            except JSONDecodeError:
+                continue
+    return records
+
+def percentile(values: list[float], rate: float) -> float:
+    ordered: list[float] = sorted(values)
+    index: float = (len(ordered) - 1) * rate
+    low: int = int(index)
+    high: int = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (index - low)
+
+def phase_durations(record: dict) -> dict[str, float]:
+    # 每个阶段的耗时 = 本里程碑与上一个已到达里程碑的间隔（秒）
+    durations: dict[str, float] = dict()
+    previous: int = None
+    for name, value in zip(milestones, record["m"]):
+        if value is None:
+            continue
+        if previous is not None:
+            durations[name] = (value - previous) / 1000
+        previous: int = value
+    return durations
+
+def boot_report(history_path: str = boot_history_path, window: int = 10, tolerance: float = 1.2) -> list[str]:
+    records: list[dict] = [item for item in load_boot_history(history_path) if item.get("ok")]
+    if not records:
+        return ["暂无完整的启动记录。"]
+
+    result: list[str] = [f"共{len(records)}次完整启动，耗时单位：秒"]
+    result.append(f"{"阶段":<10}{"p50":>8}{"p90":>8}{"max":>8}{"最近":>8}")
+
+    phases: list[dict[str, float]] = [phase_durations(item) for item in records]
+    latest: dict[str, float] = phases[-1]
+    baseline: list[dict[str, float]] = phases[-window - 1:-1]
+    regressions: list[str] = list()
+
+    for name in [*milestones[1:], "total"]:
+        if name == "total":
+            values: list[float] = [item["m"][-1] / 1000 for item in records]
+            current: float = values[-1]
+            previous: list[float] = values[-window - 1:-1]
+            label: str = "总计"
+        else:
+            values: list[float] = [item[name] for item in phases if name in item]
+            current: float = latest.get(name)
+            previous: list[float] = [item[name] for item in baseline if name in item]
+            label: str = milestone_names[name]
+        if not values:
+            continue
+
+        result.append(
+            f"{label:<10}{percentile(values, 0.5):>8.2f}{percentile(values, 0.9):>8.2f}"
+            f"{max(values):>8.2f}{current if current is not None else float("nan"):>8.2f}"
+        )
+
+        if current is not None and previous:
+            median: float = percentile(previous, 0.5)
+            if current > median * tolerance and current - median >= 1:
+                regressions.append(f"⚠{label}变慢：{current:.2f}s，前{len(previous)}次中位数{median:.2f}s")
+
+    result.extend(regressions or [f"最近一次启动未发现相对前{window}次的明显退化。"])
+
+    totals: dict[str, list[float]] = dict()
+    for item in records:
+        if item.get("c"):
+            totals.setdefault(item["c"], list()).append(item["m"][-1] / 1000)
+    if len(totals) > 1 or "use" in totals:
+        result.append("类数据共享对比（启动总耗时中位数）：")
+        for mode, values in totals.items():
+            result.append(f"  {cds_mode_names.get(mode, mode)}：{percentile(values, 0.5):.2f}s（{len(values)}次）")
+    return result
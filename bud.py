@@ -1,4 +1,4 @@
-import ast, black
+import ast, sys, time, marshal, zipfile, subprocess, importlib.util
 
 class FromImportNodeTransformer(ast.NodeTransformer):
     def __init__(self, file_names):
@@ -10,12 +10,13 @@ class FromImportNodeTransformer(ast.NodeTransformer):
         module = node.module
         level = node.level
 
+        # 函数内的按需导入在合并后已是同一模块的全局名，替换为pass以免留下空函数体
+        if module in self.file_names:
+            return ast.Pass() if node.col_offset > 0 else None
+
         if node.col_offset > 0:
             return node
 
-        if module in self.file_names:
-            return
-
         imported_names = set()
 
         for alias in node.names:
@@ -44,58 +45,142 @@ files = (
     "util.py",
     "ui.py",
     "kt.py",
+    "pipe.py",
+    "render.py",
+    "spool.py",
+    "logparse.py",
+    "hooks.py",
+    "cds.py",
+    "flags.py",
+    "boot.py",
+    "gclog.py",
+    "sampler.py",
+    "metrics.py",
+    "pressure.py",
+    "players.py",
+    "shutdown.py",
+    "watchdog.py",
+    "rcon.py",
+    "ping.py",
+    "daemon.py",
+    "restart.py",
+    "engine.py",
     "expand.py",
+    "host.py",
+    "bench.py",
     "tool.py",
+    "cli.py",
     "main.py"
 )
 
-file_names = [n.rstrip(".py") for n in files]
+file_names = [n.removesuffix(".py") for n in files]
 
 output = "start.py"
+archive = "start.pyz"
 seq = "\n\n"
 
-codes = list()
-for name in files:
-    with open(name, mode="r", encoding="utf-8") as f:
-        text = f.read()
-        codes.append(text)
+# python bud.py          合并为start.py
+# python bud.py pyz      打包为预编译的start.pyz
+# python bud.py compare  两者都构建，并比较构建耗时与冷启动耗时
+mode = sys.argv[1] if len(sys.argv) > 1 else "py"
+
+# start.pyz的入口：带参数时只加载命令行部分，菜单及其依赖不会被导入
+archive_main = '''from sys import argv
 
-code = seq.join(codes)
+if len(argv) > 1 and argv[1] != "--profile-startup":
+    from cli import run_cli
+    raise SystemExit(run_cli(argv[1:]))
+
+from runpy import run_module
+run_module("main", run_name="__main__")
+'''
 
 # ----------------------------------------------------------------
 
-tree = ast.parse(code)
-transformer = FromImportNodeTransformer(file_names)
-transformer.visit(tree)
+def build_source():
+    import black
+
+    codes = list()
+    for name in files:
+        with open(name, mode="r", encoding="utf-8") as f:
+            text = f.read()
+            codes.append(text)
 
-imports = sorted(transformer.from_imports.items(), key=lambda x: len(x[0]), reverse=True)
+    code = seq.join(codes)
 
-for key, item in imports:
-    module = item["module"]
-    level = item["level"]
-    names = list(item["names"])
+    tree = ast.parse(code)
+    transformer = FromImportNodeTransformer(file_names)
+    transformer.visit(tree)
 
-    aliases = list()
-    for alias in names:
-        aliases.append(
-            ast.alias(*alias)
+    imports = sorted(transformer.from_imports.items(), key=lambda x: len(x[0]), reverse=True)
+
+    for key, item in imports:
+        module = item["module"]
+        level = item["level"]
+        names = list(item["names"])
+
+        aliases = list()
+        for alias in names:
+            aliases.append(
+                ast.alias(*alias)
+            )
+
+        import_node = ast.ImportFrom(
+            module=module,
+            names=aliases,
+            level=level
         )
 
-    import_node = ast.ImportFrom(
-        module=module,
-        names=aliases,
-        level=level
-    )
+        tree.body.insert(0, import_node)
 
-    tree.body.insert(0, import_node)
+    ast.fix_missing_locations(tree)
 
-ast.fix_missing_locations(tree)
+    code = ast.unparse(tree)
+    header = f"# Auto-generated {output} by bud.py\n# Source files: {', '.join(files)}\n\n"
+    code = black.format_str(header + code, mode=black.Mode())
 
-# ----------------------------------------------------------------
+    with open(output, mode="w", encoding="utf-8") as f:
+        f.write(code)
+
+def build_archive():
+    # 各源文件编译为同名.pyc直接放在归档根目录，zipimport可加载无源码的.pyc，启动时不再编译
+    # 字节码与运行bud.py的解释器版本绑定，须用目标Python构建
+    with open(archive, mode="wb") as f:
+        f.write(b"#!/usr/bin/env python3\n")
+        with zipfile.ZipFile(f, mode="w", compression=zipfile.ZIP_STORED) as z:
+            sources = [(name, open(name, mode="rb").read()) for name in files]
+            sources.append(("__main__.py", archive_main.encode("utf-8")))
+            for name, source in sources:
+                code = compile(source, name, "exec", dont_inherit=True, optimize=0)
+                # 不校验源码的哈希式pyc：归档中没有源码，也不受文件时间戳影响
+                data = importlib.util.MAGIC_NUMBER + (1).to_bytes(4, "little") + importlib.util.source_hash(source)
+                z.writestr(name.removesuffix(".py") + ".pyc", data + marshal.dumps(code))
 
-code = ast.unparse(tree)
-header = f"# Auto-generated {output} by bud.py\n# Source files: {', '.join(files)}\n\n" 
-code = black.format_str(header + code, mode=black.Mode())
+# ----------------------------------------------------------------
 
-with open(output, mode="w", encoding="utf-8") as f:
-    f.write(code)
\ No newline at end of file
+def timed(function):
+    started = time.perf_counter()
+    function()
+    return time.perf_counter() - started
+
+def cold_start(target, runs=10):
+    # -h在解析参数后立即退出，计入的是解释器启动、加载代码与执行模块顶层的耗时
+    results = list()
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, target, "-h"], stdout=subprocess.DEVNULL, check=True)
+        results.append(time.perf_counter() - started)
+    results.sort()
+    return results[len(results) // 2]
+
+if mode == "py":
+    build_source()
+elif mode == "pyz":
+    build_archive()
+elif mode == "compare":
+    source_build = timed(build_source)
+    archive_build = timed(build_archive)
+    for target, build in ((output, source_build), (archive, archive_build)):
+        print(f"{target}: 构建 {build * 1000:.0f}ms，冷启动中位数 {cold_start(target) * 1000:.0f}ms")
+else:
+    raise SystemExit(f"未知的模式：{mode}（可选 py、pyz、compare）")
@@ -0,0 +1,80 @@
+from os import path, listdir, makedirs, remove, stat_result, stat
+from hashlib import sha1
+from typing import Literal
+
+type CDSMode = Literal["off", "dump", "use"]
+
+cds_directory: str = path.join("runner_data", "cds")
+cds_mode_names: dict[str, str] = {"off": "未使用归档", "dump": "生成归档", "use": "使用归档"}
+
+# ----------------------------------------------------------------
+
+def stat_signature(file_path: str) -> str:
+    try:
+        info: stat_result = stat(file_path)
+    except OSError:
+        return f"{file_path}:-"
+    return f"{file_path}:{info.st_size}:{info.st_mtime_ns}"
+
+def cds_fingerprint(command_args: list[str], jdk_release: str = None, watch_paths: list[str] = None) -> str:
+    # 启动参数（含-Xmx、GC选择）、JDK的release文件、核心与模组文件任一变化都会使归档失效
+    digest = sha1()
+    for arg in command_args:
+        digest.update(arg.encode("utf-8", errors="replace") + b"\0")
+        if arg.startswith("@") or arg.endswith(".jar"):
+            digest.update(stat_signature(arg.lstrip("@")).encode() + b"\0")
+
+    if jdk_release and path.exists(jdk_release):
+        with open(jdk_release, mode="rb") as file:
+            digest.update(file.read())
+
+    for watch_path in watch_paths or list():
+        if path.isdir(watch_path):
+            for name in sorted(listdir(watch_path)):
+                digest.update(stat_signature(path.join(watch_path, name)).encode() + b"\0")
+        else:
+            digest.update(stat_signature(watch_path).encode() + b"\0")
+
+    return digest.hexdigest()[:16]
+
+class ClassDataSharing:
+    def __init__(self, directory: str = cds_directory, watch_paths: list[str] = None):
+        self.directory: str = directory
+        self.watch_paths: list[str] = watch_paths if watch_paths is not None else ["mods", "libraries"]
+        self.mode: CDSMode = "off"
+        self.archive: str = None
+
+    def prepare(
+        self,
+        command_args: list[str],
+        jdk_version: tuple[int, int, int] = None,
+        jdk_release: str = None
+    ) -> list[str]:
+        # 动态归档（-XX:ArchiveClassesAtExit）需要JDK 13+
+        if jdk_version is None or jdk_version < (13, 0, 0):
+            self.mode: CDSMode = "off"
+            return list()
+
+        fingerprint: str = cds_fingerprint(command_args, jdk_release, self.watch_paths)
+        self.archive: str = path.abspath(path.join(self.directory, f"{fingerprint}.jsa"))
+        makedirs(self.directory, exist_ok=True)
+        self.prune(f"{fingerprint}.jsa")
+
+        if path.exists(self.archive) and path.getsize(self.archive):
+            self.mode: CDSMode = "use"
+            return [f"-XX:SharedArchiveFile={self.archive}", "-Xshare:auto"]
+
+        self.mode: CDSMode = "dump"
+        return [f"-XX:ArchiveClassesAtExit={self.archive}"]
+
+    def prune(self, keep: str):
+        for name in listdir(self.directory):
+            if name.endswith(".jsa") and name != keep:
+                try:
+                    remove(path.join(self.directory, name))
+                except OSError:
+                    pass
+
+    def invalidate(self):
+        if self.archive and path.exists(self.archive):
+            remove(self.archive)
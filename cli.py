@@ -0,0 +1,146 @@
+from util import Config
+from expand import (
+    default_server_config, default_running_config, get_env, get_jdk_version, generate_auto_jvm_args,
+    setup_console, ServerConfigType, RunningType, JVMArgsType, ServerStream
+)
+from daemon import ConsoleClient
+
+from os import path
+from sys import argv
+from json import dumps
+from argparse import ArgumentParser, Namespace
+
+config_path: str = "config.json"
+
+# ----------------------------------------------------------------
+
+def load_server_config() -> Config[ServerConfigType]:
+    return Config[ServerConfigType].load_from(file_path=config_path, default=default_server_config)
+
+def exit_code(return_code: int | None) -> int:
+    # 未能启动为1；被信号结束的进程按shell惯例映射为128+信号
+    if return_code is None:
+        return 1
+    return return_code if return_code >= 0 else 128 - return_code
+
+def run_stream(reboots: int, daemon: bool = False) -> int:
+    stream: ServerStream = ServerStream(
+        server_config=load_server_config(),
+        running_config=Config[RunningType]({**default_running_config, "reboot_time": reboots}),
+        daemon=daemon,
+        base_color="red"
+    )
+    stream.do()
+    return exit_code(stream.return_code)
+
+# ----------------------------------------------------------------
+
+def command_start(args: Namespace) -> int:
+    return run_stream(1)
+
+def command_loop(args: Namespace) -> int:
+    return run_stream(args.reboots, args.daemon)
+
+def command_attach(args: Namespace) -> int:
+    ConsoleClient(socket_path=load_server_config()["daemon_socket"], base_color="green").do()
+    return 0
+
+def command_clean(args: Namespace) -> int:
+    from tool import clean # 打包为start.pyz时按需导入
+    clean(args.level)
+    return 0
+
+def command_env(args: Namespace) -> int:
+    for text in get_env(load_server_config().data):
+        print(text)
+    return 0
+
+def command_gen_jvm_args(args: Namespace) -> int:
+    from host import generate_host_jvm_args
+    server_config: Config[ServerConfigType] = load_server_config()
+    if args.host:
+        jvm_args, heap_gb, reasons = generate_host_jvm_args(
+            server_config, jdk_version=get_jdk_version(server_config["jdk_path"])
+        )
+        for text in reasons:
+            print(text)
+    else:
+        jvm_args: Config[JVMArgsType] = generate_auto_jvm_args(server_config)
+        heap_gb: int = None
+
+    print(dumps(jvm_args.data, indent=4, ensure_ascii=False, sort_keys=True))
+    if args.dry_run:
+        return 0
+
+    server_config["jvm_args"].data.clear()
+    server_config["jvm_args"].data.update(jvm_args.data)
+    if heap_gb is not None:
+        server_config["min_memory"] = heap_gb
+        server_config["max_memory"] = heap_gb
+    server_config.save(config_path)
+    print(f"已写入{config_path}")
+    return 0
+
+def command_eula(args: Namespace) -> int:
+    if not args.accept:
+        print("请先阅读此协议：https://aka.ms/MinecraftEULA ，同意后加上--accept重新执行。")
+        return 1
+    from tool import write_eula
+    write_eula()
+    return 0
+
+# ----------------------------------------------------------------
+
+def build_parser() -> ArgumentParser:
+    parser: ArgumentParser = ArgumentParser(
+        prog="start.py", description="Minecraft Server Runner，不带参数运行时进入交互菜单"
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("start", help="启动服务器一次，退出码为服务器的返回代码").set_defaults(handler=command_start)
+
+    loop: ArgumentParser = commands.add_parser("loop", help="启动服务器并自动重启")
+    loop.add_argument("--reboots", type=int, default=-1, metavar="N", help="启动次数，负值为无限循环（默认）")
+    loop.add_argument("--daemon", action="store_true", help="以守护模式运行，通过控制套接字连接控制台")
+    loop.set_defaults(handler=command_loop)
+
+    commands.add_parser("attach", help="连接守护模式的后台控制台").set_defaults(handler=command_attach)
+
+    clean_parser: ArgumentParser = commands.add_parser("clean", help="清理文件数据")
+    clean_parser.add_argument(
+        "--level", type=int, choices=[0, 1, 2], default=0, help="0 日志+缓存，1 日志+临时数据，2 重置"
+    )
+    clean_parser.set_defaults(handler=command_clean)
+
+    commands.add_parser("env", help="检测运行环境").set_defaults(handler=command_env)
+
+    jvm: ArgumentParser = commands.add_parser("gen-jvm-args", help="生成JVM参数并写入配置文件")
+    jvm.add_argument("--host", action="store_true", help="根据主机与容器限制生成，同时设置堆内存")
+    jvm.add_argument("--dry-run", action="store_true", help="只输出，不写入配置文件")
+    jvm.set_defaults(handler=command_gen_jvm_args)
+
+    eula: ArgumentParser = commands.add_parser("eula", help="同意Minecraft EULA并写入eula.txt")
+    eula.add_argument("--accept", action="store_true", help="确认已阅读并同意协议")
+    eula.set_defaults(handler=command_eula)
+    return parser
+
+def run_cli(arguments: list[str]) -> int:
+    parser: ArgumentParser = build_parser()
+    if not arguments: # 没有菜单可进入时不能静默退出
+        parser.print_help()
+        return 2
+    args: Namespace = parser.parse_args(arguments)
+    setup_console()
+    try:
+        return args.handler(args)
+    except KeyboardInterrupt:
+        return 130
+
+# ----------------------------------------------------------------
+
+# 合并为start.py后此段位于菜单页面之前：带参数运行时直接执行子命令并退出，不构造交互页面
+# --profile-startup交给入口处理，以便计时菜单页面的构造；单独运行cli.py时后面没有菜单，一律按命令行处理
+if __name__ == "__main__" and (
+    path.basename(__file__) == "cli.py" or len(argv) > 1 and argv[1] != "--profile-startup"
+):
+    raise SystemExit(run_cli(argv[1:]))
@@ -0,0 +1,334 @@
+from ui import Page
+from util import ColorArgs
+from pipe import RawLine
+
+from os import path, makedirs, remove, umask
+from json import dumps, loads, JSONDecodeError
+from time import time
+from typing import Callable, Unpack
+from threading import Thread, Condition, Event, Lock
+from socket import socket
+
+try:
+    from socket import AF_UNIX
+except ImportError: # Windows没有Unix域套接字
+    AF_UNIX = None
+
+daemon_socket_path: str = path.join("runner_data", "control.sock")
+attach_state_path: str = path.join("runner_data", "attach.json")
+
+# 帧格式：“类型 偏移 长度\n”后接长度字节的数据
+# H 握手（偏移为当前末尾，数据为会话ID）；C 控制台数据块；R 命令回复（UTF-8文本）
+frame_kinds: frozenset[bytes] = frozenset({b"H", b"C", b"R"})
+
+# 不带偏移连接时回放的尾部字节数
+attach_tail: int = 16 << 10
+
+# ----------------------------------------------------------------
+
+class ConsoleLog:
+    def __init__(self, capacity: int = 4 << 20):
+        # 以字节偏移寻址的内存日志：每行写入一次，任意多个客户端按各自的偏移读取，不增加管道读取开销
+        self.capacity: int = capacity
+        self.buffer: bytearray = bytearray()
+        self.base: int = 0 # buffer[0]的绝对偏移
+        self.condition: Condition = Condition()
+        self.closed: bool = False
+        self.session: str = f"{int(time() * 1000):x}"
+
+    def end(self) -> int:
+        return self.base + len(self.buffer)
+
+    def put(self, line: RawLine, is_error: bool):
+        self.append(b"".join((b"E " if is_error else b"O ", line, b"\n")))
+
+    def note(self, text: str):
+        # 运行器自身的提示，与服务器输出一同回放
+        self.append(b"R " + text.encode("utf-8", errors="replace") + b"\n")
+
+    def append(self, data: bytes):
+        with self.condition:
+            self.buffer.extend(data)
+            overflow: int = len(self.buffer) - self.capacity
+            if overflow > self.capacity >> 2: # 超出四分之一后成批裁剪，避免每行都移动整个缓冲
+                cut: int = self.buffer.find(b"\n", overflow) + 1 or len(self.buffer)
+                del self.buffer[:cut]
+                self.base += cut
+            self.condition.notify_all()
+
+    def close(self):
+        with self.condition:
+            self.closed: bool = True
+            self.condition.notify_all()
+
+    def tail(self, size: int = attach_tail) -> int:
+        # 末尾size字节内第一个完整行的起点
+        with self.condition:
+            start: int = max(0, len(self.buffer) - size)
+            if start:
+                start: int = self.buffer.find(b"\n", start - 1) + 1 or len(self.buffer)
+            return self.base + start
+
+    def read(self, offset: int, limit: int = 1 << 16, timeout: float = None) -> tuple[int, bytes]:
+        # 返回 (实际起始偏移, 数据)；起始偏移大于请求值说明中间部分已被裁剪
+        with self.condition:
+            if offset > self.end(): # 来自上一次会话的偏移
+                offset: int = self.base
+            self.condition.wait_for(lambda: self.end() > offset or self.closed, timeout)
+            start: int = max(offset, self.base)
+            begin: int = start - self.base
+            stop: int = min(len(self.buffer), begin + limit)
+            if stop < len(self.buffer) and self.buffer[stop - 1] != 0x0A:
+                # 总在行尾截断，客户端依赖行首的来源标记；超过limit的单行也整行返回
+                stop: int = (
+                    self.buffer.rfind(b"\n", begin, stop) + 1
+                    or self.buffer.find(b"\n", stop) + 1
+                    or len(self.buffer)
+                )
+            data: bytes = bytes(self.buffer[begin:stop])
+        return start, data
+
+# ----------------------------------------------------------------
+
+def send_frame(connection: socket, lock: Lock, kind: bytes, offset: int, data: bytes):
+    with lock:
+        connection.sendall(b"%s %d %d\n" % (kind, offset, len(data)) + data)
+
+def receive_frame(file) -> tuple[bytes, int, bytes] | None:
+    header: bytes = file.readline()
+    if not header:
+        return
+    kind, offset, size = header.split()
+    if not kind in frame_kinds:
+        raise ValueError(f"无效的帧类型：{kind!r}")
+    return kind, int(offset), file.read(int(size))
+
+class ControlServer:
+    def __init__(
+        self,
+        socket_path: str,
+        log: ConsoleLog,
+        submit: Callable[[str], None],
+        status: Callable[[], dict]
+    ):
+        self.socket_path: str = socket_path
+        self.log: ConsoleLog = log
+        self.submit: Callable[[str], None] = submit
+        self.status: Callable[[], dict] = status
+
+        self.server: socket = None
+        self.thread: Thread = None
+        self.lock: Lock = Lock()
+        self.clients: set[socket] = set()
+
+    def start(self):
+        if AF_UNIX is None:
+            raise OSError("当前系统不支持Unix域套接字")
+
+        if path.exists(self.socket_path):
+            # 能连上说明已有守护进程在运行；连不上则是上次异常退出遗留的文件
+            probe: socket = socket(AF_UNIX)
+            try:
+                probe.connect(self.socket_path)
+                raise OSError(f"{self.socket_path}已被另一个守护进程占用")
+            except (ConnectionRefusedError, FileNotFoundError):
+                remove(self.socket_path)
+            finally:
+                probe.close()
+
+        makedirs(path.dirname(self.socket_path) or ".", exist_ok=True)
+        server: socket = socket(AF_UNIX)
+        # 控制台可执行任意命令，仅限当前用户；套接字文件须在创建时即为0600，不能在bind之后再chmod
+        previous: int = umask(0o177)
+        try:
+            server.bind(self.socket_path)
+        except OSError:
+            server.close()
+            raise
+        finally:
+            umask(previous)
+        server.listen()
+        self.server: socket = server
+        self.thread: Thread = Thread(target=self.accept_loop, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        if self.server is None:
+            return
+        self.log.close()
+        self.server.close()
+        with self.lock:
+            clients: list[socket] = list(self.clients)
+        for connection in clients:
+            connection.close()
+        if path.exists(self.socket_path):
+            remove(self.socket_path)
+        self.server: socket = None
+
+    def count(self) -> int:
+        return len(self.clients)
+
+    # ----------------------------------------------------------------
+
+    def accept_loop(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError: # 监听套接字已关闭
+                return
+            with self.lock:
+                self.clients.add(connection)
+            Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection: socket):
+        send_lock: Lock = Lock()
+        detached: Event = Event()
+        detached.set()
+        stream: Thread = None
+
+        try:
+            send_frame(connection, send_lock, b"H", self.log.end(), self.log.session.encode())
+            file = connection.makefile("rb")
+            for raw in file:
+                command, _, argument = raw.decode("utf-8", errors="replace").rstrip("\r\n").partition(" ")
+                match command:
+                    case "attach":
+                        detached.set()
+                        if stream is not None:
+                            stream.join()
+                        detached: Event = Event()
+                        offset: int = int(argument) if argument.strip().isdigit() else self.log.tail()
+                        stream: Thread = Thread(
+                            target=self.stream_loop, args=(connection, send_lock, offset, detached), daemon=True
+                        )
+                        stream.start()
+                    case "detach":
+                        detached.set()
+                    case "cmd":
+                        self.submit(argument + "\n")
+                    case "status":
+                        send_frame(connection, send_lock, b"R", 0, dumps(self.status(), ensure_ascii=False).encode())
+                    case _:
+                        send_frame(connection, send_lock, b"R", 0, f"未知的控制命令：{command}".encode())
+        except OSError:
+            pass
+        finally:
+            detached.set()
+            with self.lock:
+                self.clients.discard(connection)
+            connection.close()
+
+    def stream_loop(self, connection: socket, send_lock: Lock, offset: int, detached: Event):
+        # 每个客户端独立推进偏移，慢客户端只会落后，不会拖慢服务器输出的读取
+        while not detached.is_set():
+            start, data = self.log.read(offset, timeout=1)
+            if not data:
+                if self.log.closed:
+                    return
+                continue
+            try:
+                send_frame(connection, send_lock, b"C", start, data)
+            except OSError:
+                return
+            offset: int = start + len(data)
+
+# ----------------------------------------------------------------
+
+def load_attach_state(state_path: str = attach_state_path) -> dict:
+    if not path.exists(state_path):
+        return dict()
+    try:
+        with open(state_path, mode="r", encoding="utf-8") as file:
+            return loads(file.read())
+    except (OSError, JSONDecodeError):
+        return dict()
+
+def save_attach_state(session: str, offset: int, state_path: str = attach_state_path):
+    makedirs(path.dirname(state_path) or ".", exist_ok=True)
+    with open(state_path, mode="w", encoding="utf-8") as file:
+        file.write(dumps({"session": session, "offset": offset}))
+
+class ConsoleClient(Page):
+    def __init__(self, socket_path: str = daemon_socket_path, **kwargs: Unpack[ColorArgs]):
+        super().__init__(**kwargs)
+        self.socket_path: str = socket_path
+        self.session: str = None
+        self.offset: int = 0
+
+    def do(self):
+        if AF_UNIX is None:
+            self.print("当前系统不支持Unix域套接字，无法连接后台控制台。", is_error=True)
+            return
+
+        connection: socket = socket(AF_UNIX)
+        try:
+            connection.connect(self.socket_path)
+        except OSError as err:
+            self.print(f"无法连接到守护进程（{self.socket_path}）：{err}", is_error=True)
+            connection.close()
+            return
+
+        file = connection.makefile("rb")
+        _, end, session = receive_frame(file)
+        self.session: str = session.decode()
+
+        # 同一会话从上次断开处继续回放，否则只回放最近的输出
+        state: dict = load_attach_state()
+        if state.get("session") == self.session:
+            self.offset: int = state["offset"]
+            connection.sendall(f"attach {self.offset}\n".encode())
+        else:
+            self.offset: int = end
+            connection.sendall(b"attach\n")
+
+        reader: Thread = Thread(target=lambda: self.read_loop(file), daemon=True)
+        reader.start()
+        self.print("已连接后台控制台，输入命令发送到服务器，输入detach或按Ctrl+C断开。")
+        self.line()
+
+        try:
+            while reader.is_alive():
+                text: str = input()
+                if text.strip() == "detach":
+                    break
+                if text.strip() == "status":
+                    connection.sendall(b"status\n")
+                    continue
+                connection.sendall(f"cmd {text}\n".encode())
+        except (KeyboardInterrupt, EOFError, OSError):
+            pass
+        finally:
+            connection.close()
+            save_attach_state(self.session, self.offset)
+        self.line()
+        self.print(f"已断开，下次连接将从偏移{self.offset}继续回放。")
+
+    def read_loop(self, file):
+        try:
+            while True:
+                frame: tuple[bytes, int, bytes] | None = receive_frame(file)
+                if frame is None:
+                    self.print("守护进程已关闭连接。", is_error=True)
+                    return
+                kind, offset, data = frame
+                if kind == b"R":
+                    self.print(data.decode("utf-8", errors="replace"))
+                    continue
+                if kind == b"C":
+                    if offset > self.offset:
+                        self.print(f"（已跳过{offset - self.offset}字节，超出后台缓冲范围）", is_error=True)
+                    self.render(data)
+                    self.offset: int = offset + len(data)
+        except (OSError, ValueError):
+            return
+
+    def render(self, data: bytes):
+        for raw in data.splitlines():
+            text: str = raw[2:].decode("utf-8", errors="replace")
+            match raw[:1]:
+                case b"E":
+                    self.print(f"[ERROR] {text}", is_error=True)
+                case b"R":
+                    self.print(text, False, "bright_yellow")
+                case _:
+                    self.print(text)
@@ -0,0 +1,181 @@
+from kt import KillableThread
+from pipe import LineSplitter, RawLineConsumer, chunk_size
+
+from os import read
+from sys import stdin, platform
+from typing import Callable, Literal
+from asyncio import Runner, CancelledError, gather, wait_for, AbstractEventLoop
+from asyncio import TimeoutError as AsyncTimeoutError
+from asyncio.subprocess import Process, PIPE as ASYNC_PIPE, create_subprocess_exec
+
+type InputHandler = Callable[[Process, str], Literal["break"] | None]
+type ProcessHandler = Callable[[Process], None]
+
+# ----------------------------------------------------------------
+
+class AsyncEngine:
+    def __init__(
+        self,
+        line_handler: RawLineConsumer,
+        input_handler: InputHandler,
+        spawn_handler: ProcessHandler = None,
+        exit_handler: ProcessHandler = None,
+        cancel_handler: ProcessHandler = None,
+        read_size: int = chunk_size,
+        console: bool = True
+    ):
+        self.line_handler: RawLineConsumer = line_handler
+        self.input_handler: InputHandler = input_handler
+        self.spawn_handler: ProcessHandler = spawn_handler
+        self.exit_handler: ProcessHandler = exit_handler
+        self.cancel_handler: ProcessHandler = cancel_handler # 接管中断后的关闭流程，须保证进程最终退出
+        self.read_size: int = read_size
+        self.console: bool = console # 守护模式下不读取终端，命令只经inject送入
+
+        self.runner: Runner = None
+        self.loop: AbstractEventLoop = None
+        self.process: Process = None
+        self.input_closed: bool = True
+        self.console_fd: int = None
+        self.console_buffer: bytes = b""
+        self.console_thread: KillableThread = None
+
+    def __enter__(self):
+        self.runner: Runner = Runner()
+        self.loop: AbstractEventLoop = self.runner.get_loop()
+        return self
+
+    def __exit__(self, *exc):
+        self.close_console()
+        self.runner.close()
+
+    def run(self, command_args: list[str]) -> int:
+        return self.runner.run(self.supervise(command_args))
+
+    # ----------------------------------------------------------------
+
+    async def supervise(self, command_args: list[str]) -> int:
+        process: Process = await create_subprocess_exec(
+            *command_args,
+            stdin=ASYNC_PIPE,
+            stdout=ASYNC_PIPE,
+            stderr=ASYNC_PIPE,
+            limit=self.read_size
+        )
+        self.process: Process = process
+        self.input_closed: bool = False
+
+        if self.spawn_handler:
+            self.spawn_handler(process)
+
+        self.open_console()
+        readers = gather(
+            self.read_stream(process.stdout, False),
+            self.read_stream(process.stderr, True)
+        )
+
+        try:
+            await process.wait()
+            await readers # 读到EOF为止，进程退出后的尾部输出不会丢失
+        except CancelledError:
+            if process.returncode is None and self.cancel_handler:
+                self.cancel_handler(process)
+                await process.wait()
+            elif process.returncode is None:
+                process.terminate()
+                try:
+                    await wait_for(process.wait(), timeout=10)
+                except AsyncTimeoutError:
+                    process.kill()
+                    await process.wait()
+            await readers
+            raise
+        finally:
+            self.input_closed: bool = True
+            self.process: Process = None
+            if self.exit_handler:
+                self.exit_handler(process)
+
+        return process.returncode
+
+    async def read_stream(self, reader, is_error: bool):
+        splitter: LineSplitter = LineSplitter()
+        while True:
+            chunk: bytes = await reader.read(self.read_size)
+            if not chunk: # EOF
+                break
+
+            for line in splitter.feed(chunk):
+                self.line_handler(line, is_error)
+
+        for line in splitter.flush():
+            self.line_handler(line, is_error)
+
+    # ----------------------------------------------------------------
+
+    def open_console(self):
+        if not self.console or self.console_fd is not None or self.console_thread is not None:
+            return
+
+        try:
+            fd: int = stdin.fileno()
+            self.loop.add_reader(fd, self.on_console_readable)
+            self.console_fd: int = fd
+        except (NotImplementedError, PermissionError, OSError, ValueError):
+            # Windows控制台或普通文件无法挂在事件循环上，退化为整个会话共用的单个输入线程
+            loop: AbstractEventLoop = self.loop
+            self.console_thread = KillableThread(
+                target=lambda: self.console_worker(loop), daemon=True
+            )
+            self.console_thread.start()
+
+    def close_console(self):
+        if self.console_fd is not None:
+            self.loop.remove_reader(self.console_fd)
+            self.console_fd: int = None
+        if self.console_thread is not None:
+            self.console_thread.KILLLL()
+            self.console_thread: KillableThread = None
+
+    def on_console_readable(self):
+        try:
+            raw: bytes = read(self.console_fd, 4096)
+        except OSError:
+            return
+
+        if not raw:
+            self.loop.remove_reader(self.console_fd)
+            return
+
+        self.console_buffer += raw
+        *lines, self.console_buffer = self.console_buffer.split(b"\n")
+        for line in lines:
+            self.on_console_line(line + b"\n")
+
+    def console_worker(self, loop: AbstractEventLoop):
+        while True:
+            raw: bytes = stdin.buffer.readline()
+            if not raw:
+                break
+            loop.call_soon_threadsafe(self.on_console_line, raw)
+
+    def on_console_line(self, raw: bytes):
+        if stdin.encoding == "utf-8" and platform == "win32":
+            text: str = raw.decode("gbk", errors="ignore")
+        else:
+            text: str = raw.decode("utf-8", errors="ignore")
+        self.handle_input(text)
+
+    def inject(self, text: str):
+        # 供其他线程发出命令，经事件循环处理，效果与控制台输入相同
+        self.loop.call_soon_threadsafe(self.handle_input, text)
+
+    def handle_input(self, text: str):
+        if self.input_closed or self.process is None:
+            return
+
+        try:
+            if self.input_handler(self.process, text) == "break":
+                self.input_closed: bool = True
+        except (BrokenPipeError, ConnectionResetError, OSError):
+            self.input_closed: bool = True
@@ -1,19 +1,53 @@
 from ui import Page, InfoList
-from util import ColorArgs, Config
+from util import Color, ColorArgs, Config
 from kt import KillableThread
+from engine import AsyncEngine
+from pipe import RawLine, RawLineConsumer, pump_fd
+from render import RenderQueue, OverflowPolicy
+from spool import ConsoleSpool
+from logparse import EventBus, LogParser, layout_orders
+from hooks import HookRegistry
+from boot import BootProfiler
+from restart import RestartPolicy, RestartDecision, classify_exit
+from cds import ClassDataSharing, cds_mode_names
+from flags import load_flag_table, validate_jvm_flags, FlagTable
+from gclog import GCAnalyzer
+from sampler import ProcessSampler, SampleStore, proc_supported, read_proc_stat, clock_ticks
+from metrics import MetricsRegistry, MetricsServer, LineCounter
+from pressure import PressureMonitor
+from players import PlayerTracker
+from watchdog import HangWatchdog
+from shutdown import ShutdownOrchestrator, shutdown_stage_names, wait_popen
+from rcon import RconPool, RconConnection, RconError
+from ping import PingMonitor, PingResult
+from daemon import ConsoleLog, ControlServer
 
 from os import path, environ, listdir, system
 from sys import stdout, stderr, stdin, platform
-from time import sleep
-from typing import Unpack, TypedDict, Literal
+from time import sleep, monotonic
+from typing import Unpack, TypedDict, Literal, Callable
+from asyncio.subprocess import Process
 from shutil import which
-from threading import Thread
+from threading import Thread, Event, Timer
 from subprocess import Popen, PIPE
+from signal import signal as set_signal, getsignal, raise_signal, default_int_handler, SIGINT, SIGTERM, SIG_IGN
 
 # ----------------------------------------------------------------
 
-if platform == "win32":
-    system("chcp 65001 > nul")
+console_ready: list[bool] = [False]
+
+def setup_console():
+    # 首次输出前调用；直接设置代码页，不再在导入时启动chcp子进程
+    if console_ready[0] or platform != "win32":
+        return
+    console_ready[0] = True
+    try:
+        from ctypes import WinDLL
+        kernel32 = WinDLL("kernel32")
+        kernel32.SetConsoleOutputCP(65001)
+        kernel32.SetConsoleCP(65001)
+    except (ImportError, OSError, AttributeError):
+        system("chcp 65001 > nul")
     if hasattr(stdout, "reconfigure"):
         stdout.reconfigure(encoding="utf-8")
     if hasattr(stderr, "reconfigure"):
@@ -45,6 +79,10 @@ class JVMArgsType(TypedDict, total=False):
     XX_UseBiasedLocking: bool
     XX_UseCompressedOops: bool
     XX_UseCompressedClassPointers: bool
+    XX_ParallelGCThreads: int
+    XX_ConcGCThreads: int
+    XX_UseNUMA: bool
+    XX_ZGenerational: bool
 
 class ServerConfigType(TypedDict):
     min_memory: int
@@ -54,6 +92,38 @@ class ServerConfigType(TypedDict):
     loader: Literal["Vanilla", "Fabric", "Forge", "NeoForge", "Quilt"]
     jdk_path: str
     reboot_seconds: int
+    supervisor: Literal["asyncio", "thread"]
+    restart_backoff_base: int
+    restart_backoff_max: int
+    restart_crash_budget: int
+    restart_stable_seconds: int
+    cds_enabled: bool
+    flag_check: bool
+    gc_log: bool
+    sampler_interval: int
+    metrics_port: int
+    pressure_restart: bool
+    pressure_heap_percent: int
+    pressure_gc_percent: int
+    pressure_rss_gb: int
+    pressure_warn_seconds: int
+    pressure_min_uptime: int
+    player_resync_seconds: int
+    watchdog_seconds: int
+    watchdog_ping_failures: int
+    rcon_pool_size: int
+    ping_interval: int
+    ping_ready_seconds: int
+    daemon_socket: str
+    daemon_buffer_mb: int
+    bench_runs: int
+    bench_idle_seconds: int
+    bench_profiles: dict[str, JVMArgsType]
+    render_capacity: int
+    render_policy: OverflowPolicy
+    spool_enabled: bool
+    spool_segment_size: int
+    spool_max_segments: int
     jvm_args: Config[JVMArgsType]
 
 class RunningType(TypedDict):
@@ -62,6 +132,7 @@ class RunningType(TypedDict):
 # ----------------------------------------------------------------
 
 loaders: list[str] = ["Vanilla", "Fabric", "Forge", "NeoForge", "Quilt"]
+supervisors: list[str] = ["asyncio", "thread"]
 
 default_server_config: ServerConfigType = {
 	"jdk_path": "java",
@@ -71,6 +142,38 @@ default_server_config: ServerConfigType = {
 	"loader": "Fabric",
 	"version": "1.20.1",
 	"reboot_seconds": 10,
+	"supervisor": "asyncio",
+	"restart_backoff_base": 5,
+	"restart_backoff_max": 300,
+	"restart_crash_budget": 5,
+	"restart_stable_seconds": 300,
+	"cds_enabled": True,
+	"flag_check": True,
+	"gc_log": False,
+	"sampler_interval": 1,
+	"metrics_port": 0,
+	"pressure_restart": False,
+	"pressure_heap_percent": 85,
+	"pressure_gc_percent": 15,
+	"pressure_rss_gb": 0,
+	"pressure_warn_seconds": 300,
+	"pressure_min_uptime": 600,
+	"player_resync_seconds": 300,
+	"watchdog_seconds": 300,
+	"watchdog_ping_failures": 3,
+	"rcon_pool_size": 2,
+	"ping_interval": 30,
+	"ping_ready_seconds": 120,
+	"daemon_socket": "runner_data/control.sock",
+	"daemon_buffer_mb": 4,
+	"bench_runs": 3,
+	"bench_idle_seconds": 10,
+	"bench_profiles": {},
+	"render_capacity": 4096,
+	"render_policy": "collapse",
+	"spool_enabled": True,
+	"spool_segment_size": 16,
+	"spool_max_segments": 20,
 	"jvm_args": Config[JVMArgsType]({
 		"server": True,
 		"XX_UseG1GC": True,
@@ -113,6 +216,10 @@ jvm_args_info: dict[str, dict] = {
     "XX_UseBiasedLocking": {"type": "bool", "desc": "偏向锁"},
     "XX_UseCompressedOops": {"type": "bool", "desc": "压缩普通对象指针"},
     "XX_UseCompressedClassPointers": {"type": "bool", "desc": "压缩类指针"},
+    "XX_ParallelGCThreads": {"type": "int", "desc": "并行GC线程数", "prompt": "0为JVM默认"},
+    "XX_ConcGCThreads": {"type": "int", "desc": "并发GC线程数", "prompt": "0为JVM默认"},
+    "XX_UseNUMA": {"type": "bool", "desc": "NUMA感知内存分配"},
+    "XX_ZGenerational": {"type": "bool", "desc": "分代ZGC（JDK 21~23，JDK 23起为默认，JDK 24已移除）"},
 }
 
 # ----------------------------------------------------------------
@@ -120,6 +227,13 @@ jvm_args_info: dict[str, dict] = {
 def get_vernum(version: str) -> tuple[int, int, int]:
     return tuple(map(int, version.split(".")))
 
+def uses_legacy_ping(version: str) -> bool:
+    # 1.7之前的服务器只响应旧版ping；快照等无法解析的版本号按新版处理
+    try:
+        return get_vernum(version)[:2] < (1, 7)
+    except ValueError:
+        return False
+
 def title(string: str):
     if platform == "win32":
         system(f"title {string}")
@@ -134,17 +248,26 @@ def get_java_exe_path(jdk_path: str) -> str:
     else:
         return path.abspath(path.join(jdk_path, R"bin\java.exe" if platform == "win32" else R"bin\java"))
 
-def get_jdk_version(jdk_path: str) -> tuple[int, int, int]:
+def get_jcmd_path(jdk_path: str) -> str | None:
+    if jdk_path == "java":
+        return which("jcmd")
+    jcmd: str = path.abspath(path.join(jdk_path, "bin", "jcmd.exe" if platform == "win32" else "jcmd"))
+    return jcmd if path.exists(jcmd) else None
+
+def get_jdk_release_path(jdk_path: str) -> str:
     if jdk_path == "java":
         java_exe: str = which("java")
         if not java_exe:
             return
-        jdk_home: str = path.dirname(path.dirname(java_exe))
-        release: str = path.join(jdk_home, "release")
+        jdk_home: str = path.dirname(path.dirname(path.realpath(java_exe)))
+        return path.join(jdk_home, "release")
     else:
-        release: str = path.join(jdk_path, "release")
+        return path.join(jdk_path, "release")
+
+def get_jdk_version(jdk_path: str) -> tuple[int, int, int]:
+    release: str = get_jdk_release_path(jdk_path)
 
-    if not path.exists(release):
+    if not release or not path.exists(release):
         return
     
     with open(release, mode="r", encoding="utf-8") as f:
@@ -213,7 +336,7 @@ def get_forge_libraries_path(base_path: str) -> str:
 
     return path.abspath(path.join(base_path, dir, "win_args.txt" if platform == "win32" else "unix_args.txt"))
 
-def generate_jvm_args(config: Config[JVMArgsType]) -> list[str]:
+def generate_jvm_args(config: Config[JVMArgsType], extra_args: list[str] = None) -> list[str]:
     args: list[str] = list()
     for key, value in config.items():
         if value:
@@ -222,12 +345,75 @@ def generate_jvm_args(config: Config[JVMArgsType]) -> list[str]:
             elif isinstance(value, int):
                 if key == "Xmn":
                     args.append(f"-Xmn{value}G")
-                if key == "XX_MaxGCPauseMillis":
+                if key in ["XX_MaxGCPauseMillis", "XX_ParallelGCThreads", "XX_ConcGCThreads"]:
                     args.append(f"-{key.replace("_", ":")}={value}")
                 elif key in ["XX_G1HeapRegionSize", "XX_MetaspaceSize", "XX_MaxMetaspaceSize"]:
                     args.append(f"-{key.replace("_", ":")}={value}m")
+    if extra_args:
+        args.extend(extra_args)
     return args
 
+def generate_command(server_data: ServerConfigType, extra_jvm_args: list[str] = None) -> list[str]:
+    args: list[str] = None
+
+    match server_data["loader"]:
+        case "Vanilla" | "Fabric" | "Quilt":
+            pass
+        case "Forge" | "NeoForge":
+            version: tuple[int, int, int] = get_vernum(server_data["version"])
+
+            if (1, 17, 0) > version:
+                pass
+            else:
+                forge_libraries_path: str = None
+
+                if server_data["loader"] == "Forge":
+                    forge_libraries_path: str = get_forge_libraries_path(
+                        "./libraries/net/minecraftforge/forge"
+                    )
+                elif server_data["loader"] == "NeoForge":
+                    forge_libraries_path: str = get_forge_libraries_path(
+                        "./libraries/net/neoforged/neoforge"
+                    )
+                if not forge_libraries_path is None:
+                    forge_libraries_path: str = "@" + forge_libraries_path
+                    args: list[str] = [
+                        get_java_exe_path(server_data["jdk_path"]),
+                        f"-Xmx{server_data["max_memory"]}G",
+                        f"-Xms{server_data["min_memory"]}G",
+                        *generate_jvm_args(server_data["jvm_args"], extra_jvm_args),
+                        forge_libraries_path,
+                        "%*",
+                        "nogui"
+                    ]
+    if args is None:
+        args: list[str] = [
+            get_java_exe_path(server_data["jdk_path"]),
+            f"-Xmx{server_data["max_memory"]}G",
+            f"-Xms{server_data["min_memory"]}G",
+            *generate_jvm_args(server_data["jvm_args"], extra_jvm_args),
+            "-jar",
+            server_data["jar_name"],
+            "nogui"
+        ]
+    return args
+
+def check_jvm_flags(server_data: ServerConfigType, args: list[str] = None) -> tuple[list[str], list[str]] | None:
+    jdk_path: str = server_data["jdk_path"]
+    table: FlagTable = load_flag_table(get_java_exe_path(jdk_path), get_jdk_release_path(jdk_path))
+    if table is None:
+        return
+    if args is None:
+        args: list[str] = generate_jvm_args(server_data["jvm_args"])
+    return validate_jvm_flags(args, table)
+
+def jvm_flags_report(server_data: ServerConfigType) -> list[str]:
+    result: tuple[list[str], list[str]] | None = check_jvm_flags(server_data)
+    if result is None:
+        return ["无法获取当前JDK的参数表（-XX:+PrintFlagsFinal），跳过校验。"]
+    errors, warnings = result
+    return [*[f"错误：{text}" for text in errors], *[f"警告：{text}" for text in warnings]] or ["全部JVM参数校验通过。"]
+
 def generate_auto_jvm_args(server_config: Config[ServerConfigType]) -> Config[JVMArgsType]:
     avg_memory: int = (server_config["min_memory"] + server_config["max_memory"]) // 2
 
@@ -278,9 +464,11 @@ class ServerStream(Page):
         self,
         server_config: Config[ServerConfigType],
         running_config: Config[RunningType],
+        daemon: bool = False,
         **kwargs: Unpack[ColorArgs]
     ):
         super().__init__(**kwargs)
+        self.console_log: ConsoleLog = None
         self.server_config: Config[ServerConfigType] = server_config
         self.running_config: Config[RunningType] = running_config
 
@@ -288,97 +476,520 @@ class ServerStream(Page):
         self.running_cf_data: RunningType = self.running_config.data
 
         self.running: bool = False
+        self.return_code: int = None
+        self.render_queue: RenderQueue = RenderQueue(
+            base_colors=self.base_colors,
+            error_color=self.error_color,
+            capacity=self.server_cf_data["render_capacity"],
+            policy=self.server_cf_data["render_policy"]
+        )
+        self.event_bus: EventBus = EventBus()
+        self.log_parser: LogParser = LogParser(self.event_bus, self.server_cf_data["loader"])
+        self.hooks: HookRegistry = HookRegistry(self.event_bus, notify=self.warn)
+        self.boot_profiler: BootProfiler = BootProfiler(
+            self.event_bus, self.hooks, self.server_cf_data["loader"]
+        )
+        self.hooks.on("done", lambda event, result: self.on_ready())
+        self.player_tracker: PlayerTracker = PlayerTracker(self.event_bus, self.hooks)
+        self.shutdown: ShutdownOrchestrator = ShutdownOrchestrator(self.hooks)
+        self.exited: Event = Event()
+        self.shutdown_seconds: float = None
+
+        self.tick: int = 0
+        self.pid: int = None
+        self.injector: Callable[[str], None] = None
+        self.ready: bool = False
+        self.rcon: RconPool = None
+        self.spawned_at: float = None
+        self.uptime: float = 0
+        self.reboot_requested: bool = False
+
+        self.cds: ClassDataSharing = ClassDataSharing() if self.server_cf_data["cds_enabled"] else None
+        self.gc_analyzer: GCAnalyzer = GCAnalyzer() if self.server_cf_data["gc_log"] else None
+        self.sampler: ProcessSampler = None
+        if self.server_cf_data["sampler_interval"] > 0 and proc_supported:
+            self.sampler: ProcessSampler = ProcessSampler(
+                SampleStore.load(), interval=self.server_cf_data["sampler_interval"]
+            )
+        self.consumers: list[RawLineConsumer] = [self.render_queue.put, self.log_parser.feed]
+
+        self.control: ControlServer = None
+        self.previous_sigterm: Callable | int | None = None
+        self.previous_sigint: Callable | int | None = None
+        if daemon:
+            # 守护模式不渲染到终端，服务器输出只写入一次内存日志，各客户端按自己的偏移读取
+            self.console_log: ConsoleLog = ConsoleLog(capacity=self.server_cf_data["daemon_buffer_mb"] << 20)
+            self.consumers[0] = self.console_log.put
+            self.control: ControlServer = ControlServer(
+                self.server_cf_data["daemon_socket"], self.console_log, submit=self.issue, status=self.daemon_status
+            )
+
+        self.spool: ConsoleSpool = None
+        if self.server_cf_data["spool_enabled"]:
+            self.spool: ConsoleSpool = ConsoleSpool(
+                segment_size=self.server_cf_data["spool_segment_size"] << 20,
+                max_segments=self.server_cf_data["spool_max_segments"]
+            )
+            self.consumers.append(self.spool.put)
+
+        self.line_counter: LineCounter = None
+        self.metrics: MetricsServer = None
+        if self.server_cf_data["metrics_port"] > 0:
+            self.line_counter: LineCounter = LineCounter()
+            self.consumers.append(self.line_counter.count)
+            self.metrics: MetricsServer = MetricsServer(self.metrics_registry(), self.server_cf_data["metrics_port"])
+
+        self.pinger: PingMonitor = None
+        if self.server_cf_data["ping_interval"] > 0:
+            self.pinger: PingMonitor = PingMonitor(
+                interval=self.server_cf_data["ping_interval"], legacy=uses_legacy_ping(self.server_cf_data["version"])
+            )
+        self.ready_timer: Timer = None
+
+        self.watchdog: HangWatchdog = None
+        if self.server_cf_data["watchdog_seconds"] > 0:
+            self.watchdog: HangWatchdog = HangWatchdog(
+                silence_seconds=self.server_cf_data["watchdog_seconds"],
+                command=self.issue,
+                notify=self.warn,
+                shutdown=self.shutdown,
+                jcmd=get_jcmd_path(self.server_cf_data["jdk_path"]),
+                rcon_probe=self.rcon_probe,
+                ping_failed=self.ping_failed if self.pinger and self.server_cf_data["watchdog_ping_failures"] > 0 else None
+            )
+            self.consumers.append(self.watchdog.touch)
+
+        self.pressure: PressureMonitor = None
+        if self.server_cf_data["pressure_restart"]:
+            self.pressure: PressureMonitor = PressureMonitor(
+                max_heap_mb=self.server_cf_data["max_memory"] * 1024,
+                heap_percent=self.server_cf_data["pressure_heap_percent"],
+                gc_percent=self.server_cf_data["pressure_gc_percent"],
+                rss_limit=self.server_cf_data["pressure_rss_gb"] << 30,
+                warn_seconds=self.server_cf_data["pressure_warn_seconds"],
+                min_uptime=self.server_cf_data["pressure_min_uptime"],
+                players=self.player_tracker.count,
+                ready=lambda: self.ready,
+                command=self.issue,
+                notify=self.warn
+            )
 
     def do(self):
         text: str = check_jdk_version(self.server_cf_data)
         if text:
             InfoList(description="⚠JDK版本异常警告", texts=[text])
 
-        command_args: list[str] = self.generate_command()
+        if self.server_cf_data["flag_check"] and not self.check_flags():
+            return
 
-        tick: int = 0
+        if self.pressure and not self.gc_analyzer and not self.server_cf_data["pressure_rss_gb"]:
+            self.print("⚠内存压力重启需要开启gc_log或设置pressure_rss_gb，本次不会生效。", is_error=True)
+
+        if self.control:
+            try:
+                self.control.start()
+            except OSError as err:
+                self.print(f"守护模式启动失败：{err}", is_error=True)
+                return
+            # systemd等发送的SIGTERM按Ctrl+C处理，走正常的关闭流程；退出时恢复原处理函数
+            self.previous_sigterm: Callable | int | None = set_signal(SIGTERM, lambda signum, frame: raise_signal(SIGINT))
+            if getsignal(SIGINT) == SIG_IGN: # 以nohup或后台方式启动时SIGINT被忽略，转发过去的信号不会生效
+                self.previous_sigint: Callable | int | None = set_signal(SIGINT, default_int_handler)
+            self.print(f"守护模式：控制套接字 {self.control.socket_path}")
+
+        self.render_queue.start()
+        if self.spool:
+            self.spool.open()
+        if self.metrics:
+            try:
+                self.metrics.start()
+                self.print(f"指标接口：http://{self.metrics.host}:{self.metrics.port}/metrics")
+            except OSError as err:
+                self.print(f"⚠指标接口启动失败：{err}", is_error=True)
+        try:
+            if self.server_cf_data["supervisor"] == "thread":
+                self.reboot_loop(self.run_thread)
+                return
+
+            with AsyncEngine(
+                line_handler=self.dispatch,
+                input_handler=self.ana,
+                spawn_handler=self.on_spawn,
+                exit_handler=self.on_exit,
+                cancel_handler=self.on_cancel,
+                console=self.control is None
+            ) as engine:
+                self.injector = engine.inject
+                self.reboot_loop(engine.run)
+        finally:
+            self.injector = None
+            self.render_queue.close()
+            if self.spool:
+                self.spool.close()
+            if self.metrics:
+                self.metrics.close()
+            if self.control:
+                self.control.close()
+                if self.previous_sigterm is not None:
+                    set_signal(SIGTERM, self.previous_sigterm)
+                    self.previous_sigterm: Callable | int | None = None
+                if self.previous_sigint is not None:
+                    set_signal(SIGINT, self.previous_sigint)
+                    self.previous_sigint: Callable | int | None = None
+
+    def reboot_loop(self, run: Callable[[list[str]], int]):
+        self.tick: int = 0
         self.running: bool = True
+        policy: RestartPolicy = RestartPolicy(
+            base_seconds=self.server_cf_data["reboot_seconds"],
+            max_seconds=self.server_cf_data["restart_backoff_max"],
+            backoff_seconds=self.server_cf_data["restart_backoff_base"],
+            crash_budget=self.server_cf_data["restart_crash_budget"]
+        )
 
         while True:
 
-            title(F"Reboot time: {tick}")
-
-            process: Popen[str] = Popen(
-                command_args,
-                stdin=PIPE,
-                stdout=PIPE,
-                stderr=PIPE,
-                text=True,
-                bufsize=1,
-                universal_newlines=True
-            )
+            title(F"Reboot time: {self.tick}")
 
+            command_args: list[str] = self.launch_command()
             self.line()
             self.print(f"启动命令：{" ".join(command_args)}")
-            self.print(f"服务器已启动，进程PID：{process.pid}")
-
-            self.line()
-            Thread(
-                target=lambda: self.output_stream(process), daemon=True
-            ).start()
-            Thread(
-                target=lambda: self.error_stream(process), daemon=True
-            ).start()
-            input_thread = KillableThread(
-                target=lambda: self.input_stream(process), daemon=True
-            ) # 注意注意！此处不会影响任何的系统安全！请细心审查！
-            input_thread.start()
+            if self.cds:
+                self.print(f"类数据共享：{cds_mode_names[self.cds.mode]}")
 
             try:
-                process.wait()
-            except KeyboardInterrupt as e:
-                process.terminate()
-                process.wait(timeout=10)
-            tick += 1
+                return_code: int = run(command_args)
+            except KeyboardInterrupt:
+                return_code: int = self.return_code
+                self.running: bool = False
+            self.tick += 1
 
+            self.render_queue.drain()
+            if self.spool:
+                self.spool.flush()
+            for hook in self.hooks.slow_hooks():
+                self.print(f"⚠钩子{hook.name}处理过慢：最长{hook.max_ns / 1e6:.1f}ms", is_error=True)
             self.line()
-            self.print(f"服务器已关闭，返回代码：{process.returncode}") # 此处不换行有特殊逻辑，正常
-
-            self.check_return_code(process.returncode)
-            if input_thread.is_alive():
-                input_thread.KILLLL()
-
-            if tick == self.running_cf_data["reboot_time"]:
+            if self.gc_analyzer:
+                for text in self.gc_analyzer.report(self.server_cf_data["jvm_args"].data):
+                    self.print(text)
+            if self.shutdown_seconds is not None:
+                self.print(f"关闭耗时：{self.shutdown_seconds:.1f}s（{shutdown_stage_names[self.shutdown.stage]}）")
+            self.print(f"服务器已关闭，返回代码：{return_code}") # 此处不换行有特殊逻辑，正常
+
+            stop_requested: bool = not self.running
+            self.check_return_code(return_code)
+
+            decision: RestartDecision = policy.decide(classify_exit(
+                return_code, self.ready, self.uptime,
+                stop_requested=stop_requested,
+                reboot_requested=self.reboot_requested,
+                stable_seconds=self.server_cf_data["restart_stable_seconds"]
+            ))
+
+            if self.tick == self.running_cf_data["reboot_time"]:
                 break
 
             if not self.running:
                 break
 
             self.line()
-            try:
-                for sec in range(self.server_cf_data["reboot_seconds"], 0, -1):
-                    self.print(f"重启倒计时：{sec}s")
-                    sleep(1)
+            if decision.delay is None:
+                self.print(f"不再重启：{decision.reason}", is_error=True)
+                break
+            self.print(f"退出原因：{decision.reason}")
 
+            try:
+                self.countdown(decision.delay)
             except KeyboardInterrupt:
                 break
         self.running: bool = False
 
+    def countdown(self, seconds: float):
+        whole: int = int(seconds)
+        for sec in range(whole, 0, -1):
+            self.print(f"重启倒计时：{sec}s")
+            sleep(1)
+        sleep(seconds - whole)
+
+    def on_spawn(self, process: Popen[bytes] | Process):
+        self.return_code: int = None
+        self.ready: bool = False
+        self.reboot_requested: bool = False
+        self.spawned_at: float = monotonic()
+        self.pid: int = process.pid
+        self.shutdown_seconds: float = None
+        self.exited.clear()
+        self.hooks.reset_stats()
+        self.player_tracker.start(
+            self.issue, lambda: self.ready, self.server_cf_data["player_resync_seconds"], self.query
+        )
+        if self.gc_analyzer:
+            self.gc_analyzer.start()
+        if self.sampler:
+            self.sampler.start(process.pid)
+        if self.pressure:
+            self.pressure.start(process.pid, self.gc_analyzer)
+        if self.watchdog:
+            self.watchdog.start(process.pid, lambda: self.ready)
+        if self.pinger:
+            self.pinger.start(self.on_joinable)
+        self.boot_profiler.start()
+        self.print(f"服务器已启动，进程PID：{process.pid}")
+        self.line()
+
+    def on_exit(self, process: Popen[bytes] | Process):
+        self.return_code: int = process.returncode
+        self.uptime: float = monotonic() - self.spawned_at
+        self.pid: int = None
+        self.shutdown_seconds: float = self.shutdown.finish(process.returncode)
+        self.exited.set()
+        self.player_tracker.stop()
+        self.player_tracker.reset()
+        if self.rcon:
+            self.rcon.close()
+            self.rcon: RconPool = None
+        if self.pressure:
+            self.pressure.stop()
+        if self.watchdog:
+            self.watchdog.stop()
+        if self.pinger:
+            self.pinger.stop()
+        if self.ready_timer:
+            self.ready_timer.cancel()
+            self.ready_timer: Timer = None
+        if self.gc_analyzer:
+            self.gc_analyzer.stop()
+        if self.sampler:
+            self.sampler.stop()
+        self.boot_profiler.finish()
+
+    def run_thread(self, command_args: list[str]) -> int:
+        process: Popen[bytes] = Popen(
+            command_args,
+            stdin=PIPE,
+            stdout=PIPE,
+            stderr=PIPE,
+            bufsize=0
+        )
+        self.on_spawn(process)
+        self.injector = lambda text: self.ana(process, text)
+
+        readers: list[Thread] = [
+            Thread(target=lambda: self.output_stream(process), daemon=True),
+            Thread(target=lambda: self.error_stream(process), daemon=True)
+        ]
+        for reader in readers:
+            reader.start()
+        input_thread = KillableThread(
+            target=lambda: self.input_stream(process), daemon=True
+        ) # 注意注意！此处不会影响任何的系统安全！请细心审查！
+        if not self.control: # 守护模式下命令只来自控制套接字，不读取终端
+            input_thread.start()
+
+        try:
+            process.wait()
+        except KeyboardInterrupt as e:
+            try:
+                self.shutdown.escalate(
+                    process.pid, lambda: self.issue("stop\n"), lambda seconds: wait_popen(process, seconds),
+                    self.warn, reason="interrupt"
+                )
+            except KeyboardInterrupt: # 再次按下Ctrl+C，直接结束
+                process.kill()
+                process.wait()
+            self.running: bool = False
+        finally:
+            for reader in readers: # 读线程在EOF处结束，等待其取完尾部输出
+                reader.join(timeout=5)
+            self.on_exit(process)
+            if input_thread.is_alive():
+                input_thread.KILLLL()
+
+        return process.returncode
+
+    def metrics_registry(self) -> MetricsRegistry:
+        registry: MetricsRegistry = MetricsRegistry()
+        streams: Callable[[list[int]], dict[str, int]] = lambda values: {"stdout": values[0], "stderr": values[1]}
+
+        def process_stat(key: str) -> int | None:
+            result: dict[str, int] | None = read_proc_stat(self.pid) if self.pid else None
+            return result.get(key) if result else None
+
+        def cpu_seconds() -> float | None:
+            ticks: int | None = process_stat("ticks")
+            return ticks / clock_ticks if ticks is not None else None
+
+        registry.gauge("reboot_tick", "Number of completed server runs in this session", lambda: self.tick)
+        registry.gauge("server_up", "Whether the server process is running", lambda: self.pid is not None)
+        registry.gauge("server_ready", "Whether the server has logged Done", lambda: self.ready)
+        registry.gauge(
+            "server_uptime_seconds", "Seconds since the current server process started",
+            lambda: monotonic() - self.spawned_at if self.pid else None
+        )
+        registry.counter(
+            "lines_read_total", "Console lines read from the server", lambda: streams(self.line_counter.lines), "stream"
+        )
+        registry.counter(
+            "bytes_read_total", "Console bytes read from the server", lambda: streams(self.line_counter.bytes), "stream"
+        )
+        registry.gauge("render_queue_depth", "Lines waiting to be written to the terminal", self.render_queue.depth)
+        registry.counter("render_dropped_lines_total", "Lines dropped by the render overflow policy", lambda: self.render_queue.dropped)
+        registry.counter("render_lines_total", "Lines written to the terminal", lambda: self.render_queue.rendered)
+        registry.gauge("players_online", "Players currently online", self.player_tracker.count)
+        registry.gauge("control_clients", "Clients connected to the daemon control socket", lambda: self.control.count() if self.control else None)
+        registry.gauge("ping_up", "Whether the last Server List Ping succeeded", lambda: self.pinger.up if self.pinger else None)
+        registry.gauge(
+            "ping_connect_seconds", "TCP connect latency of the last successful ping",
+            lambda: self.pinger.last.connect_ms / 1000 if self.pinger and self.pinger.last else None
+        )
+        registry.gauge(
+            "ping_response_seconds", "Status response latency of the last successful ping",
+            lambda: self.pinger.last.response_ms / 1000 if self.pinger and self.pinger.last else None
+        )
+        registry.counter(
+            "ping_failures_total", "Failed pings after the server became joinable",
+            lambda: self.pinger.failures if self.pinger else None
+        )
+        registry.counter(
+            "watchdog_hangs_total", "Hangs detected by the watchdog",
+            lambda: self.watchdog.hangs if self.watchdog else None
+        )
+        registry.gauge("last_shutdown_seconds", "Duration of the last shutdown", lambda: self.shutdown.last_seconds)
+        registry.gauge("last_boot_seconds", "Duration of the last complete boot", lambda: self.boot_profiler.last_seconds)
+        registry.gauge("process_resident_memory_bytes", "Server process RSS", lambda: process_stat("VmRSS"))
+        registry.counter("process_cpu_seconds_total", "Server process user and system CPU time", cpu_seconds)
+        return registry
+
+    def on_cancel(self, process: Process):
+        # 事件循环仍需处理stop命令与进程退出，关闭流程放到单独线程中等待
+        Thread(
+            target=lambda: self.shutdown.escalate(
+                process.pid, lambda: self.issue("stop\n"), self.exited.wait, self.warn, reason="interrupt"
+            ),
+            daemon=True
+        ).start()
+
+    def print(self, text: str, is_error: bool = False, *colors: Color, **kwargs):
+        super().print(text, is_error, *colors, **kwargs)
+        if self.console_log:
+            self.console_log.note(text)
+
+    def daemon_status(self) -> dict:
+        return {
+            "pid": self.pid,
+            "ready": self.ready,
+            "reboot_tick": self.tick,
+            "uptime": round(monotonic() - self.spawned_at, 1) if self.pid else None,
+            "players": self.player_tracker.names(),
+            "clients": self.control.count() if self.control else 0,
+        }
+
+    def warn(self, text: str):
+        self.print(f"⚠{text}", is_error=True)
+
+    def check_flags(self) -> bool:
+        result: tuple[list[str], list[str]] | None = check_jvm_flags(
+            self.server_cf_data, generate_command(self.server_cf_data)
+        )
+        if result is None:
+            return True
+
+        errors, warnings = result
+        for text in warnings:
+            self.print(f"⚠JVM参数警告：{text}")
+        for text in errors:
+            self.print(f"JVM参数错误：{text}", is_error=True)
+        if errors:
+            self.print("JVM将拒绝启动，请在“配置高级JVM参数”中修正，或将flag_check设为false跳过校验。", is_error=True)
+        return not errors
+
+    def on_ready(self):
+        if self.ready:
+            return
+        self.ready: bool = True
+        if self.server_cf_data["rcon_pool_size"] > 0:
+            # 每次启动重新读取，server.properties可能在两次启动之间被修改
+            self.rcon: RconPool = RconPool.from_properties(size=self.server_cf_data["rcon_pool_size"])
+
+    def on_joinable(self, result: PingResult, seconds: float):
+        # 端口开始响应状态查询才算真正可加入；新版服务器在加载世界时就已监听端口，因此不能据此判定启动完成
+        self.print(
+            f"服务器已可加入：启动后{seconds:.1f}s，连接{result.connect_ms:.1f}ms，状态响应{result.response_ms:.1f}ms"
+        )
+        if self.ready:
+            return
+        if not self.server_cf_data["loader"] in layout_orders: # 无法识别Done行的加载器只能以端口响应为准
+            self.on_ready()
+            return
+        self.ready_timer: Timer = Timer(self.server_cf_data["ping_ready_seconds"], self.ready_fallback, args=(self.pid,))
+        self.ready_timer.daemon = True
+        self.ready_timer.start()
+
+    def ready_fallback(self, pid: int):
+        # 端口已响应但迟迟没有Done行（日志格式被修改等），超时后以端口响应判定启动完成
+        if self.ready or self.pid != pid:
+            return
+        self.print(f"⚠端口已响应{self.server_cf_data['ping_ready_seconds']}s仍未识别到Done行，按已启动处理。", is_error=True)
+        self.on_ready()
+
+    def query(self, text: str) -> str | None:
+        # 经RCON执行命令并取回该命令自己的响应；RCON不可用时返回None，由调用方退回控制台
+        rcon: RconPool | None = self.rcon
+        if rcon is None:
+            return
+        try:
+            return rcon.command(text)
+        except RconError:
+            return
+
+    def rcon_probe(self, timeout: float) -> bool | None:
+        # 卡死探测只走RCON，不在控制台留下输出；返回None时由看门狗退回控制台探测
+        rcon: RconPool | None = self.rcon
+        if rcon is None:
+            return
+        try:
+            connection: RconConnection | None = rcon.acquire(timeout)
+        except RconError: # 连不上说明RCON配置有误，而不是服务器卡死（RCON线程独立于服务器主线程）
+            return
+        if connection is None: # 所有连接都在等待响应
+            return False
+        try:
+            connection.command("list", timeout)
+            return True
+        except RconError:
+            return False
+        finally:
+            rcon.release(connection)
+
+    def ping_failed(self) -> bool:
+        return self.pinger.streak >= self.server_cf_data["watchdog_ping_failures"]
+
+    def issue(self, text: str):
+        # 从监控线程发出命令，效果与在控制台输入相同
+        if self.injector is None:
+            return
+        try:
+            self.injector(text)
+        except (BrokenPipeError, OSError):
+            pass
+
     def check_return_code(self, code: int):
         match code:
             case 130:
                 self.running: bool = False
 
-    def output_stream(self, proc: Popen[str]):
-        while proc.poll() is None:
-            std_output: str = proc.stdout.readline()
-
-            if std_output:
-                self.print(std_output, end="")
+    def dispatch(self, line: RawLine, is_error: bool):
+        for consumer in self.consumers:
+            consumer(line, is_error)
 
-    def error_stream(self, proc: Popen[str]):
-        while proc.poll() is None:
-            std_error: str = proc.stderr.readline()
+    def output_stream(self, proc: Popen[bytes]):
+        pump_fd(proc.stdout.fileno(), self.dispatch, False)
 
-            if std_error:
-                self.print(f"[ERROR] {std_error}", end="", is_error=True)
+    def error_stream(self, proc: Popen[bytes]):
+        pump_fd(proc.stderr.fileno(), self.dispatch, True)
 
-    def input_stream(self, proc: Popen[str]):
+    def input_stream(self, proc: Popen[bytes]):
         while proc.poll() is None:
             raw: bytes = stdin.buffer.readline()
             # 唯一遗憾，若强杀进程会导致线程堵塞，线程卡在内核等输入，新线程抢不到输入，代价是多按一次Enter，坑爹！
@@ -399,67 +1010,46 @@ class ServerStream(Page):
                 except (BrokenPipeError, OSError):
                     break
 
-    def ana(self, proc: Popen[str], stdin: str) -> Literal["break"]:
+    def send(self, proc: Popen[bytes] | Process, text: str):
+        proc.stdin.write(text.encode("utf-8"))
+        if isinstance(proc, Popen):
+            proc.stdin.flush()
+
+    def ana(self, proc: Popen[bytes] | Process, stdin: str) -> Literal["break"]:
         text: str = stdin.strip()
         if not self.running:
             return
 
         if text in ["stop", "/stop"]:
-            proc.stdin.write("stop\n")
-            proc.stdin.flush()
+            self.shutdown.begin("stop")
+            self.send(proc, "stop\n")
 
             self.running: bool = False
             return "break"
 
         if text in ["reboot", "/reboot"]:
-            proc.stdin.write("stop\n")
-            proc.stdin.flush()
+            self.shutdown.begin("reboot")
+            self.send(proc, "stop\n")
+            self.reboot_requested: bool = True
             return "break"
 
-        proc.stdin.write(stdin)
-        proc.stdin.flush()
+        self.send(proc, stdin)
 
-    def generate_command(self) -> list[str]:
-        args: list[str] = None
+    def launch_command(self) -> list[str]:
+        command_args: list[str] = generate_command(self.server_cf_data)
+        if not (self.cds or self.gc_analyzer):
+            return command_args
 
-        match self.server_cf_data["loader"]:
-            case "Vanilla" | "Fabric" | "Quilt":
-                pass
-            case "Forge" | "NeoForge":
-                version: tuple[int, int, int] = get_vernum(self.server_cf_data["version"])
+        jdk_path: str = self.server_cf_data["jdk_path"]
+        jdk_version: tuple[int, int, int] = get_jdk_version(jdk_path)
+        extra_args: list[str] = list()
 
-                if (1, 17, 0) > version:
-                    pass
-                else:
-                    forge_libraries_path: str = None
-
-                    if self.server_cf_data["loader"] == "Forge":
-                        forge_libraries_path: str = get_forge_libraries_path(
-                            "./libraries/net/minecraftforge/forge"
-                        )
-                    elif self.server_cf_data["loader"] == "NeoForge":
-                        forge_libraries_path: str = get_forge_libraries_path(
-                            "./libraries/net/neoforged/neoforge"
-                        )
-                    if not forge_libraries_path is None:
-                        forge_libraries_path: str = "@" + forge_libraries_path
-                        args: list[str] = [
-                            get_java_exe_path(self.server_cf_data["jdk_path"]),
-                            f"-Xmx{self.server_cf_data["max_memory"]}G",
-                            f"-Xms{self.server_cf_data["min_memory"]}G",
-                            *generate_jvm_args(self.server_cf_data["jvm_args"]),
-                            forge_libraries_path,
-                            "%*",
-                            "nogui"
-                        ]
-        if args is None:
-            args: list[str] = [
-                get_java_exe_path(self.server_cf_data["jdk_path"]),
-                f"-Xmx{self.server_cf_data["max_memory"]}G",
-                f"-Xms{self.server_cf_data["min_memory"]}G",
-                *generate_jvm_args(self.server_cf_data["jvm_args"]),
-                "-jar",
-                self.server_cf_data["jar_name"],
-                "nogui"
-            ]
-        return args
+        if self.cds:
+            extra_args.extend(self.cds.prepare(
+                command_args, jdk_version, get_jdk_release_path(jdk_path)
+            ))
+            self.boot_profiler.tag = self.cds.mode
+        if self.gc_analyzer:
+            extra_args.extend(self.gc_analyzer.jvm_args(jdk_version))
+
+        return generate_command(self.server_cf_data, extra_args) if extra_args else command_args
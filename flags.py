@@ -0,0 +1,148 @@
+from os import path, makedirs
+from json import dumps, loads, JSONDecodeError
+from hashlib import sha1
+from re import compile as compile_regex, Pattern, Match
+from subprocess import run as run_process, PIPE, DEVNULL, TimeoutExpired
+
+flags_directory: str = path.join("runner_data", "jvm_flags")
+
+# JDK 8："bool UseG1GC := true {product}"；JDK 9+："bool UseG1GC = true {product} {default}"
+flag_line_pattern: Pattern = compile_regex(r"^\s*(\S+)\s+(\w+)\s+:?=\s*(.*?)\s*\{([^}]*)\}")
+
+gc_selectors: tuple[str, ...] = (
+    "UseSerialGC", "UseParallelGC", "UseG1GC", "UseZGC", "UseShenandoahGC", "UseEpsilonGC"
+)
+
+numeric_types: frozenset[str] = frozenset({
+    "int", "uint", "intx", "uintx", "uint64_t", "size_t"
+})
+
+size_units: dict[str, int] = {"": 1, "k": 1 << 10, "m": 1 << 20, "g": 1 << 30, "t": 1 << 40}
+
+type FlagTable = dict[str, tuple[str, str]] # 名称 -> (类型, 类别)
+
+# ----------------------------------------------------------------
+
+def parse_flags_final(text: str) -> FlagTable:
+    table: FlagTable = dict()
+    for line in text.splitlines():
+        result: Match = flag_line_pattern.match(line)
+        if result:
+            table[result[2]] = (result[1], result[4].strip())
+    return table
+
+def flag_cache_key(java_exe: str, jdk_release: str = None) -> str:
+    digest = sha1(java_exe.encode("utf-8", errors="replace"))
+    if jdk_release and path.exists(jdk_release):
+        with open(jdk_release, mode="rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()[:16]
+
+def load_flag_table(java_exe: str, jdk_release: str = None, directory: str = flags_directory) -> FlagTable | None:
+    cache: str = path.join(directory, f"{flag_cache_key(java_exe, jdk_release)}.json")
+    if path.exists(cache):
+        try:
+            with open(cache, mode="r", encoding="utf-8") as file:
+                return {key: tuple(value) for key, value in loads(file.read()).items()}
+        except (OSError, JSONDecodeError):
+            pass
+
+    try:
+        result = run_process(
+            [
+                java_exe, "-XX:+UnlockExperimentalVMOptions", "-XX:+UnlockDiagnosticVMOptions",
+                "-XX:+PrintFlagsFinal", "-version"
+            ],
+            stdin=DEVNULL, stdout=PIPE, stderr=PIPE, timeout=30
+        )
+    except (OSError, TimeoutExpired):
+        return
+
+    table: FlagTable = parse_flags_final(result.stdout.decode("utf-8", errors="replace"))
+    if not table: # 不是HotSpot或无法启动，放弃校验
+        return
+
+    makedirs(directory, exist_ok=True)
+    with open(cache, mode="w", encoding="utf-8") as file:
+        file.write(dumps(table, separators=(",", ":")))
+    return table
+
+# ----------------------------------------------------------------
+
+def check_value(flag_type: str, value: str) -> bool:
+    if flag_type == "bool":
+        return value in ("true", "false")
+    if flag_type == "double":
+        try:
+            float(value)
+            return True
+        except ValueError:
+            return False
+    if flag_type in numeric_types:
+        number: str = value.lower()
+        if flag_type == "size_t" or flag_type.startswith("u"):
+            number: str = number.rstrip("kmgt") if number[-1:] in size_units else number
+            return number.isdigit()
+        return number.lstrip("-").isdigit()
+    return True # ccstr等字符串类型
+
+def validate_jvm_flags(args: list[str], table: FlagTable) -> tuple[list[str], list[str]]:
+    errors: list[str] = list()
+    warnings: list[str] = list()
+    enabled: dict[str, bool] = dict()
+    unlocked: set[str] = set()
+
+    for arg in args:
+        if not arg.startswith("-XX:"):
+            continue
+        body: str = arg[4:]
+
+        if body[:1] in ("+", "-"):
+            name, value = body[1:], None
+            switch: bool = body[0] == "+"
+        else:
+            name, _, value = body.partition("=")
+            switch: bool = None
+
+        if name == "UnlockExperimentalVMOptions" and switch:
+            unlocked.add("experimental")
+        if name == "UnlockDiagnosticVMOptions" and switch:
+            unlocked.add("diagnostic")
+
+        if name in ("SharedArchiveFile", "ArchiveClassesAtExit") and name not in table:
+            continue
+        if not name in table:
+            errors.append(f"{arg}：当前JDK不存在该参数（可能已被移除）")
+            continue
+
+        flag_type, kind = table[name]
+        if switch is not None:
+            if flag_type != "bool":
+                errors.append(f"{arg}：{name}为{flag_type}类型，应写作-XX:{name}=值")
+                continue
+            enabled[name] = switch
+        elif flag_type == "bool":
+            errors.append(f"{arg}：{name}为布尔参数，应写作-XX:+{name}或-XX:-{name}")
+            continue
+        elif not check_value(flag_type, value):
+            errors.append(f"{arg}：取值{value!r}不符合{flag_type}类型")
+            continue
+
+        for category in ("experimental", "diagnostic"):
+            if category in kind and not category in unlocked:
+                errors.append(f"{arg}：{category}参数，需先启用-XX:+Unlock{category.capitalize()}VMOptions")
+
+    selected: list[str] = [name for name in gc_selectors if enabled.get(name)]
+    if len(selected) > 1:
+        errors.append(f"垃圾回收器互斥：同时启用了{"、".join(selected)}")
+
+    if enabled.get("ZGenerational") and not enabled.get("UseZGC"):
+        warnings.append("ZGenerational仅在启用UseZGC时生效")
+    if selected and selected[0] != "UseG1GC":
+        g1_flags: list[str] = [
+            arg for arg in args if arg.startswith("-XX:") and arg[4:].lstrip("+-").startswith("G1")
+        ]
+        if g1_flags:
+            warnings.append(f"{"、".join(g1_flags)}仅对G1生效，当前回收器为{selected[0]}")
+
+    return errors, warnings
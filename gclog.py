@@ -0,0 +1,192 @@
+from boot import percentile
+
+from os import path, makedirs, remove, stat, fstat
+from re import compile as compile_regex, Pattern, Match
+from glob import glob, escape as glob_escape
+from threading import Thread, Event
+from collections import deque
+
+gc_log_path: str = path.join("runner_data", "gc", "gc.log")
+
+# -Xlog装饰器固定为uptime,level,tags："[12.345s][info][gc,phases   ] GC(3) ..."
+gc_line_pattern: Pattern = compile_regex(r"^\[(?P<uptime>[\d.]+)s\]\[\w+\s*\]\[(?P<tags>[\w,]+)\s*\] (?P<message>.*)$")
+gc_pause_pattern: Pattern = compile_regex(r"\bPause\b.*?(?P<ms>\d+(?:\.\d+)?)ms$")
+gc_heap_pattern: Pattern = compile_regex(r"(?P<before>\d+)M(?:\(\d+%\))?->(?P<after>\d+)M")
+gc_humongous_pattern: Pattern = compile_regex(r"Humongous regions: (?P<before>\d+)->(?P<after>\d+)")
+
+# ----------------------------------------------------------------
+
+class GCAnalyzer:
+    def __init__(
+        self,
+        log_path: str = gc_log_path,
+        interval: float = 1,
+        file_count: int = 5,
+        file_size: str = "20M",
+        window: int = 4096
+    ):
+        self.log_path: str = log_path
+        self.interval: float = interval
+        self.file_count: int = file_count # JVM按大小轮转日志，最多保留该数量的旧文件
+        self.file_size: str = file_size
+        self.window: int = window # 分位数只按最近的停顿计算，长时间运行时内存与排序开销不随运行时长增长
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+        self.reset()
+
+    def reset(self):
+        self.offset: int = 0
+        self.partial: bytes = b""
+        self.inode: int = None
+        self.pauses: deque[float] = deque(maxlen=self.window)
+        self.pause_count: int = 0
+        self.pause_total: float = 0 # ms
+        self.pause_max: float = 0 # ms
+        self.uptime: float = 0
+        self.allocated: int = 0 # MB
+        self.last_after: int = None
+        self.humongous_pauses: int = 0
+        self.humongous_peak: int = 0
+
+    def jvm_args(self, jdk_version: tuple[int, int, int] = None) -> list[str]:
+        if jdk_version is not None and jdk_version < (9, 0, 0): # JDK 8没有统一日志
+            return list()
+        makedirs(path.dirname(self.log_path), exist_ok=True)
+        return [
+            f"-Xlog:gc*:file={self.log_path}:uptime,level,tags:filecount={self.file_count},filesize={self.file_size}"
+        ]
+
+    # ----------------------------------------------------------------
+
+    def start(self):
+        self.stop()
+        self.reset()
+        if path.exists(self.log_path): # JVM打开文件前清除上一轮的日志，避免被误读
+            try:
+                remove(self.log_path)
+            except OSError:
+                pass
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=self.tail_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        self.thread: Thread = None
+        self.poll() # 读取进程退出前最后写入的部分
+
+    def tail_loop(self):
+        while not self.stopped.wait(self.interval):
+            self.poll()
+
+    def poll(self):
+        try:
+            with open(self.log_path, mode="rb") as file:
+                inode: int = fstat(file.fileno()).st_ino
+                if self.inode is not None and inode != self.inode:
+                    # JVM轮转时把当前文件改名为gc.log.N并新建gc.log，先读完旧文件剩余的部分
+                    self.drain_rotated()
+                    self.offset: int = 0
+                    self.partial: bytes = b""
+                self.inode: int = inode
+                file.seek(0, 2)
+                if file.tell() < self.offset: # 文件被截断，重新开始
+                    self.reset()
+                    self.inode: int = inode
+                file.seek(self.offset)
+                chunk: bytes = file.read()
+                self.offset: int = file.tell()
+        except OSError:
+            return
+        self.consume(chunk)
+
+    def drain_rotated(self):
+        for file_path in glob(f"{glob_escape(self.log_path)}.*"):
+            try:
+                if stat(file_path).st_ino != self.inode:
+                    continue
+                with open(file_path, mode="rb") as file:
+                    file.seek(self.offset)
+                    self.consume(file.read())
+            except OSError:
+                pass
+            return
+
+    def consume(self, chunk: bytes):
+        if not chunk:
+            return
+        *lines, self.partial = (self.partial + chunk).split(b"\n")
+        for line in lines:
+            self.feed(line.decode("utf-8", errors="replace").rstrip("\r"))
+
+    def feed(self, line: str):
+        result: Match = gc_line_pattern.match(line)
+        if not result:
+            return
+
+        self.uptime: float = float(result["uptime"])
+        message: str = result["message"]
+        tags: str = result["tags"]
+
+        pause: Match = gc_pause_pattern.search(message)
+        if pause and tags in ("gc", "gc,phases"):
+            self.pauses.append(float(pause["ms"]))
+            self.pause_count += 1
+            self.pause_total += self.pauses[-1]
+            self.pause_max: float = max(self.pause_max, self.pauses[-1])
+            if "Humongous" in message:
+                self.humongous_pauses += 1
+
+        if tags == "gc":
+            heap: Match = gc_heap_pattern.search(message)
+            if heap:
+                before, after = int(heap["before"]), int(heap["after"])
+                # 两次GC之间的分配量 = 本次GC前占用 - 上次GC后占用
+                self.allocated += max(0, before - (self.last_after if self.last_after is not None else 0))
+                self.last_after: int = after
+
+        humongous: Match = gc_humongous_pattern.search(message)
+        if humongous:
+            self.humongous_peak: int = max(self.humongous_peak, int(humongous["before"]))
+
+    # ----------------------------------------------------------------
+
+    def report(self, jvm_args: dict = None) -> list[str]:
+        if not self.pauses:
+            return ["GC日志：本轮未记录到GC停顿。"]
+
+        jvm_args: dict = jvm_args or dict()
+        p50: float = percentile(self.pauses, 0.5)
+        p99: float = percentile(self.pauses, 0.99)
+        total: float = self.pause_total
+        scope: str = f"（分位数取最近{len(self.pauses)}次）" if self.pause_count > len(self.pauses) else ""
+        gc_share: float = total / 1000 / self.uptime * 100 if self.uptime else 0
+        rate: float = self.allocated / self.uptime if self.uptime else 0
+
+        result: list[str] = [
+            f"GC日志：{self.pause_count}次停顿，p50 {p50:.1f}ms，p99 {p99:.1f}ms{scope}，最长 {self.pause_max:.1f}ms",
+            f"GC耗时占比：{gc_share:.2f}%（{total / 1000:.1f}s / {self.uptime:.0f}s），分配速率：{rate:.1f}MB/s",
+            f"巨型对象：{self.humongous_pauses}次由巨型分配触发的停顿，峰值{self.humongous_peak}个巨型区域",
+        ]
+
+        target: int = jvm_args.get("XX_MaxGCPauseMillis") or 200
+        region: int = jvm_args.get("XX_G1HeapRegionSize") or 0
+        suggestions: list[str] = list()
+
+        if jvm_args.get("XX_UseG1GC") and (self.humongous_pauses or self.humongous_peak) and region < 32:
+            larger: int = max(2, region * 2) if region else 16
+            suggestions.append(f"XX_G1HeapRegionSize {region or "默认"} -> {min(32, larger)}：减少巨型对象分配")
+        if p99 > target * 1.5:
+            if jvm_args.get("XX_UseG1GC"):
+                suggestions.append(f"p99停顿{p99:.0f}ms远超目标{target}ms：增大XX_ParallelGCThreads，或在JDK 21+上改用XX_UseZGC")
+            else:
+                suggestions.append(f"p99停顿{p99:.0f}ms远超目标{target}ms：考虑增大堆内存或GC线程数")
+        elif p99 < target * 0.3 and gc_share > 5:
+            suggestions.append(f"XX_MaxGCPauseMillis {target} -> {int(target * 1.5)}：停顿余量充足而GC频繁，放宽目标以扩大新生代、提升吞吐")
+        if gc_share > 10:
+            suggestions.append("GC耗时占比超过10%：增大max_memory，或检查是否存在内存泄漏")
+
+        return result + [f"建议：{text}" for text in suggestions]
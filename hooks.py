@@ -0,0 +1,182 @@
+from logparse import EventBus, LogEvent
+from util import colorize
+
+from re import compile as compile_regex, escape, Pattern, Match
+from time import perf_counter_ns
+from typing import Callable
+from threading import Lock
+
+type HookHandler = Callable[[LogEvent, Match | None], None]
+
+# 常用钩子：名称 -> (预筛选字面量, 提取参数的正则)
+common_hooks: dict[str, tuple[str, str | None]] = {
+    "player_join": (" joined the game", r"^(?P<player>[\w.]+) joined the game"),
+    "player_leave": (" left the game", r"^(?P<player>[\w.]+) left the game"),
+    "player_lost": (" lost connection: ", r"^(?P<player>[\w.]+) lost connection: (?P<reason>.*)$"),
+    "cant_keep_up": ("Can't keep up!", r"Running (?P<ms>\d+)ms or (?P<ticks>\d+) ticks behind"),
+    "done": ("Done (", r"^Done \((?P<seconds>[\d.]+)s\)!"),
+    "preparing_spawn": ("Preparing spawn area", None),
+    "stopping": ("Stopping server", None),
+}
+
+regex_meta: frozenset[str] = frozenset(".^$*+?{}[]\\|()")
+
+# ----------------------------------------------------------------
+
+class Hook:
+    __slots__ = ("name", "handler", "literal", "pattern", "level", "calls", "total_ns", "max_ns", "failures")
+
+    def __init__(self, name: str, handler: HookHandler, literal: str, pattern: Pattern | None, level: str | None):
+        self.name: str = name
+        self.handler: HookHandler = handler
+        self.literal: str = literal
+        self.pattern: Pattern | None = pattern
+        self.level: str | None = level
+        self.calls: int = 0
+        self.total_ns: int = 0
+        self.max_ns: int = 0
+        self.failures: int = 0
+
+    def average_ms(self) -> float:
+        return self.total_ns / self.calls / 1e6 if self.calls else 0.0
+
+class HookRegistry:
+    def __init__(self, bus: EventBus = None, notify: Callable[[str], None] = None, failure_limit: int = 10):
+        self.bus: EventBus = bus
+        self.notify: Callable[[str], None] = notify
+        self.failure_limit: int = failure_limit # 累计出错达到该次数后停用钩子，0为不停用
+        self.hooks: list[Hook] = list()
+        self.lock: Lock = Lock()
+        # 线程读取模式下标准输出与标准错误并发分发，计数须加锁
+        self.stats_lock: Lock = Lock()
+
+        # 编译产物，整体替换以免分发时加锁
+        self.prefilter: Pattern | None = None
+        self.by_literal: dict[str, list[Hook]] = dict()
+
+    def register(
+        self,
+        name: str,
+        handler: HookHandler,
+        pattern: str = None,
+        literal: str = None,
+        level: str = None
+    ) -> Hook:
+        if literal is None and pattern is not None and not regex_meta.intersection(pattern):
+            literal: str = pattern # 纯字面量模式无需正则
+            pattern: str = None
+        if literal is None and pattern is None:
+            raise ValueError(f"Hook '{name}' needs a pattern or a literal")
+        if not literal: # 每个钩子都须经字面量预筛选，正则只在命中的行上运行
+            raise ValueError(f"Hook '{name}' needs a literal to prefilter its pattern")
+
+        hook: Hook = Hook(name, handler, literal, compile_regex(pattern) if pattern else None, level)
+        with self.lock:
+            self.hooks.append(hook)
+            self.compile()
+
+        if self.bus is not None:
+            self.bus.subscribe(self.dispatch)
+        return hook
+
+    def on(self, name: str, handler: HookHandler, level: str = None) -> Hook:
+        literal, pattern = common_hooks[name]
+        return self.register(name, handler, pattern=pattern, literal=literal, level=level)
+
+    def unregister(self, hook: Hook):
+        with self.lock:
+            if hook in self.hooks:
+                self.hooks.remove(hook)
+            self.compile()
+
+        if not self.hooks and self.bus is not None:
+            self.bus.unsubscribe(self.dispatch)
+
+    def compile(self):
+        by_literal: dict[str, list[Hook]] = dict()
+        for hook in self.hooks:
+            by_literal.setdefault(hook.literal, list()).append(hook)
+
+        literals: list[str] = sorted(by_literal, key=len, reverse=True)
+        # 零宽先行断言使每个位置都被尝试，重叠的字面量也不会漏掉
+        prefilter: Pattern | None = compile_regex(
+            f"(?=({"|".join(map(escape, literals))}))"
+        ) if literals else None
+
+        # 同一位置只会命中最长的字面量，把它的前缀字面量一并带上
+        closure: dict[str, list[Hook]] = {
+            literal: [hook for other in literals if literal.startswith(other) for hook in by_literal[other]]
+            for literal in literals
+        }
+
+        self.by_literal, self.prefilter = closure, prefilter
+
+    # ----------------------------------------------------------------
+
+    def dispatch(self, event: LogEvent):
+        prefilter: Pattern | None = self.prefilter
+        if prefilter is None:
+            return
+        found: set[str] = {item.group(1) for item in prefilter.finditer(event.message)}
+        if not found:
+            return
+        by_literal: dict[str, list[Hook]] = self.by_literal
+        candidates: list[Hook] = list({id(hook): hook for literal in found for hook in by_literal[literal]}.values())
+
+        for hook in candidates:
+            if hook.level is not None and hook.level != event.level:
+                continue
+
+            result: Match | None = None
+            if hook.pattern is not None:
+                result: Match | None = hook.pattern.search(event.message)
+                if result is None:
+                    continue
+
+            start: int = perf_counter_ns()
+            try:
+                hook.handler(event, result)
+            except Exception as err:
+                self.on_failure(hook, err)
+            finally:
+                cost: int = perf_counter_ns() - start
+                with self.stats_lock:
+                    hook.calls += 1
+                    hook.total_ns += cost
+                    if cost > hook.max_ns:
+                        hook.max_ns: int = cost
+
+    def on_failure(self, hook: Hook, err: Exception):
+        # 钩子出错不能打断日志分发；首次出错时报告，反复出错则停用
+        with self.stats_lock:
+            hook.failures += 1
+            failures: int = hook.failures
+        if failures == 1:
+            self.report(f"钩子{hook.name}出错：{type(err).__name__}: {err}")
+        if self.failure_limit and failures == self.failure_limit:
+            self.unregister(hook)
+            self.report(f"钩子{hook.name}已出错{failures}次，已停用")
+
+    def report(self, text: str):
+        if self.notify is not None:
+            self.notify(text)
+        else:
+            print(colorize(text, "red"))
+
+    def reset_stats(self):
+        # 每次启动服务器时清零，耗时统计只反映本次运行；出错次数保留，已停用的钩子不会恢复
+        with self.stats_lock:
+            for hook in self.hooks:
+                hook.calls = 0
+                hook.total_ns = 0
+                hook.max_ns = 0
+
+    def stats(self) -> list[str]:
+        return [
+            f"{hook.name}：调用{hook.calls}次，平均{hook.average_ms():.3f}ms，最长{hook.max_ns / 1e6:.3f}ms"
+            + (f"，出错{hook.failures}次" if hook.failures else "")
+            for hook in sorted(self.hooks, key=lambda item: item.total_ns, reverse=True)
+        ]
+
+    def slow_hooks(self, threshold_ms: float = 50) -> list[Hook]:
+        return [hook for hook in self.hooks if hook.max_ns / 1e6 >= threshold_ms]
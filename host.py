@@ -0,0 +1,213 @@
+from util import Config
+from expand import JVMArgsType, ServerConfigType
+
+from os import path, listdir, cpu_count
+from math import ceil
+
+# ----------------------------------------------------------------
+
+def read_text(file_path: str) -> str | None:
+    try:
+        with open(file_path, mode="r", encoding="utf-8") as file:
+            return file.read().strip()
+    except (OSError, UnicodeDecodeError):
+        return
+
+def read_meminfo(file_path: str = "/proc/meminfo") -> dict[str, int]:
+    # 单位：字节
+    result: dict[str, int] = dict()
+    for text in (read_text(file_path) or "").splitlines():
+        key, _, value = text.partition(":")
+        parts: list[str] = value.split()
+        if parts and parts[0].isdigit():
+            result[key] = int(parts[0]) * (1024 if parts[1:] == ["kB"] else 1)
+    return result
+
+def cgroup_paths(file_path: str = "/proc/self/cgroup") -> dict[str, str]:
+    # v2："0::/path"；v1："N:memory:/path"、"N:cpu,cpuacct:/path"
+    result: dict[str, str] = dict()
+    for text in (read_text(file_path) or "").splitlines():
+        parts: list[str] = text.split(":", 2)
+        if len(parts) != 3:
+            continue
+        if parts[0] == "0" and not parts[1]:
+            result["v2"] = parts[2]
+        for controller in parts[1].split(","):
+            if controller:
+                result[controller] = parts[2]
+    return result
+
+def cgroup_candidates(root: str, relative: str | None) -> list[str]:
+    # 容器内通常只挂载了自身的cgroup，相对路径不存在时退回挂载根
+    candidates: list[str] = list()
+    if relative:
+        candidates.append(path.join(root, relative.lstrip("/")))
+    candidates.append(root)
+    return candidates
+
+def cgroup_limits(base: str = "/sys/fs/cgroup") -> tuple[int | None, float | None]:
+    groups: dict[str, str] = cgroup_paths()
+    memory_limit: int | None = None
+    cpu_limit: float | None = None
+
+    for directory in cgroup_candidates(base, groups.get("v2")):
+        value: str | None = read_text(path.join(directory, "memory.max"))
+        if value and value.isdigit():
+            memory_limit: int = int(value)
+        value: str | None = read_text(path.join(directory, "cpu.max"))
+        if value and not value.startswith("max"):
+            quota, _, period = value.partition(" ")
+            cpu_limit: float = int(quota) / int(period or 100000)
+        if memory_limit is not None or cpu_limit is not None:
+            return memory_limit, cpu_limit
+
+    for directory in cgroup_candidates(path.join(base, "memory"), groups.get("memory")):
+        value: str | None = read_text(path.join(directory, "memory.limit_in_bytes"))
+        if value and value.isdigit() and int(value) < 1 << 60: # v1的“无限制”是一个接近2^63的值
+            memory_limit: int = int(value)
+            break
+
+    for directory in cgroup_candidates(path.join(base, "cpu"), groups.get("cpu")):
+        quota: str | None = read_text(path.join(directory, "cpu.cfs_quota_us"))
+        period: str | None = read_text(path.join(directory, "cpu.cfs_period_us"))
+        if quota and period and quota.lstrip("-").isdigit() and int(quota) > 0:
+            cpu_limit: float = int(quota) / int(period)
+            break
+
+    return memory_limit, cpu_limit
+
+def available_cpus() -> int:
+    try:
+        from os import sched_getaffinity
+        return len(sched_getaffinity(0))
+    except (ImportError, OSError):
+        return cpu_count() or 1
+
+# ----------------------------------------------------------------
+
+class HostInfo:
+    __slots__ = ("memory_total", "memory_limit", "cpus", "cpu_limit", "numa_nodes", "thp", "huge_pages")
+
+    def __init__(self):
+        meminfo: dict[str, int] = read_meminfo()
+        memory_limit, cpu_limit = cgroup_limits()
+
+        self.memory_total: int | None = meminfo.get("MemTotal")
+        self.memory_limit: int | None = memory_limit
+        self.cpus: int = available_cpus()
+        self.cpu_limit: float | None = cpu_limit
+        self.huge_pages: int = meminfo.get("HugePages_Total", 0)
+
+        nodes: str = "/sys/devices/system/node"
+        self.numa_nodes: int = len([
+            name for name in listdir(nodes) if name.startswith("node") and name[4:].isdigit()
+        ]) if path.isdir(nodes) else 1
+
+        thp: str = read_text("/sys/kernel/mm/transparent_hugepage/enabled") or ""
+        self.thp: str | None = thp[thp.find("[") + 1:thp.find("]")] if "[" in thp else None
+
+    def effective_memory(self) -> int | None:
+        values: list[int] = [value for value in (self.memory_total, self.memory_limit) if value]
+        return min(values) if values else None
+
+    def effective_cpus(self) -> int:
+        if self.cpu_limit:
+            return max(1, min(self.cpus, ceil(self.cpu_limit)))
+        return self.cpus
+
+    def describe(self) -> list[str]:
+        gib: float = 1 << 30
+        return [
+            f"物理内存：{self.memory_total / gib:.1f}GB" if self.memory_total else "物理内存：未知",
+            f"cgroup内存上限：{self.memory_limit / gib:.1f}GB" if self.memory_limit else "cgroup内存上限：无",
+            f"可用CPU：{self.cpus}" + (f"，cgroup配额：{self.cpu_limit:.2f}核" if self.cpu_limit else ""),
+            f"NUMA节点：{self.numa_nodes}",
+            f"透明大页：{self.thp or "不支持"}，预留大页：{self.huge_pages}",
+        ]
+
+# ----------------------------------------------------------------
+
+def gc_threads(cpus: int) -> tuple[int, int]:
+    # 与HotSpot默认公式一致，但以cgroup配额而非宿主机核数为准
+    parallel: int = cpus if cpus <= 8 else 8 + (cpus - 8) * 5 // 8
+    return parallel, max(1, (parallel + 2) // 4)
+
+def region_size(heap_gb: int) -> int:
+    size: int = 8 if heap_gb <= 12 else 16
+    while heap_gb * 1024 // size > 2048 and size < 32: # 区域数不超过2048
+        size *= 2
+    return size
+
+def generate_host_jvm_args(
+    server_config: Config[ServerConfigType],
+    host: HostInfo = None,
+    jdk_version: tuple[int, int, int] = None
+) -> tuple[Config[JVMArgsType], int, list[str]]:
+    host: HostInfo = host or HostInfo()
+    reasons: list[str] = host.describe()
+
+    memory: int | None = host.effective_memory()
+    if memory:
+        # 为元空间、代码缓存、直接内存与系统保留至少1GB或25%
+        memory_gb: float = memory / (1 << 30)
+        heap_gb: int = max(1, int(memory_gb - max(1, memory_gb * 0.25)))
+        reasons.append(f"堆内存 -Xms/-Xmx {heap_gb}G：可用{memory_gb:.1f}GB，预留max(1GB, 25%)给堆外内存")
+    else:
+        heap_gb: int = server_config["max_memory"]
+        reasons.append(f"堆内存 -Xms/-Xmx {heap_gb}G：无法探测内存，沿用当前配置")
+
+    cpus: int = host.effective_cpus()
+    parallel, concurrent = gc_threads(cpus)
+
+    recommended: JVMArgsType = {
+        "server": True,
+        "XX_DisableExplicitGC": True,
+        "XX_AlwaysPreTouch": True,
+        "XX_ParallelRefProcEnabled": True,
+        "XX_UnlockExperimentalVMOptions": True,
+        "XX_TieredCompilation": True,
+        "XX_UseCompressedOops": heap_gb < 32,
+        "XX_UseCompressedClassPointers": True,
+        "XX_MetaspaceSize": 256 if heap_gb <= 16 else 512,
+        "XX_MaxMetaspaceSize": 512 if heap_gb <= 16 else 1024,
+        "XX_ParallelGCThreads": parallel,
+        "XX_ConcGCThreads": concurrent,
+    }
+    if heap_gb >= 32:
+        reasons.append("关闭UseCompressedOops：堆≥32G时压缩指针无法生效")
+    reasons.append(f"ParallelGCThreads={parallel}，ConcGCThreads={concurrent}：按{cpus}个有效CPU计算（含cgroup配额）")
+
+    if jdk_version and jdk_version >= (21, 0, 0) and heap_gb >= 16 and cpus >= 8:
+        recommended["XX_UseZGC"] = True
+        if jdk_version < (23, 0, 0):
+            recommended["XX_ZGenerational"] = True
+            reasons.append("UseZGC+ZGenerational：JDK 21~22、堆≥16G且CPU≥8，分代ZGC停顿与堆大小无关")
+        else: # JDK 23起分代为默认模式，JDK 24移除了ZGenerational，再传入会导致JVM拒绝启动
+            reasons.append("UseZGC：JDK 23+、堆≥16G且CPU≥8，分代ZGC为默认模式，停顿与堆大小无关")
+    else:
+        size: int = region_size(heap_gb)
+        pause: int = 200 if heap_gb <= 8 else 130 if heap_gb <= 16 else 100
+        recommended.update({
+            "XX_UseG1GC": True,
+            "XX_UseStringDeduplication": True,
+            "XX_MaxGCPauseMillis": pause,
+            "XX_G1HeapRegionSize": size,
+        })
+        reasons.append(f"UseG1GC：堆{heap_gb}G/CPU{cpus}，G1吞吐与停顿较均衡；不设置Xmn以保留G1的自适应新生代")
+        reasons.append(f"G1HeapRegionSize={size}M：区域数≤2048，并减少区块数据的巨型对象分配")
+        reasons.append(f"MaxGCPauseMillis={pause}：堆越大，目标停顿越短")
+
+    if host.numa_nodes > 1:
+        recommended["XX_UseNUMA"] = True
+        reasons.append(f"UseNUMA：检测到{host.numa_nodes}个NUMA节点")
+
+    if host.huge_pages > 0:
+        recommended["XX_UseLargePages"] = True
+        reasons.append(f"UseLargePages：系统已预留{host.huge_pages}个大页")
+    elif host.thp in ("always", "madvise"):
+        recommended["XX_UseTransparentHugePages"] = True
+        reasons.append(f"UseTransparentHugePages：透明大页模式为{host.thp}")
+    else:
+        reasons.append("未启用大页：系统未预留大页且透明大页不可用")
+
+    return Config[JVMArgsType](recommended), heap_gb, reasons
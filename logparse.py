@@ -0,0 +1,113 @@
+from pipe import RawLine, decode_line
+
+from re import compile as compile_regex, Pattern, Match
+from typing import Callable, Literal
+
+type LogLayout = Literal["vanilla", "fabric", "forge"]
+type EventHandler = Callable[["LogEvent"], None]
+
+layout_orders: dict[str, tuple[LogLayout, ...]] = {
+    "Vanilla": ("vanilla", "forge", "fabric"),
+    "Fabric": ("fabric", "vanilla", "forge"),
+    "Quilt": ("fabric", "vanilla", "forge"),
+    "Forge": ("forge", "vanilla", "fabric"),
+    "NeoForge": ("forge", "vanilla", "fabric"),
+}
+
+# 兜底：带日期的时间戳、无线程名等非常规前缀
+fallback_pattern: Pattern = compile_regex(
+    r"^\[(?P<time>[^\]]+)\] \[(?:(?P<thread>[^\]]*)/)?(?P<level>[A-Z]+)\]"
+    r"(?:: | \((?P<fabric>[^)]*)\) | \[(?P<forge>[^\]]*)\]: ?)(?P<message>.*)$"
+)
+
+# ----------------------------------------------------------------
+
+class LogEvent:
+    __slots__ = ("time", "thread", "level", "logger", "message", "is_error")
+
+    def __init__(self, time: str, thread: str, level: str, logger: str, message: str, is_error: bool = False):
+        self.time: str = time
+        self.thread: str = thread
+        self.level: str = level
+        self.logger: str = logger
+        self.message: str = message
+        self.is_error: bool = is_error
+
+    def __repr__(self) -> str:
+        return f"LogEvent({self.time!r}, {self.thread!r}, {self.level!r}, {self.logger!r}, {self.message!r})"
+
+def split_head(line: str) -> tuple[str, str, str, str] | None:
+    # 快速路径："[HH:MM:SS] [thread/LEVEL]"，只用str.find
+    if not line.startswith("[") or line[9:12] != "] [":
+        return
+    close: int = line.find("]", 12)
+    if close < 0:
+        return
+    slash: int = line.rfind("/", 12, close)
+    if slash < 0:
+        return
+    return line[1:9], line[12:slash], line[slash + 1:close], line[close + 1:]
+
+def split_body(rest: str, layout: LogLayout) -> tuple[str, str] | None:
+    match layout:
+        case "vanilla":
+            if rest.startswith(": "):
+                return "", rest[2:]
+        case "fabric":
+            if rest.startswith(" ("):
+                end: int = rest.find(") ", 2)
+                if end >= 0:
+                    return rest[2:end], rest[end + 2:]
+        case "forge":
+            if rest.startswith(" ["):
+                end: int = rest.find("]: ", 2)
+                if end >= 0:
+                    return rest[2:end], rest[end + 3:]
+                if rest.endswith("]:"): # 空消息
+                    return rest[2:-2], ""
+    return
+
+def parse_line(line: str, order: tuple[LogLayout, ...] = layout_orders["Vanilla"], is_error: bool = False) -> LogEvent:
+    head: tuple[str, str, str, str] | None = split_head(line)
+    if head:
+        time, thread, level, rest = head
+        for layout in order:
+            body: tuple[str, str] | None = split_body(rest, layout)
+            if body:
+                return LogEvent(time, thread, level, body[0], body[1], is_error)
+
+    result: Match = fallback_pattern.match(line)
+    if result:
+        return LogEvent(
+            result["time"], result["thread"] or "", result["level"],
+            result["fabric"] or result["forge"] or "", result["message"], is_error
+        )
+
+    return LogEvent("", "", "", "", line, is_error) # 非日志格式的原始输出，如JVM警告、崩溃堆栈
+
+# ----------------------------------------------------------------
+
+class EventBus:
+    def __init__(self):
+        self.handlers: list[EventHandler] = list()
+
+    def subscribe(self, handler: EventHandler):
+        if not handler in self.handlers:
+            self.handlers: list[EventHandler] = [*self.handlers, handler] # 写时复制，发布时无需加锁
+
+    def unsubscribe(self, handler: EventHandler):
+        self.handlers: list[EventHandler] = [item for item in self.handlers if item != handler]
+
+    def publish(self, event: LogEvent):
+        for handler in self.handlers:
+            handler(event)
+
+class LogParser:
+    def __init__(self, bus: EventBus, loader: str = "Vanilla"):
+        self.bus: EventBus = bus
+        self.order: tuple[LogLayout, ...] = layout_orders.get(loader, layout_orders["Vanilla"])
+
+    def feed(self, line: RawLine, is_error: bool):
+        if not self.bus.handlers: # 无订阅者时不解码、不解析
+            return
+        self.bus.publish(parse_line(decode_line(line), self.order, is_error))
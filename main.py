@@ -1,18 +1,29 @@
-from ui import InfoList, Choose, InputSet, Page
+from ui import InfoList, Choose, InputSet, Page, LazyPage
 from util import Config
 from expand import (
-	loaders, default_server_config,
+	loaders, supervisors, default_server_config,
 	default_running_config, jvm_args_info,
-	title, get_env, generate_auto_jvm_args,
-	ServerConfigType, RunningType, ServerStream
+	title, setup_console, uses_legacy_ping, get_env, generate_auto_jvm_args, get_jdk_version, jvm_flags_report,
+	ServerConfigType, RunningType, JVMArgsType, ServerStream
 )
-from tool import clean, check_network, write_eula
+from render import overflow_policies
+from boot import boot_report
+from sampler import sample_report, export_samples
+from shutdown import shutdown_report
+from ping import ping_report
+from daemon import ConsoleClient
+
+from os import path
+from sys import argv
+from time import perf_counter
+from typing import Callable
 
 # ----------------------------------------------------------------
 
-server_config: Config[ServerConfigType] = Config[ServerConfigType].load_from(
-	file_path="config.json", default=default_server_config
-)
+server_config: Config[ServerConfigType] = None # 在入口处加载，各菜单页面在首次进入时才构造
+
+def load_server_config() -> Config[ServerConfigType]:
+	return Config[ServerConfigType].load_from(file_path="config.json", default=default_server_config)
 
 running_config: Config[RunningType] = Config[RunningType](
 	data=default_running_config
@@ -31,8 +42,41 @@ def run_server():
 	running_config["reboot_time"] = 1
 	multi_run_server()
 
+def run_daemon():
+	running_config["reboot_time"] = -1
+	ServerStream(
+		server_config=server_config,
+		running_config=running_config,
+		daemon=True,
+		base_color="red"
+	).do()
+
+def attach_console():
+	ConsoleClient(socket_path=server_config["daemon_socket"], base_color="green").do()
+
+def apply_jvm_args(config: Config[JVMArgsType]):
+	# 原地替换，各参数页面持有的是同一个Config对象
+	server_config["jvm_args"].data.clear()
+	server_config["jvm_args"].data.update(config.data)
+
 def replace_jvm_args_config_auto():
-	server_config["jvm_args"] = generate_auto_jvm_args(server_config)
+	apply_jvm_args(generate_auto_jvm_args(server_config))
+
+host_jvm_args_result: list = list()
+
+def explain_jvm_args_config_host() -> list[str]:
+	from host import generate_host_jvm_args # 打包为start.pyz时按需导入
+	jvm_args, heap_gb, reasons = generate_host_jvm_args(
+		server_config, jdk_version=get_jdk_version(server_config["jdk_path"])
+	)
+	host_jvm_args_result[:] = [jvm_args, heap_gb]
+	return reasons
+
+def replace_jvm_args_config_host():
+	jvm_args, heap_gb = host_jvm_args_result
+	apply_jvm_args(jvm_args)
+	server_config["min_memory"] = heap_gb
+	server_config["max_memory"] = heap_gb
 
 # ----------------------------------------------------------------
 
@@ -56,159 +100,316 @@ multi_run_server_ui: InputSet = InputSet(
 
 # ----------------------------------------------------------------
 
-jvm_args_config_ui_list: list[Page] = [InfoList(
-	description="确定生成JVM参数吗？",
+daemon_ui: InfoList = InfoList(
+	description="再次按下任意键，以守护模式启动服务器。",
+	texts=[
+		"守护模式下不读取终端输入、不显示服务器输出，服务器将无限自动重启。",
+		"请在另一个终端中选择“连接后台控制台”查看输出与发送命令，可随时断开并重新连接。"
+	],
 	enable_exit_prompt=True,
-	complete_call_function=replace_jvm_args_config_auto
-)]
+	complete_call_function=run_daemon
+)
+
+attach_ui: InfoList = InfoList(
+	description="再次按下任意键，以连接后台控制台。",
+	enable_exit_prompt=True,
+	complete_call_function=attach_console
+)
 
 # ----------------------------------------------------------------
 
-for key, value in jvm_args_info.items():
-	if key == "XX_G1HeapRegionSize":
-		jvm_args_config_ui_list.append(
-			Choose(
-				description=value["desc"],
-				text=value["data"],
-				data=value["data"],
-				config=server_config["jvm_args"],
-				config_key=key,
-				prompt=f"建议值：{value["default"]}"
-			)
+def build_jvm_args_config_ui() -> Choose:
+	jvm_args_config_ui_list: list[Page] = [
+		InfoList(
+			description="确定生成JVM参数吗？",
+			enable_exit_prompt=True,
+			complete_call_function=replace_jvm_args_config_auto
+		),
+		InfoList(
+			description="根据主机与容器限制生成JVM参数，同时将初始/最大堆内存设为推荐值。",
+			call_function=explain_jvm_args_config_host,
+			enable_exit_prompt=True,
+			complete_call_function=replace_jvm_args_config_host
 		)
-	else:
-		prompt: list[str] = list()
-		if "prompt" in value:
-			prompt.append(value["prompt"])
-		if "default" in value:
-			prompt.append(f"建议值：{value["default"]}")
-		jvm_args_config_ui_list.append(
-			InputSet(
-				description=value["desc"],
-				data_type=value["type"],
-				config=server_config["jvm_args"],
-				config_key=key,
-				prompt="\n".join(prompt)
+	]
+
+	for key, value in jvm_args_info.items():
+		if key == "XX_G1HeapRegionSize":
+			jvm_args_config_ui_list.append(
+				Choose(
+					description=value["desc"],
+					text=value["data"],
+					data=value["data"],
+					config=server_config["jvm_args"],
+					config_key=key,
+					prompt=f"建议值：{value["default"]}"
+				)
 			)
-		)
-key_max_length: int = max([len(key) for key in jvm_args_info.keys()])
+		else:
+			prompt: list[str] = list()
+			if "prompt" in value:
+				prompt.append(value["prompt"])
+			if "default" in value:
+				prompt.append(f"建议值：{value["default"]}")
+			jvm_args_config_ui_list.append(
+				InputSet(
+					description=value["desc"],
+					data_type=value["type"],
+					config=server_config["jvm_args"],
+					config_key=key,
+					prompt="\n".join(prompt)
+				)
+			)
+	key_max_length: int = max([len(key) for key in jvm_args_info.keys()])
 
-# ----------------------------------------------------------------
+	jvm_args_config_ui_text_list: list[str] = [
+		"自动生成适宜的JVM参数",
+		"按主机与容器限制生成JVM参数",
+		*[f"{key} {"." * (key_max_length - len(key) + 6)} {value["desc"]}" for key, value in jvm_args_info.items()]
+	]
 
-jvm_args_config_ui_text_list: list[str] = [
-	"自动生成适宜的JVM参数",
-	*[f"{key} {"." * (key_max_length - len(key) + 6)} {value["desc"]}" for key, value in jvm_args_info.items()]
-]
+	return Choose(
+		description="请选择将要修改的参数。",
+		text=jvm_args_config_ui_text_list,
+		data=jvm_args_config_ui_list
+	)
 
 # ----------------------------------------------------------------
 
-jvm_args_config_ui: Choose = Choose(
-	description="请选择将要修改的参数。",
-	text=jvm_args_config_ui_text_list,
-	data=jvm_args_config_ui_list
-)
+def build_config_ui() -> Choose:
+	return Choose(
+		text=[
+			"设置初始堆内存大小", "设置最大堆内存大小", "设置核心文件名称", "设置模组加载器",
+			"设置游戏版本", "配置JDK绝对路径", "配置重启等待时间", "设置监管模式",
+			"设置输出积压策略", "配置高级JVM参数"
+		],
+		data=[
+			InputSet(
+				description="配置初始堆内存大小（GB）", config=server_config,
+				config_key="min_memory", data_type="int"
+			),
+			InputSet(
+				description="配置最大堆内存大小（GB）", config=server_config,
+				config_key="max_memory", data_type="int"
+			),
+			InputSet(
+				description="配置核心文件名称", prompt="请注意输入文件拓展名：.jar",
+				config=server_config, config_key="jar_name",
+				data_type="str"
+			),
+			Choose(
+				description="配置模组加载器", text=loaders, data=loaders,
+				config=server_config, config_key="loader", end_line=False,
+				value_mapping=dict(enumerate(loaders))
+			),
+			InputSet(
+				description="配置游戏版本", config=server_config,
+				config_key="version", data_type="str"
+			),
+			InputSet(
+				description="配置JDK绝对路径",
+				prompt="请注意输入完整的绝对路径。\n示例：C:/Program Files/Zulu/zulu-17",
+				config=server_config, config_key="jdk_path",
+				data_type="str", default="java"
+			),
+			InputSet(
+				description="配置重启等待时间（秒）", config=server_config,
+				config_key="reboot_seconds", data_type="int"
+			),
+			Choose(
+				description="设置监管模式",
+				prompt="asyncio：单事件循环复用输出与输入\nthread：每次启动使用独立线程",
+				text=supervisors, data=supervisors,
+				config=server_config, config_key="supervisor", end_line=False,
+				value_mapping=dict(enumerate(supervisors))
+			),
+			Choose(
+				description="设置输出积压策略",
+				prompt="终端输出跟不上服务器时的处理方式\ncollapse：折叠为“已折叠N行”提示\ndrop_oldest：丢弃最旧的行\nblock：阻塞读取（会拖慢服务器）",
+				text=overflow_policies, data=overflow_policies,
+				config=server_config, config_key="render_policy", end_line=False,
+				value_mapping=dict(enumerate(overflow_policies))
+			),
+			LazyPage(build_jvm_args_config_ui)
+		],
+		description="请选择将要修改的配置。",
+		exit_call_function=server_config.save
+	)
 
 # ----------------------------------------------------------------
 
-config_ui: Choose = Choose(
-	text=[
-		"设置初始堆内存大小", "设置最大堆内存大小", "设置核心文件名称", "设置模组加载器",
-		"设置游戏版本", "配置JDK绝对路径", "配置重启等待时间", "配置高级JVM参数"
-	],
-	data=[
-		InputSet(
-			description="配置初始堆内存大小（GB）", config=server_config,
-			config_key="min_memory", data_type="int"
-		),
-		InputSet(
-			description="配置最大堆内存大小（GB）", config=server_config,
-			config_key="max_memory", data_type="int"
-		),
-		InputSet(
-			description="配置核心文件名称", prompt="请注意输入文件拓展名：.jar",
-			config=server_config, config_key="jar_name",
-			data_type="str"
-		),
-		Choose(
-			description="配置模组加载器", text=loaders, data=loaders,
-			config=server_config, config_key="loader", end_line=False,
-			value_mapping=dict(enumerate(loaders))
-		),
-		InputSet(
-			description="配置游戏版本", config=server_config,
-			config_key="version", data_type="str"
-		),
-		InputSet(
-			description="配置JDK绝对路径",
-			prompt="请注意输入完整的绝对路径。\n示例：C:/Program Files/Zulu/zulu-17",
-			config=server_config, config_key="jdk_path",
-			data_type="str", default="java"
-		),
-		InputSet(
-			description="配置重启等待时间（秒）", config=server_config,
-			config_key="reboot_seconds", data_type="int"
-		),
-		jvm_args_config_ui
-	],
-	description="请选择将要修改的配置。",
-	exit_call_function=server_config.save
-)
+def build_tool_ui() -> Choose:
+	from tool import clean, check_network, write_eula
+	from bench import run_benchmark
+	env_ui: InfoList = InfoList(
+		description="运行环境信息。",
+		call_function=lambda: get_env(server_config.data)
+	)
+
+	clean_ui: InputSet = InputSet(
+		description="选择清理等级",
+		prompt="[0] 日志+缓存 [1] 日志+临时数据 [2] 重置",
+		config=running_config,
+		config_key="clean_type",
+		data_type="int",
+		display_current_value=False,
+		base_color="red"
+	)
+	clean_ui.complete_call_function = lambda: clean(
+		running_config["clean_type"], clean_ui.print
+	)
+
+	net_ui: InfoList = InfoList(
+		description="网络信息",
+		call_function=lambda: check_network(),
+		base_color="magenta"
+	)
+
+	boot_ui: InfoList = InfoList(
+		description="启动耗时统计（与前10次启动比较）",
+		call_function=lambda: boot_report(),
+		base_color="cyan"
+	)
+
+	shutdown_ui: InfoList = InfoList(
+		description="关闭耗时统计（stop命令到进程退出）",
+		call_function=lambda: shutdown_report(),
+		base_color="cyan"
+	)
+
+	ping_ui: InfoList = InfoList(
+		description="服务器连通性测试（按server.properties中的地址与端口执行Server List Ping）",
+		call_function=lambda: ping_report(legacy=uses_legacy_ping(server_config["version"])),
+		base_color="magenta"
+	)
+
+	flags_ui: InfoList = InfoList(
+		description="校验JVM参数（按当前JDK的-XX:+PrintFlagsFinal参数表）",
+		call_function=lambda: jvm_flags_report(server_config.data),
+		base_color="cyan"
+	)
+
+	sampler_ui: Choose = Choose(
+		description="服务器进程资源采样（CPU、内存、线程与磁盘读写）",
+		text=["查看最近资源占用", "导出为CSV"],
+		data=[
+			InfoList(
+				description="资源占用统计（1分钟窗口来自秒级数据，其余来自降采样数据）",
+				call_function=lambda: sample_report(),
+				base_color="cyan"
+			),
+			InfoList(
+				description="导出全部采样层至runner_data/",
+				call_function=lambda: export_samples(),
+				base_color="cyan"
+			)
+		]
+	)
+
+	def run_bench():
+		InfoList(
+			description="JVM参数基准测试结果（current为当前配置，其余为预设与bench_profiles）",
+			call_function=lambda: run_benchmark(server_config, print_function=bench_ui.print),
+			base_color="cyan"
+		).do()
+
+	bench_ui: InputSet = InputSet(
+		description="JVM参数基准测试：依次用每套配置启动服务器，测量启动耗时、峰值内存、GC停顿与空载CPU",
+		prompt="请输入每套配置的启动次数。\n测试期间服务器会被反复启动并关闭，请勿在正式运行时使用。",
+		config=server_config,
+		config_key="bench_runs",
+		data_type="int",
+		complete_call_function=run_bench,
+		base_color="cyan"
+	)
+
+	eula_ui: InfoList = InfoList(
+		description="再次按下任意键，以修改eula.txt。",
+		texts=["继续前，请先阅读并同意此协议：https://aka.ms/MinecraftEULA"],
+		enable_exit_prompt=True,
+		complete_call_function=write_eula,
+	)
+
+	return Choose(
+		description="选择要执行的功能",
+		text=[
+			"检测运行环境",
+			"清理文件数据",
+			"查看网络信息",
+			"修改EULA协议",
+			"启动耗时统计",
+			"校验JVM参数",
+			"JVM参数基准测试",
+			"资源采样查询",
+			"关闭耗时统计",
+			"服务器连通性测试"
+		],
+		data=[
+			env_ui,
+			clean_ui,
+			net_ui,
+			eula_ui,
+			boot_ui,
+			flags_ui,
+			bench_ui,
+			sampler_ui,
+			shutdown_ui,
+			ping_ui
+		]
+	)
 
 # ----------------------------------------------------------------
 
-env_ui: InfoList = InfoList(
-	description="运行环境信息。",
-	call_function=lambda: get_env(server_config.data)
-)
-
-clean_ui: InputSet = InputSet(
-	description="选择清理等级",
-	prompt="[0] 日志+缓存 [1] 日志+临时数据 [2] 重置",
-	config=running_config,
-	config_key="clean_type",
-	data_type="int",
-	display_current_value=False,
-	base_color="red"
-)
-clean_ui.complete_call_function = lambda: clean(
-	running_config["clean_type"], clean_ui.print
-)
-
-net_ui: InfoList = InfoList(
-	description="网络信息",
-	call_function=lambda: check_network(),
-	base_color="magenta"
-)
+def profile_startup(measured: list[tuple[str, float]]) -> list[str]:
+	# 导入耗时在新进程中用-X importtime测量；入口处的步骤只执行一次，由入口计时后传入，页面构造在此逐项计时
+	from tool import import_profile
+	entry: str = path.abspath(argv[0])
+	if entry.endswith(".pyz"): # zipapp中入口模块为main，归档本身作为导入路径
+		module, search_path = "main", entry
+	else:
+		module, search_path = path.splitext(path.basename(entry))[0], path.dirname(entry)
+	records: list[tuple[str, float, float]] = import_profile(module, search_path)
+	result: list[str] = list()
+
+	if records:
+		name, self_ms, total_ms = records[-1]
+		result.append(f"导入{name}：共{total_ms:.1f}ms，其中模块自身{self_ms:.1f}ms，耗时最多的依赖：")
+		for name, self_ms, total_ms in sorted(records[:-1], key=lambda item: item[1], reverse=True)[:15]:
+			result.append(f"  {name}：自身{self_ms:.1f}ms，累计{total_ms:.1f}ms")
+	else:
+		result.append("无法测量导入耗时。")
 
-eula_ui: InfoList = InfoList(
-	description="再次按下任意键，以修改eula.txt。",
-	texts=["继续前，请先阅读并同意此协议：https://aka.ms/MinecraftEULA"],
-	enable_exit_prompt=True,
-	complete_call_function=write_eula,
-)
+	result.append("入口处执行的步骤：")
+	for text, seconds in measured:
+		result.append(f"  {text}：{seconds * 1000:.2f}ms")
 
-# ----------------------------------------------------------------
-
-tool_ui: Choose = Choose(
-	description="选择要执行的功能",
-	text=[
-		"检测运行环境",
-		"清理文件数据",
-		"查看网络信息",
-		"修改EULA协议"
-	],
-	data=[
-		env_ui,
-		clean_ui,
-		net_ui,
-		eula_ui
+	steps: list[tuple[str, Callable]] = [
+		("构造配置菜单", build_config_ui),
+		("构造JVM参数菜单", build_jvm_args_config_ui),
+		("构造工具箱", build_tool_ui),
 	]
-)
+	result.append("按需执行的步骤：")
+	for text, function in steps:
+		started: float = perf_counter()
+		function()
+		result.append(f"  {text}：{(perf_counter() - started) * 1000:.2f}ms")
+	return result
 
 # ----------------------------------------------------------------
 
 if __name__ == "__main__":
 
+	started: float = perf_counter()
+	setup_console()
+	startup_steps: list[tuple[str, float]] = [("设置控制台", perf_counter() - started)]
+	started: float = perf_counter()
+	server_config = load_server_config()
+	startup_steps.append(("加载config.json", perf_counter() - started))
+	if "--profile-startup" in argv:
+		for text in profile_startup(startup_steps):
+			print(text)
+		raise SystemExit(0)
+
 	title(f"Minecraft Server Runner")
 	InfoList(
 		description=f"Minecraft Server Runner | Author: Inf",
@@ -225,14 +426,18 @@ if __name__ == "__main__":
 		text=[
 			"启动服务器",
 			"启动服务器（自动重启）",
+			"启动服务器（守护模式）",
+			"连接后台控制台",
 			"修改启动配置",
 			"工具箱"
 		],
 		data=[
 			run_server_ui,
 			multi_run_server_ui,
-			config_ui,
-			tool_ui
+			daemon_ui,
+			attach_ui,
+			LazyPage(build_config_ui),
+			LazyPage(build_tool_ui)
 		],
 		description="请选择将要使用的功能。",
 		base_color="blue"
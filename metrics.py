@@ -0,0 +1,115 @@
+from pipe import RawLine
+
+from typing import Literal, Callable
+from threading import Thread
+
+type MetricKind = Literal["counter", "gauge"]
+type MetricValue = float | dict[str, float] | None # 字典为 标签值 -> 数值
+
+metrics_content_type: str = "text/plain; version=0.0.4; charset=utf-8"
+
+# ----------------------------------------------------------------
+
+def format_value(value: float) -> str:
+    # 整数计数器原样输出，避免大数被科学计数法截断精度
+    return str(int(value)) if isinstance(value, (bool, int)) else repr(float(value))
+
+class Metric:
+    __slots__ = ("name", "kind", "description", "getter", "label")
+
+    def __init__(self, name: str, kind: MetricKind, description: str, getter: Callable[[], MetricValue], label: str = None):
+        self.name: str = name
+        self.kind: MetricKind = kind
+        self.description: str = description
+        self.getter: Callable[[], MetricValue] = getter
+        self.label: str = label
+
+class MetricsRegistry:
+    def __init__(self, prefix: str = "mcsr"):
+        self.prefix: str = prefix
+        self.metrics: list[Metric] = list()
+
+    def counter(self, name: str, description: str, getter: Callable[[], MetricValue], label: str = None):
+        self.metrics.append(Metric(f"{self.prefix}_{name}", "counter", description, getter, label))
+
+    def gauge(self, name: str, description: str, getter: Callable[[], MetricValue], label: str = None):
+        self.metrics.append(Metric(f"{self.prefix}_{name}", "gauge", description, getter, label))
+
+    def render(self) -> bytes:
+        # 仅在抓取时读取各取值函数并序列化，热路径只做计数
+        lines: list[str] = list()
+        for metric in self.metrics:
+            try:
+                value: MetricValue = metric.getter()
+            except Exception: # 单项取值失败不影响整体输出
+                continue
+            if value is None:
+                continue
+
+            lines.append(f"# HELP {metric.name} {metric.description}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            if isinstance(value, dict):
+                for key, item in value.items():
+                    lines.append(f"{metric.name}{{{metric.label}=\"{key}\"}} {format_value(item)}")
+            else:
+                lines.append(f"{metric.name} {format_value(value)}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+# ----------------------------------------------------------------
+
+class LineCounter:
+    # 只导出累计值，速率交给PromQL的rate()计算；在抓取时计算会使多个抓取方互相干扰
+    __slots__ = ("lines", "bytes")
+
+    def __init__(self):
+        # 标准输出与标准错误各自只有一个读线程写入，按下标分开计数即可免锁
+        self.lines: list[int] = [0, 0]
+        self.bytes: list[int] = [0, 0]
+
+    def count(self, line: RawLine, is_error: bool):
+        self.lines[is_error] += 1
+        self.bytes[is_error] += len(line) + 1
+
+# ----------------------------------------------------------------
+
+class MetricsServer:
+    def __init__(self, registry: MetricsRegistry, port: int, host: str = "127.0.0.1"):
+        self.registry: MetricsRegistry = registry
+        self.host: str = host
+        self.port: int = port
+        self.server: ThreadingHTTPServer = None
+        self.thread: Thread = None
+
+    def start(self):
+        # http.server导入较慢，只在启用指标端口时才加载
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+        registry: MetricsRegistry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/metrics", "/"):
+                    self.send_error(404)
+                    return
+                body: bytes = registry.render()
+                self.send_response(200)
+                self.send_header("Content-Type", metrics_content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args):
+                pass # 不把抓取记录混进服务器控制台
+
+        self.server: ThreadingHTTPServer = ThreadingHTTPServer((self.host, self.port), Handler)
+        self.server.daemon_threads = True
+        self.thread: Thread = Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join(timeout=5)
+        self.server: ThreadingHTTPServer = None
+        self.thread: Thread = None
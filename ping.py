@@ -0,0 +1,266 @@
+from rcon import read_properties
+
+from struct import pack, unpack_from
+from socket import socket, create_connection
+from json import loads, JSONDecodeError
+from time import monotonic, perf_counter
+from typing import Callable
+from threading import Thread, Event
+
+# 状态查询不关心协议号，-1表示未知版本
+ping_protocol: int = -1
+
+# ----------------------------------------------------------------
+
+class PingError(Exception):
+    pass
+
+class PingResult:
+    __slots__ = ("connect_ms", "response_ms", "ping_ms", "version", "protocol", "online", "max_players", "motd", "legacy")
+
+    def __init__(self, connect_ms: float, response_ms: float, legacy: bool = False):
+        self.connect_ms: float = connect_ms
+        self.response_ms: float = response_ms
+        self.ping_ms: float = None # 旧版协议没有ping/pong
+        self.version: str = None
+        self.protocol: int = None
+        self.online: int = None
+        self.max_players: int = None
+        self.motd: str = ""
+        self.legacy: bool = legacy
+
+def ping_address(file_path: str = "server.properties") -> tuple[str, int]:
+    properties: dict[str, str] = read_properties(file_path)
+    port: str = properties.get("server-port", "25565")
+    return properties.get("server-ip") or "127.0.0.1", int(port) if port.isdigit() else 25565
+
+def pack_varint(value: int) -> bytes:
+    value &= 0xFFFFFFFF
+    result: bytearray = bytearray()
+    while True:
+        byte: int = value & 0x7F
+        value >>= 7
+        if not value:
+            result.append(byte)
+            return bytes(result)
+        result.append(byte | 0x80)
+
+def pack_string(text: str) -> bytes:
+    data: bytes = text.encode("utf-8")
+    return pack_varint(len(data)) + data
+
+def frame_packet(packet_id: int, body: bytes = b"") -> bytes:
+    data: bytes = pack_varint(packet_id) + body
+    return pack_varint(len(data)) + data
+
+def receive_exact(connection: socket, size: int) -> bytes:
+    data: bytearray = bytearray()
+    while len(data) < size:
+        chunk: bytes = connection.recv(size - len(data))
+        if not chunk:
+            raise PingError("连接被服务器关闭")
+        data.extend(chunk)
+    return bytes(data)
+
+def receive_varint(connection: socket) -> int:
+    result: int = 0
+    for shift in range(0, 35, 7):
+        byte: int = receive_exact(connection, 1)[0]
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result
+    raise PingError("VarInt过长")
+
+def unpack_varint(data: bytes, offset: int = 0) -> tuple[int, int]:
+    # 返回 (数值, 新偏移)
+    result: int = 0
+    for shift in range(0, 35, 7):
+        if offset >= len(data):
+            break
+        byte: int = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            return result, offset
+    raise PingError("无效的VarInt")
+
+def receive_packet(connection: socket) -> tuple[int, bytes]:
+    length: int = receive_varint(connection)
+    if length <= 0 or length > 1 << 21:
+        raise PingError(f"无效的数据包长度：{length}")
+    data: bytes = receive_exact(connection, length)
+    packet_id, offset = unpack_varint(data)
+    return packet_id, data[offset:]
+
+def flatten_text(component: str | dict | list) -> str:
+    # 聊天组件转纯文本，MOTD可能是字符串、组件或组件列表
+    if isinstance(component, str):
+        return component
+    if isinstance(component, list):
+        return "".join(flatten_text(item) for item in component)
+    if isinstance(component, dict):
+        return flatten_text(component.get("text", "")) + flatten_text(component.get("extra", list()))
+    return ""
+
+# ----------------------------------------------------------------
+
+def ping_server(host: str, port: int, timeout: float = 5) -> PingResult:
+    # 1.7+ 的Server List Ping：握手 -> 状态请求 -> ping/pong
+    started: float = perf_counter()
+    with create_connection((host, port), timeout=timeout) as connection:
+        connect_ms: float = (perf_counter() - started) * 1000
+
+        sent: float = perf_counter()
+        connection.sendall(
+            frame_packet(0x00, pack_varint(ping_protocol) + pack_string(host) + pack(">H", port) + pack_varint(1))
+            + frame_packet(0x00)
+        )
+        packet_id, data = receive_packet(connection)
+        result: PingResult = PingResult(connect_ms, (perf_counter() - sent) * 1000)
+        if packet_id != 0x00:
+            raise PingError(f"意外的响应包：0x{packet_id:02x}")
+
+        length, offset = unpack_varint(data)
+        try:
+            status: dict = loads(data[offset:offset + length].decode("utf-8"))
+        except (UnicodeDecodeError, JSONDecodeError) as err:
+            raise PingError(f"无效的状态JSON：{err}")
+
+        version: dict = status.get("version") or dict()
+        players: dict = status.get("players") or dict()
+        result.version = version.get("name")
+        result.protocol = version.get("protocol")
+        result.online = players.get("online")
+        result.max_players = players.get("max")
+        result.motd = flatten_text(status.get("description", ""))
+
+        token: int = int(started * 1000) & 0x7FFFFFFFFFFFFFFF
+        sent: float = perf_counter()
+        connection.sendall(frame_packet(0x01, pack(">q", token)))
+        try:
+            packet_id, data = receive_packet(connection)
+            if packet_id == 0x01 and data[:8] == pack(">q", token):
+                result.ping_ms = (perf_counter() - sent) * 1000
+        except (OSError, PingError): # 部分代理不响应ping，状态已取得即可
+            pass
+        return result
+
+def legacy_ping(host: str, port: int, timeout: float = 5) -> PingResult:
+    # 1.4~1.6 的旧版ping（0xFE 0x01），新版服务器同样兼容；1.3及更早只返回“MOTD§在线§上限”
+    started: float = perf_counter()
+    with create_connection((host, port), timeout=timeout) as connection:
+        connect_ms: float = (perf_counter() - started) * 1000
+        sent: float = perf_counter()
+        connection.sendall(b"\xfe\x01")
+
+        header: bytes = receive_exact(connection, 3)
+        if header[0] != 0xFF:
+            raise PingError(f"意外的旧版响应：0x{header[0]:02x}")
+        text: str = receive_exact(connection, unpack_from(">H", header, 1)[0] * 2).decode("utf-16-be", errors="replace")
+        result: PingResult = PingResult(connect_ms, (perf_counter() - sent) * 1000, legacy=True)
+
+    if text.startswith("§1\x00"):
+        fields: list[str] = text.split("\x00")
+        if len(fields) >= 6:
+            result.protocol = int(fields[1]) if fields[1].isdigit() else None
+            result.version = fields[2]
+            result.motd = fields[3]
+            result.online = int(fields[4]) if fields[4].isdigit() else None
+            result.max_players = int(fields[5]) if fields[5].isdigit() else None
+        return result
+
+    fields: list[str] = text.rsplit("§", 2)
+    if len(fields) == 3:
+        result.motd = fields[0]
+        result.online = int(fields[1]) if fields[1].isdigit() else None
+        result.max_players = int(fields[2]) if fields[2].isdigit() else None
+    return result
+
+def probe_server(host: str, port: int, timeout: float = 5, legacy: bool = False) -> PingResult:
+    # 只有已知为1.7之前的服务器才使用旧版ping；新版服务器加载世界时握手失败不代表协议不同
+    if legacy:
+        return legacy_ping(host, port, timeout)
+    return ping_server(host, port, timeout)
+
+# ----------------------------------------------------------------
+
+class PingMonitor:
+    def __init__(self, interval: float, timeout: float = 5, boot_interval: float = 1, legacy: bool = False):
+        self.interval: float = interval
+        self.timeout: float = timeout
+        self.boot_interval: float = boot_interval
+        self.legacy: bool = legacy
+
+        self.address: tuple[str, int] = None
+        self.last: PingResult = None
+        self.up: bool = False
+        self.joinable: bool = False
+        self.failures: int = 0
+        self.streak: int = 0 # 可加入后连续失败的次数
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+
+    def start(self, on_joinable: Callable[[PingResult, float], None], file_path: str = "server.properties"):
+        self.stop()
+        # 每次启动重新读取端口，server.properties可能在两次启动之间被修改
+        self.address: tuple[str, int] = ping_address(file_path)
+        self.last: PingResult = None
+        self.up: bool = False
+        self.joinable: bool = False
+        self.streak: int = 0
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=lambda: self.probe_loop(on_joinable), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=self.timeout + 5)
+        self.thread: Thread = None
+        self.up: bool = False
+
+    # ----------------------------------------------------------------
+
+    def probe(self) -> PingResult | None:
+        try:
+            result: PingResult = probe_server(*self.address, timeout=self.timeout, legacy=self.legacy)
+        except (OSError, PingError):
+            if self.joinable: # 启动阶段端口尚未监听，不计入失败
+                self.failures += 1
+                self.streak += 1
+            self.up: bool = False
+            return
+        self.last: PingResult = result
+        self.streak: int = 0
+        self.up: bool = True
+        return result
+
+    def probe_loop(self, on_joinable: Callable[[PingResult, float], None]):
+        # 启动阶段高频探测以尽早判定可加入，之后按interval周期探测
+        started: float = monotonic()
+        while not self.stopped.wait(self.interval if self.joinable else self.boot_interval):
+            result: PingResult | None = self.probe()
+            if result is not None and not self.joinable:
+                self.joinable: bool = True
+                on_joinable(result, monotonic() - started)
+
+# ----------------------------------------------------------------
+
+def ping_report(file_path: str = "server.properties", legacy: bool = False) -> list[str]:
+    host, port = ping_address(file_path)
+    try:
+        result: PingResult = probe_server(host, port, legacy=legacy)
+    except (OSError, PingError) as err:
+        return [f"{host}:{port} 无响应：{err}"]
+
+    text: list[str] = [
+        f"{host}:{port} 响应正常（{"旧版协议" if result.legacy else "Server List Ping"}）",
+        f"连接耗时：{result.connect_ms:.1f}ms，状态响应：{result.response_ms:.1f}ms"
+        + (f"，ping：{result.ping_ms:.1f}ms" if result.ping_ms is not None else ""),
+        f"版本：{result.version}（协议{result.protocol}）",
+        f"在线玩家：{result.online}/{result.max_players}",
+    ]
+    if result.motd:
+        text.append(f"MOTD：{result.motd}")
+    return text
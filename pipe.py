@@ -0,0 +1,63 @@
+from os import read
+from typing import Callable
+
+type RawLine = bytes | memoryview
+type RawLineConsumer = Callable[[RawLine, bool], None]
+
+chunk_size: int = 1 << 16
+
+# ----------------------------------------------------------------
+
+def decode_line(line: RawLine, encoding: str = "utf-8") -> str:
+    return str(line, encoding, "replace")
+
+class LineSplitter:
+    def __init__(self):
+        self.tail: bytes = b""
+
+    def feed(self, chunk: bytes) -> list[memoryview]:
+        # 按字节切分：UTF-8与GBK的多字节序列中都不会出现0x0A，无需先解码
+        if self.tail:
+            chunk: bytes = self.tail + chunk
+            self.tail: bytes = b""
+
+        view: memoryview = memoryview(chunk)
+        lines: list[memoryview] = list()
+        start: int = 0
+        find: Callable = chunk.find
+
+        while True:
+            end: int = find(b"\n", start)
+            if end < 0:
+                break
+            stop: int = end - 1 if end > start and chunk[end - 1] == 13 else end # 去除\r
+            lines.append(view[start:stop])
+            start: int = end + 1
+
+        if start < len(chunk):
+            self.tail: bytes = chunk[start:]
+        return lines
+
+    def flush(self) -> list[bytes]:
+        if not self.tail:
+            return list()
+        tail: bytes = self.tail.rstrip(b"\r")
+        self.tail: bytes = b""
+        return [tail]
+
+def pump_fd(fd: int, consumer: RawLineConsumer, is_error: bool, size: int = chunk_size):
+    splitter: LineSplitter = LineSplitter()
+    while True:
+        try:
+            chunk: bytes = read(fd, size)
+        except OSError:
+            break
+
+        if not chunk: # EOF
+            break
+
+        for line in splitter.feed(chunk):
+            consumer(line, is_error)
+
+    for line in splitter.flush():
+        consumer(line, is_error)
@@ -0,0 +1,182 @@
+from logparse import EventBus, LogEvent
+from hooks import HookRegistry
+
+from time import time, monotonic
+from re import compile as compile_regex, Pattern, Match
+from typing import Callable
+from threading import Thread, Event, Lock
+from collections import deque
+
+# 名称 -> (预筛选字面量, 正则)；原版、Fabric与Forge共用同一套玩家消息，旧版Forge另有登录行
+player_hooks: dict[str, list[tuple[str, str]]] = {
+    "join": [
+        (" joined the game", r"^(?P<player>[\w.]+)(?: \(formerly known as [\w.]+\))? joined the game"),
+        ("] logged in with entity id", r"^(?P<player>[\w.]+)\[[^\]]*\] logged in with entity id"),
+    ],
+    "leave": [
+        (" left the game", r"^(?P<player>[\w.]+) left the game"),
+        (" lost connection: ", r"^(?P<player>[\w.]+) lost connection: "),
+    ],
+    # 1.13+："There are 1 of a max of 20 players online: Steve"；1.12及更早："There are 1/20 players online:"，名单在下一行
+    "list": [
+        ("There are ", r"^There are (?P<count>\d+)(?: of a max(?: of)? | out of maximum |/)(?P<max>\d+) players online[.:]?\s*(?P<names>.*)$"),
+    ],
+}
+
+list_pattern: Pattern = compile_regex(player_hooks["list"][0][1])
+
+# 旧格式的名单行须在该时长（秒）内由同一线程输出到标准输出，否则放弃本次校正
+list_names_window: float = 1
+
+# ----------------------------------------------------------------
+
+class PlayerTracker:
+    def __init__(self, bus: EventBus, hooks: HookRegistry, keep: int = 1000):
+        self.bus: EventBus = bus
+        self.lock: Lock = Lock()
+        self.online: dict[str, float] = dict() # 名称 -> 加入时刻（monotonic）
+        self.sessions: deque[tuple[str, float, float]] = deque(maxlen=keep) # (名称, 加入时间戳, 时长秒)
+        self.capacity: int = None
+        self.pending_count: int = 0
+        self.pending_thread: str = ""
+        self.pending_until: float = 0
+
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+
+        for kind, patterns in player_hooks.items():
+            handler: Callable = getattr(self, f"on_{kind}")
+            for literal, pattern in patterns:
+                hooks.register(f"player_{kind}", handler, pattern=pattern, literal=literal)
+
+    def count(self) -> int:
+        return len(self.online)
+
+    def is_empty(self) -> bool:
+        return not self.online
+
+    def names(self) -> list[str]:
+        with self.lock:
+            return sorted(self.online)
+
+    def session_seconds(self, name: str) -> float | None:
+        joined: float | None = self.online.get(name)
+        return monotonic() - joined if joined is not None else None
+
+    # ----------------------------------------------------------------
+
+    def join(self, name: str):
+        with self.lock:
+            if not name in self.online:
+                self.online[name] = monotonic()
+
+    def leave(self, name: str):
+        # 原版断线会先后输出lost connection与left the game，只结算一次
+        with self.lock:
+            joined: float | None = self.online.pop(name, None)
+            if joined is not None:
+                seconds: float = monotonic() - joined
+                self.sessions.append((name, time() - seconds, seconds))
+
+    def on_join(self, event: LogEvent, result: Match):
+        self.join(result["player"])
+
+    def on_leave(self, event: LogEvent, result: Match):
+        self.leave(result["player"])
+
+    def on_list(self, event: LogEvent, result: Match):
+        self.capacity: int = int(result["max"])
+        count: int = int(result["count"])
+        names: str = result["names"].strip()
+        if count and not names: # 旧格式，名单在下一行
+            self.pending_count: int = count
+            self.pending_thread: str = event.thread
+            self.pending_until: float = monotonic() + list_names_window
+            self.bus.subscribe(self.on_list_names)
+            return
+        self.resync(names)
+
+    def on_list_names(self, event: LogEvent):
+        # 标准错误与其他线程的输出会与名单行交错，只接受紧随其后的同线程标准输出
+        if monotonic() > self.pending_until:
+            self.bus.unsubscribe(self.on_list_names)
+            self.pending_count: int = 0
+            return
+        if event.is_error or event.thread != self.pending_thread:
+            return
+        self.bus.unsubscribe(self.on_list_names)
+        if self.pending_count:
+            self.pending_count: int = 0
+            self.resync(event.message)
+
+    def apply_list(self, text: str) -> bool:
+        # RCON的list响应不经过控制台，按同一格式直接解析；旧格式的名单在第二行
+        first, _, rest = text.strip().partition("\n")
+        result: Match | None = list_pattern.match(first)
+        if result is None:
+            return False
+        self.capacity: int = int(result["max"])
+        self.resync(result["names"].strip() or rest)
+        return True
+
+    def resync(self, names: str):
+        current: set[str] = {name.strip() for name in names.split(",") if name.strip()}
+        with self.lock:
+            missing: list[str] = [name for name in self.online if not name in current]
+        for name in missing:
+            self.leave(name)
+        for name in current:
+            self.join(name)
+
+    def reset(self):
+        # 服务器进程退出，在线会话全部结算
+        for name in list(self.online):
+            self.leave(name)
+        self.pending_count: int = 0
+        self.bus.unsubscribe(self.on_list_names)
+
+    # ----------------------------------------------------------------
+
+    def start(
+        self,
+        command: Callable[[str], None],
+        ready: Callable[[], bool],
+        interval: float,
+        query: Callable[[str], str | None] = None
+    ):
+        self.stop()
+        if interval <= 0:
+            return
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=lambda: self.resync_loop(command, ready, interval, query), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        self.thread: Thread = None
+
+    def resync_loop(
+        self,
+        command: Callable[[str], None],
+        ready: Callable[[], bool],
+        interval: float,
+        query: Callable[[str], str | None] = None
+    ):
+        # 周期性发送list，校正漏掉或被模组改写的加入/离开消息；可用RCON时不在控制台留下输出
+        while not self.stopped.wait(interval):
+            if not ready():
+                continue
+            response: str | None = query("list") if query else None
+            if response is None or not self.apply_list(response):
+                command("list\n")
+
+    def report(self) -> list[str]:
+        result: list[str] = [f"在线玩家：{self.count()}" + (f"/{self.capacity}" if self.capacity else "")]
+        for name in self.names():
+            seconds: float | None = self.session_seconds(name)
+            if seconds is not None:
+                result.append(f"  {name}：已在线{seconds / 60:.0f}分钟")
+        return result
@@ -0,0 +1,132 @@
+from sampler import read_proc_stat
+from gclog import GCAnalyzer
+
+from time import monotonic
+from typing import Callable
+from threading import Thread, Event
+
+# 倒计时中广播提醒的剩余秒数
+warning_marks: frozenset[int] = frozenset({600, 300, 120, 60, 30, 10, 5, 4, 3, 2, 1})
+
+# ----------------------------------------------------------------
+
+class PressureMonitor:
+    def __init__(
+        self,
+        max_heap_mb: int,
+        heap_percent: float,
+        gc_percent: float,
+        rss_limit: int,
+        warn_seconds: int,
+        min_uptime: float,
+        players: Callable[[], int],
+        ready: Callable[[], bool],
+        command: Callable[[str], None],
+        notify: Callable[[str], None],
+        interval: float = 30,
+        sustain: int = 3
+    ):
+        self.max_heap_mb: int = max_heap_mb
+        self.heap_percent: float = heap_percent
+        self.gc_percent: float = gc_percent
+        self.rss_limit: int = rss_limit
+        self.warn_seconds: int = warn_seconds
+        self.min_uptime: float = min_uptime # 刚启动的服务器不参与判断，避免阈值过低时陷入重启循环
+        self.players: Callable[[], int] = players
+        self.ready: Callable[[], bool] = ready
+        self.command: Callable[[str], None] = command
+        self.notify: Callable[[str], None] = notify
+        self.interval: float = interval
+        self.sustain: int = sustain
+
+        self.pid: int = None
+        self.gc_analyzer: GCAnalyzer = None
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+        self.started: float = None
+        self.strikes: int = 0
+        self.window: tuple[float, float] = None # (GC日志uptime, 累计停顿ms)
+        self.triggered: str = None
+
+    def start(self, pid: int, gc_analyzer: GCAnalyzer = None):
+        self.stop()
+        self.pid: int = pid
+        self.gc_analyzer: GCAnalyzer = gc_analyzer
+        self.started: float = monotonic()
+        self.strikes: int = 0
+        self.window: tuple[float, float] = None
+        self.triggered: str = None
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=self.watch_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        self.thread: Thread = None
+
+    # ----------------------------------------------------------------
+
+    def check(self) -> str | None:
+        # 返回超出的阈值说明；None表示未超出
+        reasons: list[str] = list()
+
+        if self.rss_limit:
+            stat: dict[str, int] | None = read_proc_stat(self.pid)
+            if stat and stat.get("VmRSS", 0) >= self.rss_limit:
+                reasons.append(f"RSS {stat["VmRSS"] / (1 << 30):.1f}GB ≥ {self.rss_limit / (1 << 30):.1f}GB")
+
+        analyzer: GCAnalyzer = self.gc_analyzer
+        if analyzer is not None:
+            if self.heap_percent and analyzer.last_after is not None and self.max_heap_mb:
+                used: float = analyzer.last_after / self.max_heap_mb * 100
+                if used >= self.heap_percent:
+                    reasons.append(f"GC后堆占用{used:.0f}% ≥ {self.heap_percent:g}%")
+
+            # 以两次检查之间的GC日志时间为窗口计算GC耗时占比
+            current: tuple[float, float] = (analyzer.uptime, analyzer.pause_total)
+            previous: tuple[float, float] | None = self.window
+            self.window: tuple[float, float] = current
+            if self.gc_percent and previous and current[0] > previous[0]:
+                share: float = (current[1] - previous[1]) / 1000 / (current[0] - previous[0]) * 100
+                if share >= self.gc_percent:
+                    reasons.append(f"GC耗时占比{share:.1f}% ≥ {self.gc_percent:g}%")
+
+        return "，".join(reasons) or None
+
+    def watch_loop(self):
+        while not self.stopped.wait(self.interval):
+            if not self.ready() or monotonic() - self.started < self.min_uptime:
+                self.window: tuple[float, float] = None
+                continue
+
+            reason: str | None = self.check()
+            self.strikes: int = self.strikes + 1 if reason else 0
+            if self.strikes >= self.sustain: # 连续多次超出才触发，忽略短暂尖峰
+                self.triggered: str = reason
+                self.restart_loop(reason)
+                return
+
+    def restart_loop(self, reason: str):
+        self.notify(f"内存压力过高（{reason}），将在无玩家在线时或{self.warn_seconds}秒后重启。")
+        deadline: float = monotonic() + self.warn_seconds
+        announced: set[int] = set()
+
+        while not self.stopped.is_set():
+            if self.players() <= 0:
+                self.notify("当前无玩家在线，立即重启。")
+                break
+
+            remaining: int = int(deadline - monotonic() + 0.999)
+            if remaining <= 0:
+                break
+            if remaining in warning_marks and not remaining in announced:
+                announced.add(remaining)
+                self.command(f"say 服务器将在{remaining}秒后重启以释放内存\n")
+            self.stopped.wait(0.5)
+        else:
+            return
+
+        self.command("reboot\n")
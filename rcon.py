@@ -0,0 +1,226 @@
+from os import path
+from struct import pack, unpack_from
+from socket import socket, create_connection, SHUT_RDWR
+from time import monotonic
+from itertools import count
+from threading import Lock, Condition
+
+# 数据包类型
+rcon_login: int = 3
+rcon_command: int = 2
+rcon_response: int = 0
+
+# 服务端拒绝超过1446字节的命令
+rcon_max_payload: int = 1446
+
+# ----------------------------------------------------------------
+
+class RconError(Exception):
+    pass
+
+def read_properties(file_path: str = "server.properties") -> dict[str, str]:
+    result: dict[str, str] = dict()
+    if not path.exists(file_path):
+        return result
+
+    with open(file_path, mode="r", encoding="utf-8", errors="replace") as file:
+        for text in file:
+            text: str = text.strip()
+            if not text or text.startswith(("#", "!")):
+                continue
+            key, _, value = text.partition("=")
+            result[key.strip()] = value.strip().replace("\\:", ":").replace("\\=", "=")
+    return result
+
+def rcon_settings(file_path: str = "server.properties") -> tuple[str, int, str] | None:
+    # (主机, 端口, 密码)；未开启RCON或没有密码时为None
+    properties: dict[str, str] = read_properties(file_path)
+    if properties.get("enable-rcon") != "true" or not properties.get("rcon.password"):
+        return
+    port: str = properties.get("rcon.port", "25575")
+    return "127.0.0.1", int(port) if port.isdigit() else 25575, properties["rcon.password"]
+
+def encode_packet(request_id: int, packet_type: int, payload: str) -> bytes:
+    body: bytes = payload.encode("utf-8")
+    return pack("<iii", len(body) + 10, request_id, packet_type) + body + b"\x00\x00"
+
+def read_exact(connection: socket, size: int) -> bytes:
+    data: bytearray = bytearray()
+    while len(data) < size:
+        chunk: bytes = connection.recv(size - len(data))
+        if not chunk:
+            raise RconError("连接已关闭")
+        data.extend(chunk)
+    return bytes(data)
+
+def read_packet(connection: socket) -> tuple[int, int, str]:
+    length: int = unpack_from("<i", read_exact(connection, 4))[0]
+    if length < 10 or length > 1 << 20:
+        raise RconError(f"无效的数据包长度：{length}")
+    data: bytes = read_exact(connection, length)
+    request_id, packet_type = unpack_from("<ii", data)
+    return request_id, packet_type, data[8:-2].decode("utf-8", errors="replace")
+
+# ----------------------------------------------------------------
+
+class RconConnection:
+    def __init__(self, host: str, port: int, password: str, timeout: float = 10):
+        self.host: str = host
+        self.port: int = port
+        self.password: str = password
+        self.timeout: float = timeout
+
+        self.socket: socket = None
+        # 原版服务端每个包只recv一次，多个包落在同一段里会被判为长度错误并断开，因此同一连接同时只有一个请求
+        self.lock: Lock = Lock()
+        self.ids: count = count(1)
+        self.closed: bool = True
+
+    def connect(self):
+        connection: socket = create_connection((self.host, self.port), timeout=self.timeout)
+        request_id: int = self.next_id()
+        connection.sendall(encode_packet(request_id, rcon_login, self.password))
+        try:
+            reply_id, _, _ = read_packet(connection)
+            while reply_id != request_id and reply_id != -1: # 部分实现会先回一个空的响应包
+                reply_id, _, _ = read_packet(connection)
+        except (OSError, RconError):
+            connection.close()
+            raise
+        if reply_id == -1:
+            connection.close()
+            raise RconError("RCON密码错误")
+
+        self.socket: socket = connection
+        self.closed: bool = False
+
+    def next_id(self) -> int:
+        return next(self.ids) % 0x7FFFFFFF or next(self.ids)
+
+    def command(self, command: str, timeout: float = None) -> str:
+        if len(command.encode("utf-8")) > rcon_max_payload:
+            raise RconError(f"命令过长（超过{rcon_max_payload}字节）")
+
+        with self.lock:
+            if self.closed:
+                raise RconError("连接已关闭")
+            try:
+                self.socket.settimeout(timeout if timeout is not None else self.timeout)
+                return self.exchange(command)
+            except TimeoutError:
+                # 流中可能还留有迟到的响应，无法再与下一个请求对应，关闭连接由连接池替换
+                self.close()
+                raise RconError(f"等待响应超时：{command}")
+            except (OSError, RconError) as err:
+                self.close()
+                raise err if isinstance(err, RconError) else RconError(str(err))
+
+    def exchange(self, command: str) -> str:
+        request_id: int = self.next_id()
+        self.socket.sendall(encode_packet(request_id, rcon_command, command))
+        reply_id, _, payload = read_packet(self.socket)
+        if reply_id != request_id:
+            raise RconError(f"意外的响应ID：{reply_id}")
+
+        # 长响应按4096字节分片；收到首个分片后再单独发送一个未知类型的哨兵包，
+        # 服务端按顺序处理，哨兵的回复标志着分片已经结束
+        sentinel: int = self.next_id()
+        self.socket.sendall(encode_packet(sentinel, rcon_response, ""))
+        fragments: list[str] = [payload]
+        while True:
+            reply_id, _, payload = read_packet(self.socket)
+            if reply_id == sentinel:
+                return "".join(fragments)
+            if reply_id != request_id:
+                raise RconError(f"意外的响应ID：{reply_id}")
+            fragments.append(payload)
+
+    def close(self):
+        # 不取self.lock：用于打断另一个线程中正在等待响应的请求
+        self.closed: bool = True
+        connection: socket = self.socket
+        if connection is None:
+            return
+        try:
+            connection.shutdown(SHUT_RDWR)
+        except OSError:
+            pass
+        connection.close()
+
+# ----------------------------------------------------------------
+
+class RconPool:
+    def __init__(self, host: str, port: int, password: str, size: int = 2, timeout: float = 10):
+        self.host: str = host
+        self.port: int = port
+        self.password: str = password
+        self.size: int = max(1, size)
+        self.timeout: float = timeout
+        # 并发由连接池提供：每个请求独占一条连接，用完放回
+        self.connections: list[RconConnection] = list()
+        self.idle: list[RconConnection] = list()
+        self.opening: int = 0
+        self.condition: Condition = Condition()
+
+    @classmethod
+    def from_properties(cls, file_path: str = "server.properties", size: int = 2, timeout: float = 10) -> "RconPool | None":
+        settings: tuple[str, int, str] | None = rcon_settings(file_path)
+        if settings is None:
+            return
+        return cls(*settings, size=size, timeout=timeout)
+
+    def acquire(self, timeout: float = None) -> RconConnection | None:
+        # 优先复用空闲连接，不足时新建，断开的连接会被替换；全部占用时等待，超时返回None
+        deadline: float = monotonic() + (timeout if timeout is not None else self.timeout)
+        with self.condition:
+            while True:
+                self.connections: list[RconConnection] = [item for item in self.connections if not item.closed]
+                self.idle: list[RconConnection] = [item for item in self.idle if not item.closed]
+                if self.idle:
+                    return self.idle.pop()
+                if len(self.connections) + self.opening < self.size:
+                    self.opening += 1
+                    break
+                remaining: float = deadline - monotonic()
+                if remaining <= 0:
+                    return
+                self.condition.wait(remaining)
+
+        connection: RconConnection = RconConnection(self.host, self.port, self.password, self.timeout)
+        try:
+            connection.connect()
+        except OSError as err:
+            raise RconError(f"无法连接到RCON {self.host}:{self.port}：{err}")
+        finally:
+            with self.condition:
+                self.opening -= 1
+                if not connection.closed:
+                    self.connections.append(connection)
+                self.condition.notify()
+        return connection
+
+    def release(self, connection: RconConnection):
+        with self.condition:
+            if connection.closed: # 出错或超时后已关闭，让出名额给新连接
+                self.connections: list[RconConnection] = [item for item in self.connections if item is not connection]
+            elif connection in self.connections:
+                self.idle.append(connection)
+            self.condition.notify()
+
+    def command(self, command: str, timeout: float = None) -> str:
+        connection: RconConnection | None = self.acquire(timeout)
+        if connection is None:
+            raise RconError(f"等待空闲RCON连接超时：{command}")
+        try:
+            return connection.command(command, timeout)
+        finally:
+            self.release(connection)
+
+    def close(self):
+        with self.condition:
+            connections: list[RconConnection] = self.connections
+            self.connections: list[RconConnection] = list()
+            self.idle: list[RconConnection] = list()
+            self.condition.notify_all()
+        for connection in connections:
+            connection.close()
@@ -0,0 +1,137 @@
+from util import Color, colors_tab
+from pipe import RawLine
+
+from sys import stdout
+from typing import Literal, BinaryIO
+from threading import Thread, Condition
+from collections import deque
+
+type OverflowPolicy = Literal["block", "drop_oldest", "collapse"]
+
+overflow_policies: list[str] = ["collapse", "drop_oldest", "block"]
+
+# ----------------------------------------------------------------
+
+class RenderQueue:
+    def __init__(
+        self,
+        base_colors: list[Color] = None,
+        error_color: Color = "red",
+        capacity: int = 4096,
+        policy: OverflowPolicy = "collapse",
+        output: BinaryIO = None
+    ):
+        base: str = "".join([colors_tab[color] for color in base_colors or list()])
+        self.prefix: bytes = base.encode()
+        self.notice_prefix: bytes = f"{base}{colors_tab[error_color]}".encode()
+        self.error_prefix: bytes = self.notice_prefix + b"[ERROR] "
+        self.suffix: bytes = f"{colors_tab["reset"]}\n".encode()
+
+        self.capacity: int = max(1, capacity)
+        self.policy: OverflowPolicy = policy
+        self.output: BinaryIO = output
+
+        self.items: deque[tuple[bytes, bool]] = deque()
+        self.condition: Condition = Condition()
+        self.busy: bool = False
+        self.closed: bool = True
+        self.thread: Thread = None
+
+        self.suppressed: int = 0 # 尚未提示的被折叠行数
+        self.dropped: int = 0 # 累计丢弃行数
+        self.rendered: int = 0
+
+    def start(self):
+        if self.thread is not None:
+            return
+        self.closed: bool = False
+        self.thread: Thread = Thread(target=self.render_loop, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        with self.condition:
+            self.closed: bool = True
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout=5)
+            self.thread: Thread = None
+
+    def depth(self) -> int:
+        return len(self.items)
+
+    # ----------------------------------------------------------------
+
+    def put(self, line: RawLine, is_error: bool):
+        item: tuple[bytes, bool] = (bytes(line), is_error) # 复制出切片，避免长期占用整个读取块
+
+        with self.condition:
+            if len(self.items) >= self.capacity:
+                if self.policy == "block":
+                    while len(self.items) >= self.capacity and not self.closed:
+                        self.condition.wait()
+                elif self.policy == "drop_oldest":
+                    self.items.popleft()
+                    self.dropped += 1
+                else:
+                    self.suppressed += 1
+                    self.dropped += 1
+                    return
+
+            self.items.append(item)
+            self.condition.notify_all()
+
+    def drain(self, timeout: float = 5):
+        with self.condition:
+            self.condition.wait_for(
+                lambda: self.closed or not (self.items or self.suppressed or self.busy),
+                timeout=timeout
+            )
+
+    # ----------------------------------------------------------------
+
+    def render_loop(self):
+        while True:
+            with self.condition:
+                self.condition.wait_for(lambda: self.closed or self.items or self.suppressed)
+                if self.closed and not (self.items or self.suppressed):
+                    return
+
+                items: list[tuple[bytes, bool]] = list(self.items)
+                self.items.clear()
+                suppressed: int = self.suppressed
+                self.suppressed: int = 0
+                self.busy: bool = True
+                self.condition.notify_all()
+
+            self.write(items, suppressed)
+
+            with self.condition:
+                self.busy: bool = False
+                self.condition.notify_all()
+
+    def write(self, items: list[tuple[bytes, bool]], suppressed: int):
+        prefix, error_prefix, suffix = self.prefix, self.error_prefix, self.suffix
+        parts: list[bytes] = list()
+        append = parts.append
+
+        for line, is_error in items:
+            append(error_prefix if is_error else prefix)
+            append(line)
+            append(suffix)
+
+        if suppressed:
+            append(self.notice_prefix)
+            append(f"已折叠{suppressed}行输出（终端输出过慢）".encode())
+            append(suffix)
+
+        output: BinaryIO = self.output
+        if output is None:
+            stdout.flush() # 先清空文本层缓冲，保证与Page.print的输出顺序一致
+            output: BinaryIO = stdout.buffer
+
+        try:
+            output.write(b"".join(parts))
+            output.flush()
+        except (OSError, ValueError):
+            pass
+        self.rendered += len(items)
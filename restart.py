@@ -0,0 +1,85 @@
+from random import uniform
+from typing import Literal
+
+type ExitKind = Literal["stop", "reboot", "interrupt", "clean", "crash", "boot_crash"]
+
+exit_kind_names: dict[str, str] = {
+    "stop": "手动停止",
+    "reboot": "手动重启",
+    "interrupt": "中断退出",
+    "clean": "正常退出",
+    "crash": "运行中崩溃",
+    "boot_crash": "启动阶段崩溃",
+}
+
+# ----------------------------------------------------------------
+
+def classify_exit(
+    return_code: int,
+    ready: bool,
+    uptime: float,
+    stop_requested: bool = False,
+    reboot_requested: bool = False,
+    stable_seconds: float = 300
+) -> ExitKind:
+    if stop_requested:
+        return "stop"
+    if return_code == 130:
+        return "interrupt"
+    if reboot_requested:
+        return "reboot"
+    if not ready:
+        return "boot_crash"
+    if return_code == 0:
+        return "clean"
+    if uptime < stable_seconds: # 刚启动完成就崩溃，同样视为崩溃循环
+        return "boot_crash"
+    return "crash"
+
+class RestartDecision:
+    __slots__ = ("kind", "delay", "reason")
+
+    def __init__(self, kind: ExitKind, delay: float | None, reason: str):
+        self.kind: ExitKind = kind
+        self.delay: float | None = delay # None表示不再重启
+        self.reason: str = reason
+
+class RestartPolicy:
+    def __init__(
+        self,
+        base_seconds: float = 10,
+        max_seconds: float = 300,
+        crash_budget: int = 5,
+        jitter: float = 0.25,
+        backoff_seconds: float = 5
+    ):
+        self.base_seconds: float = base_seconds
+        # 退避基数与重启等待时间分开：reboot_seconds为0时崩溃循环仍需退避
+        self.backoff_seconds: float = max(backoff_seconds, base_seconds, 1)
+        self.max_seconds: float = max(max_seconds, self.backoff_seconds)
+        self.crash_budget: int = crash_budget
+        self.jitter: float = jitter
+        self.crash_streak: int = 0
+
+    def decide(self, kind: ExitKind) -> RestartDecision:
+        match kind:
+            case "stop" | "interrupt":
+                return RestartDecision(kind, None, exit_kind_names[kind])
+            case "reboot":
+                self.crash_streak: int = 0
+                return RestartDecision(kind, 0, "手动重启，立即启动")
+            case "clean" | "crash":
+                self.crash_streak: int = 0
+                return RestartDecision(kind, self.base_seconds, exit_kind_names[kind])
+
+        self.crash_streak += 1
+        if 0 <= self.crash_budget < self.crash_streak:
+            return RestartDecision(
+                kind, None, f"连续崩溃{self.crash_streak}次，已超出重试预算{self.crash_budget}次，放弃重启"
+            )
+
+        delay: float = min(self.max_seconds, self.backoff_seconds * 2 ** (self.crash_streak - 1))
+        delay: float = min(self.max_seconds, delay * uniform(1 - self.jitter, 1 + self.jitter)) # 抖动，避免多实例同时重启
+        return RestartDecision(
+            kind, delay, f"连续第{self.crash_streak}次崩溃，指数退避{delay:.1f}s"
+        )
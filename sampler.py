@@ -0,0 +1,329 @@
+from os import path, makedirs, replace
+from json import dumps, loads, JSONDecodeError
+from time import time, monotonic
+from array import array
+from threading import Thread, Event, Lock
+
+sample_store_path: str = path.join("runner_data", "samples.bin")
+
+sample_fields: tuple[str, ...] = (
+    "cpu", "rss", "pss", "swap", "threads", "read_rate", "write_rate", "major_faults"
+)
+
+# 名称, 聚合间隔（秒，0为原始采样）, 容量；约22k行 × 36字节 ≈ 0.8MB
+sample_tiers: tuple[tuple[str, int, int], ...] = (
+    ("1s", 0, 3600),
+    ("1min", 60, 10080),
+    ("1h", 3600, 8760),
+)
+
+proc_supported: bool = path.exists("/proc/self/stat")
+
+try: # Windows上没有sysconf
+    from os import sysconf
+    clock_ticks: int = sysconf("SC_CLK_TCK")
+except (ImportError, ValueError, OSError):
+    clock_ticks: int = 100
+
+# ----------------------------------------------------------------
+
+def read_proc_stat(pid: int) -> dict[str, int] | None:
+    # 读取累计计数器，单位：字节 / 时钟滴答；仅Linux
+    result: dict[str, int] = dict()
+    try:
+        with open(f"/proc/{pid}/stat", mode="r") as file:
+            fields: list[str] = file.read().rpartition(")")[2].split()
+        with open(f"/proc/{pid}/status", mode="r") as file:
+            status: str = file.read()
+    except OSError:
+        return
+
+    result["ticks"] = int(fields[11]) + int(fields[12])
+    result["major_faults"] = int(fields[9])
+    for text in status.splitlines():
+        key, _, value = text.partition(":")
+        if key in ("VmRSS", "VmHWM", "VmSwap"):
+            result[key] = int(value.split()[0]) * 1024
+        elif key == "Threads":
+            result[key] = int(value)
+
+    try: # 其他用户的进程或旧内核上可能不可读
+        with open(f"/proc/{pid}/io", mode="r") as file:
+            for text in file:
+                key, _, value = text.partition(":")
+                if key in ("read_bytes", "write_bytes"):
+                    result[key] = int(value)
+    except OSError:
+        pass
+
+    try: # smaps_rollup需要Linux 4.14+
+        with open(f"/proc/{pid}/smaps_rollup", mode="r") as file:
+            for text in file:
+                key, _, value = text.partition(":")
+                if key in ("Pss", "Swap"):
+                    result[key] = int(value.split()[0]) * 1024
+    except OSError:
+        pass
+    return result
+
+# ----------------------------------------------------------------
+
+class RingBuffer:
+    __slots__ = ("capacity", "width", "times", "values", "head", "count")
+
+    def __init__(self, capacity: int, width: int):
+        self.capacity: int = capacity
+        self.width: int = width
+        self.times: array = array("I", bytes(4 * capacity))
+        self.values: array = array("f", bytes(4 * capacity * width))
+        self.head: int = 0
+        self.count: int = 0
+
+    def append(self, timestamp: int, row: list[float]):
+        base: int = self.head * self.width
+        self.times[self.head] = timestamp
+        self.values[base:base + self.width] = array("f", row)
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def rows(self, since: int = 0) -> list[tuple[int, list[float]]]:
+        result: list[tuple[int, list[float]]] = list()
+        start: int = self.head - self.count
+        for offset in range(self.count):
+            index: int = (start + offset) % self.capacity
+            if self.times[index] >= since:
+                base: int = index * self.width
+                result.append((self.times[index], self.values[base:base + self.width].tolist()))
+        return result
+
+    def latest(self) -> tuple[int, list[float]] | None:
+        if not self.count:
+            return
+        index: int = (self.head - 1) % self.capacity
+        base: int = index * self.width
+        return self.times[index], self.values[base:base + self.width].tolist()
+
+class SampleTier:
+    __slots__ = ("name", "interval", "buffer", "bucket", "sums", "samples")
+
+    def __init__(self, name: str, interval: int, capacity: int, width: int):
+        self.name: str = name
+        self.interval: int = interval
+        self.buffer: RingBuffer = RingBuffer(capacity, width)
+        self.bucket: int = None
+        self.sums: list[float] = [0.0] * width
+        self.samples: int = 0
+
+    def add(self, timestamp: int, row: list[float]) -> bool:
+        # 返回本次是否写入了一行（跨过了聚合边界）
+        if not self.interval:
+            self.buffer.append(timestamp, row)
+            return True
+
+        bucket: int = timestamp // self.interval
+        flushed: bool = False
+        if self.bucket is not None and bucket != self.bucket and self.samples:
+            self.buffer.append(self.bucket * self.interval, [value / self.samples for value in self.sums])
+            self.sums: list[float] = [0.0] * len(row)
+            self.samples: int = 0
+            flushed: bool = True
+
+        self.bucket: int = bucket
+        self.samples += 1
+        for index, value in enumerate(row):
+            self.sums[index] += value
+        return flushed
+
+# ----------------------------------------------------------------
+
+class SampleStore:
+    def __init__(self, tiers: tuple[tuple[str, int, int], ...] = sample_tiers, fields: tuple[str, ...] = sample_fields):
+        self.fields: tuple[str, ...] = fields
+        self.tiers: dict[str, SampleTier] = {
+            name: SampleTier(name, interval, capacity, len(fields)) for name, interval, capacity in tiers
+        }
+        self.lock: Lock = Lock()
+
+    def add(self, timestamp: int, row: list[float]) -> bool:
+        with self.lock:
+            flushed: list[bool] = [tier.add(timestamp, row) for tier in self.tiers.values()]
+        return any(flushed[1:])
+
+    def query(self, tier_name: str, since: int = 0) -> list[tuple[int, list[float]]]:
+        with self.lock:
+            return self.tiers[tier_name].buffer.rows(since)
+
+    def latest(self) -> dict[str, float] | None:
+        with self.lock:
+            row: tuple[int, list[float]] | None = next(iter(self.tiers.values())).buffer.latest()
+        return dict(zip(self.fields, row[1])) if row else None
+
+    # ----------------------------------------------------------------
+
+    def save(self, file_path: str = sample_store_path):
+        # 格式：一行JSON头，随后依次为各层的时间戳与数值数组
+        makedirs(path.dirname(file_path) or ".", exist_ok=True)
+        with self.lock:
+            header: dict = {
+                "fields": self.fields,
+                "tiers": [
+                    [tier.name, tier.interval, tier.buffer.capacity, tier.buffer.head, tier.buffer.count]
+                    for tier in self.tiers.values()
+                ]
+            }
+            with open(file_path + ".tmp", mode="wb") as file:
+                file.write(dumps(header).encode("utf-8") + b"\n")
+                for tier in self.tiers.values():
+                    tier.buffer.times.tofile(file)
+                    tier.buffer.values.tofile(file)
+        replace(file_path + ".tmp", file_path)
+
+    @classmethod
+    def load(cls, file_path: str = sample_store_path) -> "SampleStore":
+        store: SampleStore = cls()
+        if not path.exists(file_path):
+            return store
+
+        try:
+            with open(file_path, mode="rb") as file:
+                header: dict = loads(file.readline())
+                layout: list[list[int]] = [[name, interval, capacity] for name, interval, capacity in sample_tiers]
+                if tuple(header["fields"]) != sample_fields or [item[:3] for item in header["tiers"]] != layout:
+                    return store # 格式已变化，丢弃旧数据
+                for tier, (_, _, _, head, count) in zip(store.tiers.values(), header["tiers"]):
+                    buffer: RingBuffer = tier.buffer
+                    buffer.times = array("I")
+                    buffer.times.fromfile(file, buffer.capacity)
+                    buffer.values = array("f")
+                    buffer.values.fromfile(file, buffer.capacity * buffer.width)
+                    buffer.head, buffer.count = head, count
+        except (OSError, EOFError, ValueError, KeyError, JSONDecodeError):
+            return cls()
+        return store
+
+    def export_csv(self, tier_name: str, file_path: str):
+        with open(file_path, mode="w", encoding="utf-8") as file:
+            file.write(",".join(["timestamp", *self.fields]) + "\n")
+            for timestamp, row in self.query(tier_name):
+                file.write(",".join([str(timestamp), *[f"{value:.1f}" for value in row]]) + "\n")
+
+# ----------------------------------------------------------------
+
+class ProcessSampler:
+    def __init__(self, store: SampleStore, interval: float = 1, store_path: str = sample_store_path, save_seconds: float = 600):
+        self.store: SampleStore = store
+        self.interval: float = interval
+        self.store_path: str = store_path
+        self.save_seconds: float = save_seconds
+
+        self.pid: int = None
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+        self.previous: tuple[float, dict[str, int]] = None
+        self.saved_at: float = monotonic()
+
+    def start(self, pid: int):
+        self.stop()
+        if not proc_supported:
+            return
+        self.pid: int = pid
+        self.previous: tuple[float, dict[str, int]] = None
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=self.sample_loop, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        self.thread: Thread = None
+        self.save()
+
+    def save(self):
+        try:
+            self.store.save(self.store_path)
+        except OSError:
+            pass
+        self.saved_at: float = monotonic()
+
+    def sample_loop(self):
+        while not self.stopped.wait(self.interval):
+            if self.sample() and monotonic() - self.saved_at >= self.save_seconds:
+                self.save()
+
+    def sample(self) -> bool:
+        now: float = monotonic()
+        current: dict[str, int] | None = read_proc_stat(self.pid)
+        if current is None:
+            return False
+
+        previous: tuple[float, dict[str, int]] = self.previous
+        self.previous: tuple[float, dict[str, int]] = (now, current)
+        if previous is None: # 速率需要两次读数
+            return False
+
+        elapsed: float = max(now - previous[0], 1e-3)
+        last: dict[str, int] = previous[1]
+
+        def rate(key: str) -> float:
+            return max(0, current.get(key, 0) - last.get(key, 0)) / elapsed
+
+        row: list[float] = [
+            rate("ticks") / clock_ticks * 100,
+            current.get("VmRSS", 0),
+            current.get("Pss", 0),
+            current.get("Swap", current.get("VmSwap", 0)),
+            current.get("Threads", 0),
+            rate("read_bytes"),
+            rate("write_bytes"),
+            rate("major_faults"),
+        ]
+        return self.store.add(int(time()), row)
+
+# ----------------------------------------------------------------
+
+def sample_report(store: SampleStore = None) -> list[str]:
+    store: SampleStore = store or SampleStore.load()
+    now: int = int(time())
+    # 窗口名称, 数据来源层, 时长（秒）
+    windows: list[tuple[str, str, int]] = [
+        ("最近1分钟", "1s", 60),
+        ("最近1小时", "1min", 3600),
+        ("最近1天", "1min", 86400),
+        ("最近30天", "1h", 86400 * 30),
+    ]
+
+    result: list[str] = [
+        f"{"时间窗口":<10}{"CPU均值%":>10}{"CPU峰值%":>10}{"RSS均值MB":>11}{"RSS峰值MB":>11}{"Swap峰值MB":>12}{"线程":>6}{"读KB/s":>9}{"写KB/s":>9}"
+    ]
+    index: dict[str, int] = {name: position for position, name in enumerate(store.fields)}
+    for label, tier, seconds in windows:
+        rows: list[list[float]] = [row for _, row in store.query(tier, now - seconds)]
+        if not rows:
+            result.append(f"{label:<10}{"暂无数据":>10}")
+            continue
+
+        def column(name: str) -> list[float]:
+            return [row[index[name]] for row in rows]
+
+        def average(name: str) -> float:
+            return sum(column(name)) / len(rows)
+
+        mib: float = 1 << 20
+        result.append(
+            f"{label:<10}{average("cpu"):>10.1f}{max(column("cpu")):>10.1f}"
+            f"{average("rss") / mib:>11.0f}{max(column("rss")) / mib:>11.0f}{max(column("swap")) / mib:>12.0f}"
+            f"{max(column("threads")):>6.0f}{average("read_rate") / 1024:>9.1f}{average("write_rate") / 1024:>9.1f}"
+        )
+    return result
+
+def export_samples(store: SampleStore = None, directory: str = "runner_data") -> list[str]:
+    store: SampleStore = store or SampleStore.load()
+    makedirs(directory, exist_ok=True)
+    result: list[str] = list()
+    for name in store.tiers:
+        file_path: str = path.join(directory, f"samples_{name}.csv")
+        store.export_csv(name, file_path)
+        result.append(f"已导出{len(store.query(name))}行：{file_path}")
+    return result
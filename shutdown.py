@@ -0,0 +1,203 @@
+from logparse import LogEvent
+from hooks import HookRegistry
+from boot import percentile
+
+from os import path, makedirs, kill
+from json import dumps, loads, JSONDecodeError
+from time import time, monotonic
+from re import Match
+from typing import Callable, Literal
+from signal import SIGTERM
+from threading import Lock
+from subprocess import Popen, TimeoutExpired
+
+import signal
+
+type ShutdownStage = Literal["stop", "term", "kill"]
+
+shutdown_history_path: str = path.join("runner_data", "shutdown_history.jsonl")
+
+shutdown_stage_names: dict[str, str] = {
+    "stop": "stop命令",
+    "term": "SIGTERM",
+    "kill": "强制结束",
+}
+
+# 保存进度行：每出现一次就顺延stop阶段的期限，大世界保存期间不会被误判为超时
+save_progress_literals: tuple[str, ...] = (
+    "Stopping server",
+    "Saving players",
+    "Saving worlds",
+    "Saving chunks for level",
+    "ThreadedAnvilChunkStorage",
+    "All chunks are saved",
+    "All dimensions are saved",
+)
+
+# ----------------------------------------------------------------
+
+def kill_signal(pid: int, sig: int) -> bool:
+    try:
+        kill(pid, sig)
+        return True
+    except OSError:
+        return False
+
+def wait_popen(process: Popen, seconds: float) -> bool:
+    try:
+        process.wait(timeout=seconds)
+        return True
+    except TimeoutExpired:
+        return False
+
+def load_shutdown_history(history_path: str = shutdown_history_path) -> list[dict]:
+    records: list[dict] = list()
+    if not path.exists(history_path):
+        return records
+
+    with open(history_path, mode="r", encoding="utf-8") as file:
+        for text in file:
+            try:
+                records.append(loads(text))
+            except JSONDecodeError:
+                continue
+    return records
+
+class ShutdownOrchestrator:
+    def __init__(
+        self,
+        hooks: HookRegistry,
+        history_path: str = shutdown_history_path,
+        min_grace: float = 60,
+        max_grace: float = 900,
+        term_grace: float = 30,
+        keep: int = 200
+    ):
+        self.history_path: str = history_path
+        self.min_grace: float = min_grace
+        self.max_grace: float = max_grace
+        self.term_grace: float = term_grace
+        self.keep: int = keep
+
+        self.lock: Lock = Lock()
+        self.started: float = None
+        self.reason: str = None
+        self.stage: ShutdownStage = "stop"
+        self.progress_at: float = None
+        self.progress_lines: int = 0
+        self.last_seconds: float = None
+
+        for literal in save_progress_literals:
+            hooks.register("shutdown_progress", self.on_progress, literal=literal)
+
+    def on_progress(self, event: LogEvent, result: Match | None):
+        if self.started is not None:
+            self.progress_at = monotonic()
+            self.progress_lines += 1
+
+    def grace(self) -> float:
+        # stop阶段的无进展期限：以往正常关闭耗时的p95再留出余量
+        durations: list[float] = [
+            item["s"] for item in load_shutdown_history(self.history_path)[-50:] if item.get("k") == "stop"
+        ]
+        if not durations:
+            return self.min_grace
+        return min(self.max_grace, max(self.min_grace, percentile(durations, 0.95) * 1.5 + 10))
+
+    # ----------------------------------------------------------------
+
+    def begin(self, reason: str):
+        # 记录关闭的起点；重复调用保留最早的一次
+        with self.lock:
+            if self.started is None:
+                self.started = monotonic()
+                self.reason = reason
+                self.stage = "stop"
+                self.progress_at = None
+                self.progress_lines = 0
+
+    def escalate(
+        self,
+        pid: int,
+        send_stop: Callable[[], None],
+        wait: Callable[[float], bool],
+        notify: Callable[[str], None],
+        reason: str,
+        grace: float = None
+    ) -> ShutdownStage:
+        # wait(秒)在进程已退出时返回True；返回最终使用的阶段
+        self.begin(reason)
+        grace: float = grace if grace is not None else self.grace()
+        send_stop()
+
+        while True:
+            # 期限从最近一次保存进度起算，总时长不超过max_grace的两倍
+            anchor: float = self.progress_at or self.started
+            remaining: float = min(anchor + grace, self.started + self.max_grace * 2) - monotonic()
+            if remaining <= 0:
+                break
+            if wait(min(remaining, 1)):
+                return "stop"
+
+        self.stage = "term"
+        notify(f"stop命令{monotonic() - self.started:.0f}秒内未完成关闭，发送SIGTERM，等待{self.term_grace:.0f}秒……")
+        kill_signal(pid, SIGTERM)
+        if wait(self.term_grace):
+            return "term"
+
+        self.stage = "kill"
+        notify("SIGTERM无效，强制结束进程。")
+        kill_signal(pid, getattr(signal, "SIGKILL", SIGTERM))
+        wait(10)
+        return "kill"
+
+    def finish(self, return_code: int) -> float | None:
+        # 进程退出时调用；仅记录经由关闭流程结束的进程
+        with self.lock:
+            if self.started is None:
+                return
+            seconds: float = monotonic() - self.started
+            record: dict = {
+                "t": int(time()),
+                "s": round(seconds, 3),
+                "k": self.stage,
+                "r": self.reason,
+                "p": self.progress_lines,
+                "c": return_code,
+            }
+            self.started = None
+            self.last_seconds = seconds
+
+        makedirs(path.dirname(self.history_path) or ".", exist_ok=True)
+        with open(self.history_path, mode="a", encoding="utf-8") as file:
+            file.write(dumps(record, separators=(",", ":")) + "\n")
+
+        records: list[dict] = load_shutdown_history(self.history_path)
+        if len(records) > self.keep * 2: # 超出后一次性截断，避免每次重写
+            with open(self.history_path, mode="w", encoding="utf-8") as file:
+                for item in records[-self.keep:]:
+                    file.write(dumps(item, separators=(",", ":")) + "\n")
+        return seconds
+
+# ----------------------------------------------------------------
+
+def shutdown_report(history_path: str = shutdown_history_path) -> list[str]:
+    records: list[dict] = load_shutdown_history(history_path)
+    if not records:
+        return ["暂无关闭记录。"]
+
+    durations: list[float] = [item["s"] for item in records]
+    result: list[str] = [
+        f"共{len(records)}次关闭，耗时p50 {percentile(durations, 0.5):.1f}s，p95 {percentile(durations, 0.95):.1f}s，最长 {max(durations):.1f}s"
+    ]
+    for stage, name in shutdown_stage_names.items():
+        values: list[float] = [item["s"] for item in records if item.get("k") == stage]
+        if values:
+            result.append(f"  {name}：{len(values)}次，中位数{percentile(values, 0.5):.1f}s")
+
+    latest: dict = records[-1]
+    result.append(
+        f"最近一次：{latest["s"]:.1f}s，{shutdown_stage_names.get(latest.get("k"), latest.get("k"))}，"
+        f"原因：{latest.get("r")}，保存进度行：{latest.get("p", 0)}"
+    )
+    return result
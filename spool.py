@@ -0,0 +1,153 @@
+from pipe import RawLine
+
+from os import path, makedirs, listdir, remove, replace
+from time import time, strftime, localtime
+from gzip import open as gzip_open
+from shutil import copyfileobj
+from queue import Queue
+from threading import Thread, Lock
+from typing import BinaryIO
+
+# ----------------------------------------------------------------
+
+class ConsoleSpool:
+    def __init__(
+        self,
+        directory: str = "runner_logs",
+        segment_size: int = 16 << 20,
+        max_segments: int = 20,
+        buffer_size: int = 1 << 16
+    ):
+        self.directory: str = directory
+        self.segment_size: int = segment_size
+        self.max_segments: int = max_segments
+        self.buffer_size: int = buffer_size
+        self.current_path: str = path.join(directory, "console.log")
+
+        self.lock: Lock = Lock()
+        self.file: BinaryIO = None
+        self.size: int = 0
+        self.sequence: int = 0
+
+        self.stamp_second: int = -1
+        self.stamp_text: str = ""
+
+        self.pending: Queue[str] = Queue() # 待压缩的段文件路径，内存占用与输出量无关
+        self.queued: set[str] = set() # 已排队或正在压缩的段，同一文件只压缩一次
+        self.worker: Thread = None
+
+    def open(self):
+        if self.file is not None:
+            return
+
+        makedirs(self.directory, exist_ok=True)
+        if path.exists(self.current_path) and path.getsize(self.current_path): # 上次未正常关闭的段，由下方的扫描排队
+            self.seal()
+
+        self.file: BinaryIO = open(self.current_path, mode="ab", buffering=self.buffer_size)
+        self.size: int = self.file.tell()
+
+        if self.worker is None:
+            self.worker: Thread = Thread(target=self.compress_loop, daemon=True)
+            self.worker.start()
+        for name in listdir(self.directory): # 补压缩遗留的未压缩段
+            if name.startswith("console-") and name.endswith(".log"):
+                self.enqueue(path.join(self.directory, name))
+
+    def close(self):
+        with self.lock:
+            if self.file is None:
+                return
+            self.file.close()
+            self.file: BinaryIO = None
+
+    def flush(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.flush()
+
+    # ----------------------------------------------------------------
+
+    def stamp(self) -> bytes:
+        now: float = time()
+        second: int = int(now)
+        if second != self.stamp_second: # 每秒只格式化一次日期部分
+            self.stamp_second: int = second
+            self.stamp_text: str = strftime("%Y-%m-%d %H:%M:%S", localtime(second))
+        return f"{self.stamp_text}.{int((now - second) * 1000):03d}".encode()
+
+    def put(self, line: RawLine, is_error: bool):
+        with self.lock:
+            if self.file is None:
+                return
+
+            data: bytes = b"".join((
+                self.stamp(), b" [ERR] " if is_error else b" [OUT] ", line, b"\n"
+            ))
+            self.file.write(data)
+            self.size += len(data)
+
+            if self.size >= self.segment_size:
+                self.rotate()
+
+    def rotate(self):
+        self.file.close()
+        self.enqueue(self.seal())
+        self.file: BinaryIO = open(self.current_path, mode="ab", buffering=self.buffer_size)
+        self.size: int = 0
+
+    def seal(self) -> str:
+        self.sequence += 1
+        name: str = f"console-{strftime("%Y%m%d-%H%M%S")}-{self.sequence:04d}.log"
+        sealed: str = path.join(self.directory, name)
+        replace(self.current_path, sealed)
+        return sealed
+
+    # ----------------------------------------------------------------
+
+    def enqueue(self, source: str):
+        if source in self.queued:
+            return
+        self.queued.add(source)
+        self.pending.put(source)
+
+    def compress_loop(self):
+        while True:
+            source: str = self.pending.get()
+            try:
+                self.compress(source) # 压缩失败的段保留为.log，下次打开时重试
+            except OSError:
+                pass
+            finally:
+                self.queued.discard(source)
+            try:
+                self.prune()
+            except OSError:
+                pass
+
+    def compress(self, source: str):
+        if not path.exists(source):
+            return
+
+        target: str = source + ".gz"
+        try:
+            with open(source, mode="rb") as src, gzip_open(target + ".tmp", mode="wb", compresslevel=6) as dst:
+                copyfileobj(src, dst, 1 << 20)
+            replace(target + ".tmp", target)
+        except OSError:
+            if path.exists(target + ".tmp"):
+                remove(target + ".tmp")
+            raise
+        remove(source)
+
+    def prune(self):
+        # 未能压缩的.log段同样计入保留数量，否则磁盘写满等故障下会无限堆积
+        segments: list[str] = sorted(
+            (
+                name for name in listdir(self.directory)
+                if name.startswith("console-") and name.endswith((".log", ".log.gz"))
+            ),
+            key=lambda name: name.removesuffix(".gz")
+        )
+        for name in segments[:max(0, len(segments) - self.max_segments)]:
+            remove(path.join(self.directory, name))
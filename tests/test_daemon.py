@@ -0,0 +1,45 @@
+from daemon import ConsoleLog, ControlServer
+
+import unittest
+from os import path, stat
+from stat import S_IMODE
+from tempfile import TemporaryDirectory
+
+try:
+    from socket import AF_UNIX
+except ImportError:
+    AF_UNIX = None
+
+class ConsoleLogTest(unittest.TestCase):
+    def test_read_stops_at_line_end(self):
+        log: ConsoleLog = ConsoleLog()
+        log.put(b"a" * 10, False)
+        log.put(b"b" * 10, True)
+        start, data = log.read(0, limit=16)
+        self.assertEqual((start, data), (0, b"O " + b"a" * 10 + b"\n"))
+        start, data = log.read(len(data), limit=16)
+        self.assertEqual(data, b"E " + b"b" * 10 + b"\n")
+
+    def test_long_line_is_not_split(self):
+        log: ConsoleLog = ConsoleLog()
+        log.put(b"x" * 100, True)
+        log.put(b"y", False)
+        start, data = log.read(0, limit=16)
+        self.assertEqual(data, b"E " + b"x" * 100 + b"\n")
+        start, data = log.read(start + len(data), limit=16)
+        self.assertEqual(data, b"O y\n")
+
+@unittest.skipIf(AF_UNIX is None, "需要Unix域套接字")
+class ControlServerTest(unittest.TestCase):
+    def test_socket_is_private(self):
+        with TemporaryDirectory() as directory:
+            socket_path: str = path.join(directory, "control.sock")
+            server: ControlServer = ControlServer(socket_path, ConsoleLog(), lambda command: None, lambda: dict())
+            server.start()
+            try:
+                self.assertEqual(S_IMODE(stat(socket_path).st_mode), 0o600)
+            finally:
+                server.close()
+
+if __name__ == "__main__":
+    unittest.main()
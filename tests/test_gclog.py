@@ -0,0 +1,56 @@
+from gclog import GCAnalyzer
+
+import unittest
+from os import path, rename
+from tempfile import TemporaryDirectory
+
+def pause_line(uptime: float, ms: float) -> bytes:
+    return f"[{uptime:.3f}s][info][gc] GC(1) Pause Young (Normal) (G1 Evacuation Pause) 40M->10M(256M) {ms:.3f}ms\n".encode()
+
+# ----------------------------------------------------------------
+
+class GCAnalyzerTest(unittest.TestCase):
+    def setUp(self):
+        self.directory: TemporaryDirectory = TemporaryDirectory()
+        self.log_path: str = path.join(self.directory.name, "gc.log")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_jvm_args_rotate(self):
+        analyzer: GCAnalyzer = GCAnalyzer(self.log_path, file_count=3, file_size="8M")
+        (arg,) = analyzer.jvm_args((21, 0, 0))
+        self.assertTrue(arg.endswith(":filecount=3,filesize=8M"))
+        self.assertEqual(analyzer.jvm_args((1, 8, 0)), [])
+
+    def test_follows_rotation(self):
+        analyzer: GCAnalyzer = GCAnalyzer(self.log_path)
+        with open(self.log_path, mode="wb") as file:
+            file.write(pause_line(1, 5))
+        analyzer.poll()
+        self.assertEqual(analyzer.pause_count, 1)
+
+        # 旧文件在改名前又写入了一行，随后JVM新建gc.log
+        with open(self.log_path, mode="ab") as file:
+            file.write(pause_line(2, 7))
+        rename(self.log_path, f"{self.log_path}.0")
+        with open(self.log_path, mode="wb") as file:
+            file.write(pause_line(3, 9))
+        analyzer.poll()
+
+        self.assertEqual(list(analyzer.pauses), [5, 7, 9])
+        self.assertEqual(analyzer.pause_total, 21)
+        self.assertEqual(analyzer.uptime, 3)
+
+    def test_pauses_are_bounded(self):
+        analyzer: GCAnalyzer = GCAnalyzer(self.log_path, window=10)
+        for index in range(100):
+            analyzer.feed(pause_line(index + 1, index + 1).decode().rstrip("\n"))
+        self.assertEqual(len(analyzer.pauses), 10)
+        self.assertEqual(analyzer.pause_count, 100)
+        self.assertEqual(analyzer.pause_max, 100)
+        self.assertEqual(analyzer.pause_total, sum(range(1, 101)))
+        self.assertIn("100次停顿", analyzer.report()[0])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,84 @@
+from hooks import HookRegistry
+from logparse import LogEvent
+
+import unittest
+from re import Match
+from threading import Thread, Barrier
+
+def event(message: str, level: str = "INFO") -> LogEvent:
+    return LogEvent("12:00:00", "Server thread", level, "", message)
+
+# ----------------------------------------------------------------
+
+class HookRegistryTest(unittest.TestCase):
+    def setUp(self):
+        self.reported: list[str] = list()
+        self.registry: HookRegistry = HookRegistry(notify=self.reported.append, failure_limit=3)
+
+    def test_plain_pattern_becomes_literal(self):
+        seen: list[str] = list()
+        hook = self.registry.register("plain", lambda item, result: seen.append(item.message), pattern="Stopping server")
+        self.assertEqual(hook.literal, "Stopping server")
+        self.assertIsNone(hook.pattern)
+        self.registry.dispatch(event("Stopping server"))
+        self.registry.dispatch(event("Starting server"))
+        self.assertEqual(seen, ["Stopping server"])
+
+    def test_regex_pattern_requires_literal(self):
+        with self.assertRaises(ValueError):
+            self.registry.register("regex", lambda item, result: None, pattern=r"^(\w+) joined")
+        with self.assertRaises(ValueError):
+            self.registry.register("empty", lambda item, result: None, pattern=r"^(\w+) joined", literal="")
+        self.assertEqual(self.registry.hooks, [])
+
+    def test_pattern_runs_only_after_prefilter(self):
+        seen: list[str] = list()
+        def handler(item: LogEvent, result: Match | None):
+            seen.append(result.group("player"))
+        self.registry.on("player_join", handler)
+        self.registry.dispatch(event("Steve joined the game"))
+        self.registry.dispatch(event("Steve left the game"))
+        self.assertEqual(seen, ["Steve"])
+
+    def test_overlapping_literals(self):
+        seen: list[str] = list()
+        self.registry.register("short", lambda item, result: seen.append("short"), literal="Done")
+        self.registry.register("long", lambda item, result: seen.append("long"), literal="Done (")
+        self.registry.dispatch(event("Done (3.2s)!"))
+        self.assertEqual(sorted(seen), ["long", "short"])
+
+    def test_failing_hook_is_disabled(self):
+        def handler(item: LogEvent, result: Match | None):
+            raise RuntimeError("boom")
+        hook = self.registry.register("broken", handler, literal="tick")
+        for _ in range(5):
+            self.registry.dispatch(event("tick"))
+        self.assertEqual(hook.failures, 3)
+        self.assertNotIn(hook, self.registry.hooks)
+        self.assertEqual(len(self.reported), 2)
+
+    def test_reset_stats(self):
+        hook = self.registry.register("counter", lambda item, result: None, literal="tick")
+        for _ in range(3):
+            self.registry.dispatch(event("tick"))
+        self.assertEqual(hook.calls, 3)
+        self.registry.reset_stats()
+        self.assertEqual((hook.calls, hook.total_ns, hook.max_ns), (0, 0, 0))
+        self.assertEqual(self.registry.slow_hooks(0.001), [])
+
+    def test_concurrent_dispatch_counts(self):
+        hook = self.registry.register("counter", lambda item, result: None, literal="tick")
+        barrier: Barrier = Barrier(2)
+        def worker():
+            barrier.wait()
+            for _ in range(20000):
+                self.registry.dispatch(event("tick"))
+        threads: list[Thread] = [Thread(target=worker) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(hook.calls, 40000)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,152 @@
+from ping import (
+    PingError, ping_server, legacy_ping, probe_server, frame_packet, pack_varint, pack_string, unpack_varint
+)
+
+import unittest
+from json import dumps
+from struct import pack
+from socket import socket, create_server
+from threading import Thread
+from typing import Callable
+
+status: dict = {
+    "version": {"name": "1.20.1", "protocol": 763},
+    "players": {"online": 3, "max": 20},
+    "description": {"text": "Hello ", "extra": [{"text": "world"}]}
+}
+
+# ----------------------------------------------------------------
+
+def receive_frame(connection: socket) -> bytes:
+    # 读取一个长度前缀的数据包，返回包ID及其后的数据
+    length: int = 0
+    for shift in range(0, 35, 7):
+        byte: int = connection.recv(1)[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+    data: bytes = b""
+    while len(data) < length:
+        data += connection.recv(length - len(data))
+    return data
+
+class FakeResponder:
+    # 本地线程内的SLP应答端，每个连接交给handler处理
+    def __init__(self, handler: Callable[[socket], None]):
+        self.handler: Callable[[socket], None] = handler
+        self.server: socket = create_server(("127.0.0.1", 0))
+        self.port: int = self.server.getsockname()[1]
+        self.thread: Thread = Thread(target=self.serve, daemon=True)
+        self.thread.start()
+
+    def serve(self):
+        try:
+            connection, _ = self.server.accept()
+        except OSError:
+            return
+        with connection:
+            try:
+                self.handler(connection)
+            except OSError:
+                pass
+
+    def close(self):
+        self.server.close()
+        self.thread.join(timeout=5)
+
+def modern_handler(pong: bool = True, hold: bool = False) -> Callable[[socket], None]:
+    def handle(connection: socket):
+        receive_frame(connection) # 握手
+        receive_frame(connection) # 状态请求
+        connection.sendall(frame_packet(0x00, pack_string(dumps(status))))
+        request: bytes = receive_frame(connection)
+        if pong:
+            connection.sendall(frame_packet(0x01, request[1:]))
+        elif hold: # 不回pong也不断开，直到客户端超时
+            connection.recv(1)
+    return handle
+
+def legacy_handler(text: str) -> Callable[[socket], None]:
+    def handle(connection: socket):
+        connection.recv(2)
+        data: bytes = text.encode("utf-16-be")
+        connection.sendall(b"\xff" + pack(">H", len(data) // 2) + data)
+    return handle
+
+def raw_handler(data: bytes) -> Callable[[socket], None]:
+    def handle(connection: socket):
+        receive_frame(connection)
+        receive_frame(connection)
+        connection.sendall(data)
+    return handle
+
+# ----------------------------------------------------------------
+
+class PingTest(unittest.TestCase):
+    def respond(self, handler: Callable[[socket], None]) -> int:
+        responder: FakeResponder = FakeResponder(handler)
+        self.addCleanup(responder.close)
+        return responder.port
+
+    def test_varint_round_trip(self):
+        for value in (0, 1, 127, 128, 255, 25565, 2097151, 2147483647):
+            self.assertEqual(unpack_varint(pack_varint(value)), (value, len(pack_varint(value))))
+        self.assertEqual(pack_varint(-1), b"\xff\xff\xff\xff\x0f")
+
+    def test_modern_status_and_pong(self):
+        result = ping_server("127.0.0.1", self.respond(modern_handler()), timeout=5)
+        self.assertFalse(result.legacy)
+        self.assertEqual(result.version, "1.20.1")
+        self.assertEqual(result.protocol, 763)
+        self.assertEqual((result.online, result.max_players), (3, 20))
+        self.assertEqual(result.motd, "Hello world")
+        self.assertIsNotNone(result.ping_ms)
+
+    def test_proxy_without_pong_closing(self):
+        result = ping_server("127.0.0.1", self.respond(modern_handler(pong=False)), timeout=5)
+        self.assertEqual(result.version, "1.20.1")
+        self.assertIsNone(result.ping_ms)
+
+    def test_proxy_without_pong_holding(self):
+        result = ping_server("127.0.0.1", self.respond(modern_handler(pong=False, hold=True)), timeout=0.5)
+        self.assertEqual(result.online, 3)
+        self.assertIsNone(result.ping_ms)
+
+    def test_legacy_section_one_format(self):
+        port: int = self.respond(legacy_handler("§1\x0078\x001.6.4\x00A Minecraft Server\x005\x0010"))
+        result = legacy_ping("127.0.0.1", port, timeout=5)
+        self.assertTrue(result.legacy)
+        self.assertEqual((result.protocol, result.version, result.motd), (78, "1.6.4", "A Minecraft Server"))
+        self.assertEqual((result.online, result.max_players), (5, 10))
+        self.assertIsNone(result.ping_ms)
+
+    def test_legacy_pre_1_4_format(self):
+        result = legacy_ping("127.0.0.1", self.respond(legacy_handler("Old §Server§2§8")), timeout=5)
+        self.assertEqual((result.motd, result.online, result.max_players), ("Old §Server", 2, 8))
+        self.assertIsNone(result.version)
+
+    def test_probe_uses_legacy_only_when_asked(self):
+        port: int = self.respond(legacy_handler("§1\x0061\x001.5.2\x00Legacy\x000\x0020"))
+        self.assertEqual(probe_server("127.0.0.1", port, timeout=5, legacy=True).version, "1.5.2")
+
+        port: int = self.respond(raw_handler(b"\xff\xff\xff\xff\xff\xff"))
+        with self.assertRaises(PingError):
+            probe_server("127.0.0.1", port, timeout=5)
+
+    def test_bad_varint(self):
+        with self.assertRaises(PingError):
+            ping_server("127.0.0.1", self.respond(raw_handler(b"\xff\xff\xff\xff\xff\xff")), timeout=5)
+
+    def test_bad_packet_length(self):
+        with self.assertRaises(PingError):
+            ping_server("127.0.0.1", self.respond(raw_handler(pack_varint(0))), timeout=5)
+        with self.assertRaises(PingError):
+            ping_server("127.0.0.1", self.respond(raw_handler(pack_varint(1 << 22))), timeout=5)
+
+    def test_bad_status_json(self):
+        port: int = self.respond(raw_handler(frame_packet(0x00, pack_string("{not json"))))
+        with self.assertRaises(PingError):
+            ping_server("127.0.0.1", port, timeout=5)
+
+if __name__ == "__main__":
+    unittest.main()
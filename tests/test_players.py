@@ -0,0 +1,40 @@
+from players import PlayerTracker
+from hooks import HookRegistry
+from logparse import EventBus, LogEvent
+
+import unittest
+import players
+
+def event(message: str, thread: str = "Server thread", is_error: bool = False) -> LogEvent:
+    return LogEvent("12:00:00", thread, "INFO", "", message, is_error)
+
+class PlayerTrackerTest(unittest.TestCase):
+    def setUp(self):
+        self.bus: EventBus = EventBus()
+        self.tracker: PlayerTracker = PlayerTracker(self.bus, HookRegistry(self.bus))
+
+    def tearDown(self):
+        players.list_names_window = 1
+
+    def test_inline_list(self):
+        self.bus.publish(event("There are 2 of a max of 20 players online: Steve, Alex"))
+        self.assertEqual(self.tracker.names(), ["Alex", "Steve"])
+        self.assertEqual(self.tracker.capacity, 20)
+
+    def test_legacy_list_takes_next_stdout_line(self):
+        self.bus.publish(event("There are 2/20 players online:"))
+        self.bus.publish(event("java.lang.Exception: boom", is_error=True))
+        self.bus.publish(event("Saving chunks", thread="Worker-1"))
+        self.bus.publish(event("Steve, Alex"))
+        self.assertEqual(self.tracker.names(), ["Alex", "Steve"])
+        self.assertNotIn(self.tracker.on_list_names, self.bus.handlers)
+
+    def test_legacy_list_expires(self):
+        players.list_names_window = -1
+        self.bus.publish(event("There are 1/20 players online:"))
+        self.bus.publish(event("Steve"))
+        self.assertEqual(self.tracker.names(), [])
+        self.assertNotIn(self.tracker.on_list_names, self.bus.handlers)
+
+if __name__ == "__main__":
+    unittest.main()
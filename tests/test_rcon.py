@@ -0,0 +1,155 @@
+from rcon import (
+    RconError, RconConnection, RconPool, encode_packet, rcon_login, rcon_command, rcon_max_payload
+)
+
+import unittest
+from struct import unpack_from
+from socket import socket, create_server, create_connection
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+
+password: str = "secret"
+
+# ----------------------------------------------------------------
+
+class FakeRconServer:
+    # 本地线程内的RCON应答端，按原版RconClient的方式读包：每个包只recv一次（最多1460字节），
+    # 长度字段不等于读到的字节数-4时直接断开；响应按4096字节分片，未知类型回复“Unknown request”
+    def __init__(self):
+        self.server: socket = create_server(("127.0.0.1", 0))
+        self.port: int = self.server.getsockname()[1]
+        self.release: Event = Event()
+        self.received: list[str] = list()
+        self.connections: int = 0
+        self.rejected: int = 0
+        Thread(target=self.accept_loop, daemon=True).start()
+
+    def accept_loop(self):
+        while True:
+            try:
+                connection, _ = self.server.accept()
+            except OSError:
+                return
+            self.connections += 1
+            Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection: socket):
+        authenticated: bool = False
+        with connection:
+            try:
+                while True:
+                    data: bytes = connection.recv(1460)
+                    if len(data) < 10:
+                        return
+                    if unpack_from("<i", data)[0] != len(data) - 4:
+                        self.rejected += 1
+                        return
+                    request_id, packet_type = unpack_from("<ii", data, 4)
+                    payload: str = data[12:-2].decode("utf-8")
+                    if packet_type == rcon_login:
+                        authenticated: bool = payload == password
+                        connection.sendall(encode_packet(request_id if authenticated else -1, rcon_command, ""))
+                    elif packet_type != rcon_command:
+                        connection.sendall(encode_packet(request_id, 0, f"Unknown request {packet_type:x}"))
+                    elif authenticated:
+                        self.received.append(payload)
+                        if payload == "drop":
+                            return
+                        if payload == "wait":
+                            self.release.wait(5)
+                        output: str = "x" * 10000 if payload == "big" else f"echo {payload}"
+                        for start in range(0, len(output), 4096):
+                            connection.sendall(encode_packet(request_id, 0, output[start:start + 4096]))
+            except OSError:
+                pass
+
+    def close(self):
+        self.release.set()
+        self.server.close()
+
+# ----------------------------------------------------------------
+
+class RconTest(unittest.TestCase):
+    def setUp(self):
+        self.server: FakeRconServer = FakeRconServer()
+        self.addCleanup(self.server.close)
+
+    def connect(self, secret: str = password) -> RconConnection:
+        connection: RconConnection = RconConnection("127.0.0.1", self.server.port, secret, timeout=5)
+        connection.connect()
+        self.addCleanup(connection.close)
+        return connection
+
+    def pool(self, size: int = 2) -> RconPool:
+        pool: RconPool = RconPool("127.0.0.1", self.server.port, password, size=size, timeout=5)
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_login(self):
+        self.assertFalse(self.connect().closed)
+
+    def test_wrong_password(self):
+        with self.assertRaises(RconError):
+            self.connect("wrong")
+
+    def test_fragmented_response(self):
+        connection: RconConnection = self.connect()
+        self.assertEqual(connection.command("big"), "x" * 10000)
+        self.assertEqual(connection.command("list"), "echo list")
+        self.assertEqual(self.server.rejected, 0)
+
+    def test_coalesced_packets_close_connection(self):
+        # 原版行为：两个包落在同一段里会被判为长度错误，因此客户端不能流水线发送
+        with create_connection(("127.0.0.1", self.server.port), timeout=5) as connection:
+            connection.sendall(encode_packet(1, rcon_login, password) + encode_packet(2, rcon_command, "list"))
+            while connection.recv(4096):
+                pass
+        self.assertEqual(self.server.rejected, 1)
+
+    def test_pool_runs_commands_concurrently(self):
+        pool: RconPool = self.pool(2)
+        with ThreadPoolExecutor(2) as executor:
+            slow = executor.submit(pool.command, "wait")
+            self.assertEqual(pool.command("list"), "echo list") # 第一条连接仍在等待时由第二条连接处理
+            self.assertFalse(slow.done())
+            self.server.release.set()
+            self.assertEqual(slow.result(5), "echo wait")
+        self.assertEqual(self.server.connections, 2)
+        self.assertEqual(self.server.rejected, 0)
+
+    def test_connection_dropped(self):
+        connection: RconConnection = self.connect()
+        with self.assertRaises(RconError):
+            connection.command("drop")
+        self.assertTrue(connection.closed)
+        with self.assertRaises(RconError):
+            connection.command("list")
+
+    def test_timeout_does_not_leak(self):
+        pool: RconPool = self.pool(1)
+        with self.assertRaises(RconError):
+            pool.command("wait", timeout=0.2)
+        self.assertEqual(pool.connections + pool.idle, list()) # 超时的连接已关闭并移出连接池
+        self.server.release.set()
+        self.assertEqual(pool.command("list"), "echo list") # 新连接不会收到上一条命令迟到的响应
+        self.assertEqual(self.server.connections, 2)
+
+    def test_pool_replaces_closed_connection(self):
+        pool: RconPool = self.pool(1)
+        self.assertEqual(pool.command("list"), "echo list")
+        first: RconConnection = pool.idle[0]
+        first.close()
+        self.assertEqual(pool.command("list"), "echo list")
+        self.assertIsNot(pool.idle[0], first)
+        self.assertEqual(self.server.connections, 2)
+
+    def test_oversized_command(self):
+        connection: RconConnection = self.connect()
+        with self.assertRaises(RconError):
+            connection.command("x" * (rcon_max_payload + 1))
+        self.assertEqual(connection.command("x" * rcon_max_payload), "echo " + "x" * rcon_max_payload)
+        self.assertEqual(self.server.received, ["x" * rcon_max_payload])
+        self.assertEqual(self.server.rejected, 0)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+from spool import ConsoleSpool
+
+import unittest
+from os import path, listdir, mkdir
+from tempfile import TemporaryDirectory
+
+class ConsoleSpoolTest(unittest.TestCase):
+    def setUp(self):
+        self.directory: TemporaryDirectory = TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def touch(self, name: str):
+        with open(path.join(self.directory.name, name), mode="wb") as file:
+            file.write(b"x")
+
+    def test_prune_counts_uncompressed_segments(self):
+        spool: ConsoleSpool = ConsoleSpool(self.directory.name, max_segments=3)
+        self.touch("console-20240101-000000-0001.log.gz")
+        self.touch("console-20240101-000001-0002.log") # 压缩失败遗留
+        self.touch("console-20240101-000002-0003.log.gz")
+        self.touch("console-20240101-000003-0004.log")
+        self.touch("console-20240101-000004-0005.log.gz")
+        self.touch("console.log")
+        spool.prune()
+        self.assertEqual(sorted(listdir(self.directory.name)), [
+            "console-20240101-000002-0003.log.gz",
+            "console-20240101-000003-0004.log",
+            "console-20240101-000004-0005.log.gz",
+            "console.log",
+        ])
+
+    def test_failed_compress_leaves_no_temp(self):
+        spool: ConsoleSpool = ConsoleSpool(self.directory.name)
+        source: str = path.join(self.directory.name, "console-20240101-000000-0001.log")
+        self.touch("console-20240101-000000-0001.log")
+        self.touch("console-20240101-000000-0001.log.gz.tmp")
+        # 目标是目录时改名失败
+        target: str = source + ".gz"
+        mkdir(target)
+        with self.assertRaises(OSError):
+            spool.compress(source)
+        self.assertFalse(path.exists(target + ".tmp"))
+        self.assertTrue(path.exists(source))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,14 @@
 from os import remove, path
-from sys import platform
+from sys import platform, executable
 from shutil import rmtree
 from typing import Literal, Callable
-from subprocess import check_output, CalledProcessError
+from subprocess import check_output, CalledProcessError, DEVNULL, PIPE
+from subprocess import run as run_process, TimeoutExpired
 
 caches: list[str] = [
     "__pycache__/",
     "logs/",
+    "runner_logs/",
     "dynamic-data-pack-cache/",
     "usercache.json",
     "mods/.connector/"
@@ -26,6 +28,7 @@ vasts: list[str] = caches + [
 
 resets: list[str] = vasts + [
     "world/",
+    "runner_data/",
     "banned-ips.json",
     "banned-players.json",
     "ops.json",
@@ -82,4 +85,25 @@ def write_eula():
 		with open("eula.txt", mode="w", encoding="utf-8") as f:
 			f.write("#INF.\neula=true")
 	except:
-		pass
\ No newline at end of file
+		pass
+
+def import_profile(module: str, search_path: str = ".", timeout: float = 60) -> list[tuple[str, float, float]]:
+    # 在新进程中以-X importtime导入，返回 [(模块名, 自身ms, 累计ms)]，按导入完成顺序排列，最后一项为module本身
+    # search_path可以是源码目录，也可以是start.pyz
+    try:
+        output: str = run_process(
+            [executable, "-X", "importtime", "-c", f"import sys; sys.path.insert(0, {search_path!r}); import {module}"],
+            stdin=DEVNULL, stdout=DEVNULL, stderr=PIPE, text=True, timeout=timeout
+        ).stderr
+    except (OSError, TimeoutExpired):
+        return list()
+
+    result: list[tuple[str, float, float]] = list()
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        fields: list[str] = line[len("import time:"):].split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        result.append((fields[2].strip(), int(fields[0]) / 1000, int(fields[1]) / 1000))
+    return result
@@ -31,6 +31,20 @@ class Page:
 
 # ----------------------------------------------------------------
 
+class LazyPage(Page):
+	def __init__(self, factory: Callable[[], Page]):
+		# 首次进入时才构造实际页面，之后复用同一个对象
+		super().__init__()
+		self.factory: Callable[[], Page] = factory
+		self.page: Page = None
+
+	def do(self):
+		if self.page is None:
+			self.page: Page = self.factory()
+		self.page.do()
+
+# ----------------------------------------------------------------
+
 class Choose(Page):
 	def __init__(
 		self,
@@ -1,5 +1,6 @@
 from typing import Any, Literal, TypedDict, TypeVar, Dict, Generic
 from json import dumps, loads, JSONDecodeError
+from copy import deepcopy
 
 T = TypeVar("T", bound=Dict[str, Any])
 
@@ -79,9 +80,13 @@ class Config(Generic[T]):
 				text: str = file.read()
 
 			data: T = loads(text)
-			return rebuild(cls, data)
+			config: Config[T] = rebuild(cls, data)
+			for key, value in default.items(): # 补全旧配置文件中缺失的键，复制以免多次加载共用默认值中的列表与字典
+				if not key in config:
+					config[key] = deepcopy(value)
+			return config
 		except (FileNotFoundError, JSONDecodeError):
-			return cls[T](default)
+			return cls[T](deepcopy(default))
 
 	def items(self):
 		return self.data.items()
@@ -0,0 +1,130 @@
+from pipe import RawLine
+from shutdown import ShutdownOrchestrator
+
+from os import path, makedirs, kill
+from time import monotonic, strftime
+from typing import Callable
+from threading import Thread, Event
+from subprocess import run as run_process, PIPE, STDOUT, TimeoutExpired
+
+import signal
+
+dump_directory: str = path.join("runner_data", "dumps")
+
+# ----------------------------------------------------------------
+
+def dump_threads(pid: int, jcmd: str | None, directory: str = dump_directory) -> str:
+    # 优先用jcmd写入文件；没有jcmd时退回SIGQUIT，线程转储会输出到服务器控制台（及存档）
+    if jcmd:
+        try:
+            result = run_process([jcmd, str(pid), "Thread.print", "-l"], stdout=PIPE, stderr=STDOUT, timeout=30)
+            if result.returncode == 0 and result.stdout:
+                makedirs(directory, exist_ok=True)
+                file_path: str = path.join(directory, f"threads-{strftime("%Y%m%d-%H%M%S")}-{pid}.txt")
+                with open(file_path, mode="wb") as file:
+                    file.write(result.stdout)
+                return f"线程转储已保存：{file_path}"
+        except (OSError, TimeoutExpired):
+            pass
+
+    if hasattr(signal, "SIGQUIT"):
+        try:
+            kill(pid, signal.SIGQUIT)
+            return "jcmd不可用，已发送SIGQUIT，线程转储见控制台输出"
+        except OSError:
+            pass
+    return "无法获取线程转储"
+
+# ----------------------------------------------------------------
+
+class HangWatchdog:
+    def __init__(
+        self,
+        silence_seconds: float,
+        command: Callable[[str], None],
+        notify: Callable[[str], None],
+        shutdown: ShutdownOrchestrator,
+        jcmd: str = None,
+        rcon_probe: Callable[[float], bool | None] = None,
+        ping_failed: Callable[[], bool] = None,
+        probe_seconds: float = 30,
+        stop_grace: float = 60,
+        interval: float = 5
+    ):
+        self.silence_seconds: float = silence_seconds
+        self.command: Callable[[str], None] = command
+        self.notify: Callable[[str], None] = notify
+        self.shutdown: ShutdownOrchestrator = shutdown
+        self.jcmd: str = jcmd
+        # 经RCON探测，返回None表示没有可用的RCON连接池，此时才向控制台发送探测命令
+        self.rcon_probe: Callable[[float], bool | None] = rcon_probe
+        # 本地状态查询连续失败，与输出是否停止无关，单独即可判定卡死
+        self.ping_failed: Callable[[], bool] = ping_failed
+        self.probe_seconds: float = probe_seconds
+        self.stop_grace: float = stop_grace
+        self.interval: float = interval
+
+        self.pid: int = None
+        self.last_output: float = monotonic()
+        self.thread: Thread = None
+        self.stopped: Event = Event()
+        self.hangs: int = 0
+
+    def touch(self, line: RawLine, is_error: bool):
+        self.last_output = monotonic()
+
+    def start(self, pid: int, ready: Callable[[], bool]):
+        self.stop()
+        self.pid: int = pid
+        self.last_output = monotonic()
+        self.stopped.clear()
+        self.thread: Thread = Thread(target=lambda: self.watch_loop(ready), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        # 进程退出时调用；升级流程中的等待也以此为“已退出”信号
+        if self.thread is None:
+            return
+        self.stopped.set()
+        self.thread.join(timeout=5)
+        self.thread: Thread = None
+
+    # ----------------------------------------------------------------
+
+    def watch_loop(self, ready: Callable[[], bool]):
+        while not self.stopped.wait(self.interval):
+            if not ready():
+                continue
+            if self.ping_failed is not None and self.ping_failed():
+                self.on_hang("本地状态查询连续无响应")
+                return
+            if monotonic() - self.last_output < self.silence_seconds:
+                continue
+
+            probe_at: float = monotonic()
+            answered: bool | None = self.rcon_probe(self.probe_seconds) if self.rcon_probe else None
+            if answered:
+                continue
+            if answered is None:
+                # 没有RCON时经控制台探测，任何输出都说明服务器线程仍在处理控制台
+                self.command("list\n")
+                if self.stopped.wait(self.probe_seconds):
+                    return
+                if self.last_output > probe_at:
+                    continue
+            if self.stopped.is_set():
+                return
+
+            self.on_hang(f"服务器已无响应{monotonic() - probe_at + self.silence_seconds:.0f}秒")
+            return
+
+    def on_hang(self, reason: str):
+        self.hangs += 1
+        self.notify(f"{reason}，判定为卡死。")
+        self.notify(dump_threads(self.pid, self.jcmd))
+
+        # 卡死的服务器不会输出保存进度，stop阶段使用固定的短期限
+        self.shutdown.escalate(
+            self.pid, lambda: self.command("reboot\n"), self.stopped.wait, self.notify,
+            reason="hang", grace=self.stop_grace
+        )